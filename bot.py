@@ -2,6 +2,18 @@
 import os
 import asyncio
 import logging
+import json
+import hashlib
+import sqlite3
+import heapq
+import itertools
+import time
+import sys
+import threading
+import traceback
+import collections
+import weakref
+from array import array
 from datetime import datetime, timedelta
 import re
 from dotenv import load_dotenv
@@ -35,43 +47,83 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 
-# ===== Tiny HTTP health server (optional) =====
+# ===== Health / admin HTTP server (Render/UptimeRobot) =====
 from aiohttp import web
 
-async def _health(_request):
-    return web.Response(text="OK")
+async def _metrics(_request):
+    return web.Response(body=METRICS.render().encode("utf-8"),
+                        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
 
-async def _setup_http():
-    app = web.Application()
-    app.router.add_get("/", _health)
-    app.router.add_get("/health", _health)
+async def _slow(_request):
+    return web.json_response(LOOP_LAG.snapshot())
 
-    host = os.getenv("HOST") or "127.0.0.1"
-    ports_to_try = []
-    if os.getenv("PORT"):
-        try:
-            ports_to_try.append(int(os.getenv("PORT")))
-        except Exception:
-            pass
-    ports_to_try += [10000, 0]  # 0 -> random free port
-
-    runner = web.AppRunner(app)
-    await runner.setup()
+class HealthServer:
+    """The one HTTP server of the process, started once from ``__main__`` before bot.start().
 
-    for port in ports_to_try:
+    ``/`` and ``/health`` are liveness (always 200 while the loop runs). ``/ready`` is 200 only
+    when the gateway is connected and SCHEDULER runs; otherwise 503 naming the failing
+    checks. Whether the command tree is synced is reported in the body but never fails the
+    probe: a failed sync is retried by sync_commands/on_ready, and a restart would not fix it.
+    Readiness flags are plain attributes flipped by the lifecycle events, and every possible
+    response body is pre-encoded, so polling costs no formatting or JSON work.
+    """
+    CHECKS = ("gateway", "scheduler")   # gate /ready
+    INFO = ("commands",)                # reported by /ready, never fail it
+    _OK = b"OK"
+
+    def __init__(self):
+        self.gateway = False
+        self.commands = False
+        self._runner: web.AppRunner | None = None
+        self._bodies: dict[tuple[bool, ...], tuple[int, bytes]] = {}
+        names = self.CHECKS + self.INFO
+        for state in itertools.product((False, True), repeat=len(names)):
+            failing = [name for name, ok in zip(self.CHECKS, state) if not ok]
+            pending = [name for name, ok in zip(names, state) if not ok and name in self.INFO]
+            body = "NOT READY: " + ", ".join(failing) if failing else "READY"
+            if pending:
+                body += " (not synced: " + ", ".join(pending) + ")"
+            self._bodies[state] = (503 if failing else 200, body.encode())
+
+    def state(self) -> tuple[bool, bool, bool]:
+        return (self.gateway and not bot.is_closed(), SCHEDULER.running, self.commands)
+
+    async def _live(self, _request):
+        return web.Response(body=self._OK, content_type="text/plain")
+
+    async def _ready(self, _request):
+        status, body = self._bodies[self.state()]
+        return web.Response(status=status, body=body, content_type="text/plain")
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/", self._live)
+        app.router.add_get("/health", self._live)
+        app.router.add_get("/ready", self._ready)
+        app.router.add_get("/metrics", _metrics)
+        app.router.add_get("/debug/slow", _slow)
+        return app
+
+    async def start(self):
+        """Bind HOST:PORT (Render sets PORT). Idempotent: later calls are no-ops."""
+        if self._runner is not None:
+            return
+        host = os.getenv("HOST") or "0.0.0.0"
+        port = int(os.getenv("PORT", "8080"))
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
         try:
-            site = web.TCPSite(runner, host=host, port=port)
-            await site.start()
-            try:
-                if getattr(site, "_server", None) and site._server.sockets:
-                    port = site._server.sockets[0].getsockname()[1]
-            except Exception:
-                pass
+            await web.TCPSite(self._runner, host, port).start()
             logging.getLogger("http").info(f"HTTP health server on {host}:{port}")
-            return
-        except Exception as e:
-            logging.getLogger("http").warning(f"Health server port {port} failed: {e}")
-    logging.getLogger("http").warning("Health server NOT started.")
+        except OSError as e:
+            logging.getLogger("http").warning(f"Health server NOT started ({host}:{port}): {e}")
+
+    async def aclose(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+HEALTH = HealthServer()
 
 # ===== Config =====
 load_dotenv()
@@ -80,6 +132,8 @@ GUILD_ID = os.getenv("GUILD_ID")  # optional but recommended for fast guild sync
 
 # Role required to use commands (besides admins/owner)
 REQUIRED_ROLE_ID = int(os.getenv("REQUIRED_ROLE_ID", "1422343548216410151"))
+# Extra roles: "111,222" (any guild) and/or "guild_id:role_id" pairs
+REQUIRED_ROLE_IDS = os.getenv("REQUIRED_ROLE_IDS", "")
 
 # Images / channel used by pings
 CAYO_IMAGE_URL    = os.getenv("CAYO_IMAGE_URL", "https://cdn.discordapp.com/attachments/1224129510535069766/1414204332747915274/image.png?ex=68e644eb&is=68e4f36b&hm=85fb17e716b33129fe78f48823089127f4dfbf5d3336428125dd7ec9576b2838&")
@@ -99,44 +153,970 @@ class GuildRoleGatedTree(app_commands.CommandTree):
         # Allow /spect and /unspect to everyone
         cmd = getattr(interaction, "command", None)
         name = getattr(cmd, "name", None) or getattr(cmd, "qualified_name", None)
+        _track_interaction(interaction, "command", str(getattr(cmd, "qualified_name", name)))
         if str(name).lower() in {"spect", "unspect"}:
             return True
 
-        if interaction.guild is None:
-            raise app_commands.CheckFailure("Tej komendy można użyć tylko na serwerze.")
-
-        m: discord.Member = interaction.user  # type: ignore
-        # Admin/owner bypass
-        if m.guild_permissions.administrator or m == interaction.guild.owner:
-            return True
-        # Required role
-        if REQUIRED_ROLE_ID and any(r.id == REQUIRED_ROLE_ID for r in m.roles):
-            return True
-
-        raise app_commands.CheckFailure("Nie masz wymaganej roli.")
+        # Owner/admin/configured roles (verdict cached, see PermissionService)
+        return PERMS.check(interaction)
 bot = commands.Bot(command_prefix="!", intents=intents, tree_cls=GuildRoleGatedTree)
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger("bot")
 
+# ===== Metrics (Prometheus text format, served on /metrics) =====
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Metrics:
+    """Minimal in-process counters/histograms plus gauges read at scrape time."""
+
+    def __init__(self):
+        self._meta: dict[str, tuple[str, str]] = {}              # name -> (type, help)
+        self._counters: dict[str, dict[tuple, float]] = {}
+        self._hists: dict[str, dict[tuple, list]] = {}           # labels -> [bucket counts..., sum, count]
+        self._gauges: dict[str, object] = {}                     # name -> fn() -> iterable[(labels, value)]
+
+    def describe(self, name: str, kind: str, help_text: str):
+        self._meta[name] = (kind, help_text)
+
+    def inc(self, name: str, value: float = 1, /, **labels):
+        series = self._counters.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, /, **labels):
+        series = self._hists.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        h = series.get(key)
+        if h is None:
+            h = series[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                h[i] += 1
+        h[-2] += value
+        h[-1] += 1
+
+    def gauge(self, name: str, help_text: str, fn):
+        self.describe(name, "gauge", help_text)
+        self._gauges[name] = fn
+
+    @staticmethod
+    def _labels(labels, extra: tuple = ()) -> str:
+        pairs = tuple(labels) + extra
+        if not pairs:
+            return ""
+        body = ",".join(
+            '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+            for k, v in pairs
+        )
+        return "{" + body + "}"
+
+    def _header(self, out: list[str], name: str, default_kind: str):
+        kind, help_text = self._meta.get(name, (default_kind, ""))
+        if help_text:
+            out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+
+    def render(self) -> str:
+        out: list[str] = []
+        for name, series in self._counters.items():
+            self._header(out, name, "counter")
+            for key, v in series.items():
+                out.append(f"{name}{self._labels(key)} {v:g}")
+        for name, series in self._hists.items():
+            self._header(out, name, "histogram")
+            for key, h in series.items():
+                for i, bound in enumerate(LATENCY_BUCKETS):
+                    out.append(f"{name}_bucket{self._labels(key, (('le', f'{bound:g}'),))} {h[i]}")
+                out.append(f"{name}_bucket{self._labels(key, (('le', '+Inf'),))} {h[-1]}")
+                out.append(f"{name}_sum{self._labels(key)} {h[-2]:.6f}")
+                out.append(f"{name}_count{self._labels(key)} {h[-1]}")
+        for name, fn in self._gauges.items():
+            try:
+                samples = list(fn())
+            except Exception as e:
+                log.warning(f"Metryka {name} nie powiodła się: {e}")
+                continue
+            self._header(out, name, "gauge")
+            for labels, v in samples:
+                out.append(f"{name}{self._labels(tuple(sorted(labels.items())))} {float(v):g}")
+        return "\n".join(out) + "\n"
+
+METRICS = Metrics()
+METRICS.describe("interaction_latency_seconds", "histogram",
+                 "Czas od odebrania interakcji do końca obsługi (komenda/przycisk).")
+METRICS.describe("interaction_ack_seconds", "histogram",
+                 "Czas od odebrania interakcji do pierwszej odpowiedzi (defer/send/edit/modal).")
+METRICS.describe("interaction_deferred_response_seconds", "histogram",
+                 "Czas od defer() do końca obsługi interakcji.")
+METRICS.describe("discord_http_requests_total", "counter", "Zapytania REST do Discorda wg trasy i statusu.")
+METRICS.describe("discord_http_ratelimited_total", "counter", "Odpowiedzi 429 (ponawiane przez discord.py) wg trasy.")
+
+
+class TimedInteractionResponse(discord.InteractionResponse):
+    """InteractionResponse that stamps the moment the interaction was acknowledged."""
+
+    def _stamp(self, how: str):
+        extras = self._parent.extras
+        if "acked_at" not in extras:
+            extras["acked_at"] = time.perf_counter()
+            extras["acked_how"] = how
+
+    async def defer(self, **kwargs):
+        self._stamp("defer")
+        return await super().defer(**kwargs)
+
+    async def send_message(self, *args, **kwargs):
+        self._stamp("send")
+        return await super().send_message(*args, **kwargs)
+
+    async def edit_message(self, *args, **kwargs):
+        self._stamp("edit")
+        return await super().edit_message(*args, **kwargs)
+
+    async def send_modal(self, *args, **kwargs):
+        self._stamp("modal")
+        return await super().send_modal(*args, **kwargs)
+
+
+def _track_interaction(interaction: discord.Interaction, kind: str, name: str):
+    extras = interaction.extras
+    if "t0" in extras:
+        return
+    extras["t0"] = time.perf_counter()
+    extras["metric"] = (kind, name)
+    try:
+        # Interaction.response is a cached slot; pre-fill it with the timed variant.
+        interaction._cs_response = TimedInteractionResponse(interaction)
+    except Exception:
+        pass
+
+
+def _finish_interaction(interaction: discord.Interaction):
+    extras = interaction.extras
+    t0 = extras.pop("t0", None)
+    if t0 is None:
+        return
+    kind, name = extras.get("metric", ("?", "?"))
+    now = time.perf_counter()
+    METRICS.observe("interaction_latency_seconds", now - t0, kind=kind, name=name)
+    acked = extras.get("acked_at")
+    if acked is not None:
+        METRICS.observe("interaction_ack_seconds", acked - t0, kind=kind, name=name)
+        if extras.get("acked_how") == "defer":
+            METRICS.observe("interaction_deferred_response_seconds", now - acked, kind=kind, name=name)
+
+
+def _item_label(item) -> str:
+    label = getattr(item, "label", None)
+    if label:
+        return str(label)
+    custom_id = getattr(item, "custom_id", None) or ""
+    if ":" in custom_id:
+        return custom_id.rsplit(":", 1)[-1]
+    return type(item).__name__
+
+
+class MeteredView(discord.ui.View):
+    """discord.ui.View that records per-button latency (all bot views derive from it)."""
+
+    async def _scheduled_task(self, item, interaction: discord.Interaction):
+        _track_interaction(interaction, "component", f"{type(self).__name__}.{_item_label(item)}")
+        try:
+            await super()._scheduled_task(item, interaction)
+        finally:
+            _finish_interaction(interaction)
+
+
+class MeteredModal(discord.ui.Modal):
+    """discord.ui.Modal with the same latency tracking as MeteredView."""
+
+    async def _scheduled_task(self, interaction: discord.Interaction, components):
+        _track_interaction(interaction, "modal", type(self).__name__)
+        try:
+            await super()._scheduled_task(interaction, components)
+        finally:
+            _finish_interaction(interaction)
+
+
+@bot.event
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    _finish_interaction(interaction)
+
+
+_ROUTE_BASE = re.compile(r"^https?://[^/]+/api/v\d+")
+_ROUTE_IDS = re.compile(r"/\d{15,21}")
+
+def _route_template(url: str) -> str:
+    """'https://discord.com/api/v10/channels/123.../messages/456...' -> '/channels/:id/messages/:id'"""
+    path = _ROUTE_BASE.sub("", url.split("?", 1)[0])
+    return _ROUTE_IDS.sub("/:id", path)
+
+
+class _RateLimitLogCounter(logging.Filter):
+    """Counts the 429 retries discord.py only reports through its 'discord.http' logger."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if "responded with 429" in str(record.msg) and len(record.args or ()) >= 2:
+            method, url = record.args[0], record.args[1]
+            METRICS.inc("discord_http_ratelimited_total", method=method, route=_route_template(str(url)))
+        elif "Global rate limit" in str(record.msg):
+            METRICS.inc("discord_http_ratelimited_total", method="*", route="global")
+        return True
+
+
+def _instrument_http(client: commands.Bot):
+    logging.getLogger("discord.http").addFilter(_RateLimitLogCounter())
+    request = client.http.request
+
+    async def counted_request(route, **kwargs):
+        status = "ok"
+        try:
+            return await request(route, **kwargs)
+        except discord.HTTPException as e:
+            status = str(e.status)
+            raise
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            METRICS.inc("discord_http_requests_total", method=route.method, route=_route_template(route.url),
+                        status=status)
+
+    client.http.request = counted_request
+
+_instrument_http(bot)
+
+
+# ----- outbound REST dispatcher -----
+REST_CONCURRENCY = int(os.getenv("REST_CONCURRENCY", "8"))  # zapisy kanałowe wykonywane jednocześnie
+
+METRICS.describe("rest_queue_wait_seconds", "histogram", "Czas oczekiwania zapisu w kolejce RestDispatcher wg rodzaju.")
+
+
+class _RestJob:
+    __slots__ = ("route", "kwargs", "future", "kind", "queued_at")
+
+    def __init__(self, route, kwargs, future, kind):
+        self.route = route
+        self.kwargs = kwargs
+        self.future = future
+        self.kind = kind
+        self.queued_at = time.perf_counter()
+
+
+class RestDispatcher:
+    """Single choke point for channel writes made through ``client.http.request``.
+
+    * every write to a channel (send, edit, delete, reactions) queues per channel and runs
+      one at a time per channel (Discord's message buckets are per channel), sends and
+      deletes ahead of edits;
+    * at most ``concurrency`` channel writes are in flight across all channels;
+    * reads and non-channel routes pass straight through.
+
+    Interaction responses, followups and edit_original_response never reach this layer:
+    discord.py sends them through its webhook adapter, on per-interaction-token buckets, so
+    they never wait behind a queued re-render. Dropping superseded edits is RENDER's job
+    (newest state wins per message before anything is sent), not the dispatcher's.
+    """
+
+    SEND, EDIT = 0, 1
+    KINDS = ("send", "edit")
+
+    def __init__(self, concurrency: int = REST_CONCURRENCY):
+        self._slots = asyncio.Semaphore(max(1, concurrency))
+        self._request = None
+        self._lanes: dict[int, list] = {}               # channel_id -> heap[(kind, seq, job)]
+        self._workers: dict[int, asyncio.Task] = {}
+        self._seq = itertools.count()
+        self.depth = [0, 0]                             # queued jobs per kind
+
+    def install(self, client: commands.Bot):
+        self._request = client.http.request
+
+        async def dispatched_request(route, **kwargs):
+            return await self.submit(route, kwargs)
+
+        client.http.request = dispatched_request
+
+    @classmethod
+    def classify(cls, route) -> int | None:
+        """Kind of write for ``route``, or None for requests that bypass the queue."""
+        if route.method in ("GET", "HEAD") or route.channel_id is None:
+            return None
+        if route.method == "PATCH" and route.path == "/channels/{channel_id}/messages/{message_id}":
+            return cls.EDIT
+        return cls.SEND
+
+    async def submit(self, route, kwargs: dict):
+        kind = self.classify(route)
+        if kind is None:
+            return await self._request(route, **kwargs)
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())  # caller may be gone
+        channel_id = int(route.channel_id)
+        heapq.heappush(self._lanes.setdefault(channel_id, []),
+                       (kind, next(self._seq), _RestJob(route, kwargs, future, kind)))
+        self.depth[kind] += 1
+        if channel_id not in self._workers:
+            self._workers[channel_id] = asyncio.create_task(self._drain(channel_id))
+        return await asyncio.shield(future)
+
+    async def _drain(self, channel_id: int):
+        lane = self._lanes[channel_id]
+        try:
+            while lane:
+                async with self._slots:
+                    if not lane:
+                        break
+                    _, _, job = heapq.heappop(lane)
+                    self.depth[job.kind] -= 1
+                    METRICS.observe("rest_queue_wait_seconds", time.perf_counter() - job.queued_at,
+                                    kind=self.KINDS[job.kind])
+                    try:
+                        result = await self._request(job.route, **job.kwargs)
+                    except asyncio.CancelledError:
+                        job.future.cancel()
+                        raise
+                    except Exception as e:
+                        if not job.future.done():
+                            job.future.set_exception(e)
+                    else:
+                        if not job.future.done():
+                            job.future.set_result(result)
+        finally:
+            self._workers.pop(channel_id, None)
+            for _, _, job in lane:  # only left behind when the worker was cancelled
+                self.depth[job.kind] -= 1
+                job.future.cancel()
+            self._lanes.pop(channel_id, None)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "lanes": len(self._lanes),
+            **{f"queued_{name}": self.depth[i] for i, name in enumerate(self.KINDS)},
+        }
+
+
+REST = RestDispatcher()
+REST.install(bot)
+METRICS.gauge("rest_queue_depth", "Zapisy kanałowe czekające w RestDispatcher wg rodzaju.",
+              lambda: [({"kind": name}, REST.depth[i]) for i, name in enumerate(REST.KINDS)])
+
+
+# ----- event-loop lag watchdog -----
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))
+SLOW_CALLBACK_SECONDS = float(os.getenv("SLOW_CALLBACK_SECONDS", "0.25"))  # próg blokady pętli
+SLOW_CALLBACK_KEEP = int(os.getenv("SLOW_CALLBACK_KEEP", "50"))
+SLOW_STACK_DEPTH = 12
+
+def _callback_context(frame) -> tuple[str, str]:
+    """Walks the (blocked) loop thread's frames up to the UI callback that owns them."""
+    while frame is not None:
+        code = frame.f_code
+        if code.co_name == "_scheduled_task":
+            owner = frame.f_locals.get("self")
+            if isinstance(owner, discord.ui.View):
+                return type(owner).__name__, _item_label(frame.f_locals.get("item"))
+            if isinstance(owner, discord.ui.Modal):
+                return type(owner).__name__, "submit"
+        inter = frame.f_locals.get("interaction")
+        metric = getattr(inter, "extras", {}).get("metric") if inter is not None else None
+        if metric:
+            kind, name = metric
+            if kind == "component":
+                view, _, label = name.partition(".")
+                return view, label
+            return (f"/{name}", "-") if kind == "command" else (name, "submit")
+        frame = frame.f_back
+    return "-", "-"
+
+
+class LoopLagMonitor:
+    """Measures event-loop lag and profiles callbacks that block the loop.
+
+    A coroutine beats every ``interval`` seconds; the overshoot of its sleep is the loop lag.
+    A daemon thread watches the beat: once the loop has been silent for ``threshold`` it takes
+    one stack sample of the loop thread and notes the view class / button that owns it. When
+    the loop comes back the stall is recorded with its real duration and logged.
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, threshold: float = SLOW_CALLBACK_SECONDS):
+        self.interval = min(interval, threshold / 2) if threshold > 0 else interval
+        self.threshold = threshold
+        self.last = 0.0
+        self.max = 0.0
+        self.stalls: collections.deque[dict] = collections.deque(maxlen=SLOW_CALLBACK_KEEP)
+        self._beat = time.monotonic()
+        self._sample: dict | None = None
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._loop_thread = threading.get_ident()
+            self._beat = time.monotonic()
+            self._task = asyncio.create_task(self._run())
+        if self.threshold > 0 and (self._thread is None or not self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._thread.start()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            t = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - t - self.interval)
+            self._beat = time.monotonic()
+            self.last = lag
+            self.max = max(self.max, lag)
+            METRICS.observe("event_loop_lag_seconds", lag)
+            if self.threshold > 0 and lag >= self.threshold:
+                self._record(lag)
+            else:
+                self._sample = None
+
+    def _record(self, lag: float):
+        sample, self._sample = self._sample, None
+        sample = sample or {"view": "-", "label": "-", "stack": []}
+        stall = {"at": datetime.now(tz=WARSAW).isoformat(timespec="seconds"), "seconds": round(lag, 3), **sample}
+        self.stalls.append(stall)
+        METRICS.inc("slow_callbacks_total", view=stall["view"], label=stall["label"])
+        log.warning(
+            f"Pętla zablokowana na {lag:.3f}s przez {stall['view']} / {stall['label']}\n"
+            + "".join(stall["stack"])
+        )
+
+    def _watch(self):
+        sampled_beat = None
+        while True:
+            time.sleep(self.threshold / 4)
+            beat = self._beat
+            if time.monotonic() - beat < self.threshold + self.interval or sampled_beat == beat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            sampled_beat = beat
+            try:
+                view, label = _callback_context(frame)
+                stack = traceback.format_stack(frame)[-SLOW_STACK_DEPTH:]
+            except Exception as e:  # frames mutate under us; a lost sample is fine
+                view, label, stack = "-", "-", [f"<brak próbki: {e}>\n"]
+            finally:
+                del frame
+            self._sample = {"view": view, "label": label, "stack": stack}
+
+    def snapshot(self) -> dict:
+        return {
+            "threshold_seconds": self.threshold,
+            "lag_last_seconds": round(self.last, 4),
+            "lag_max_seconds": round(self.max, 4),
+            "stalls": list(self.stalls),
+        }
+
+LOOP_LAG = LoopLagMonitor()
+METRICS.describe("event_loop_lag_seconds", "histogram", "Opóźnienie pętli asyncio (próbkowane co LOOP_LAG_INTERVAL).")
+METRICS.describe("slow_callbacks_total", "counter", "Blokady pętli dłuższe niż SLOW_CALLBACK_SECONDS wg widoku/przycisku.")
+
+
+# ----- gauges read at scrape time -----
+def _gateway_latency():
+    lat = bot.latency
+    if lat == lat and lat != float("inf"):  # NaN/inf before the first heartbeat
+        yield {}, lat
+
+def _active_views():
+    yield {"kind": "capt"}, len(ACTIVE_CAPTS)
+    yield {"kind": "airdrop"}, len(ACTIVE_AIRDROPS)
+    yield {"kind": "persistent"}, len(bot.persistent_views)
+
+def _roster_sizes():
+    views = [(r.kind, v) for r in REGISTRIES for v in r.values()]
+    totals: dict[tuple[str, str], list[int]] = {}
+    for kind, view in views:
+        for attr in ("users", "queue", "picked_list"):
+            roster = getattr(view, attr, None)
+            if roster is None:
+                continue
+            t = totals.setdefault((kind, attr), [0, 0])
+            t[0] += len(roster)
+            t[1] = max(t[1], len(roster))
+    for (kind, attr), (total, biggest) in totals.items():
+        yield {"kind": kind, "roster": attr, "stat": "total"}, total
+        yield {"kind": kind, "roster": attr, "stat": "max"}, biggest
+
+METRICS.gauge("gateway_latency_seconds", "Opóźnienie heartbeatu gatewaya (bot.latency).", _gateway_latency)
+METRICS.gauge("event_loop_lag_last_seconds", "Ostatni pomiar opóźnienia pętli asyncio.",
+              lambda: [({}, LOOP_LAG.last)])
+METRICS.gauge("event_loop_lag_max_seconds", "Największe opóźnienie pętli od startu.",
+              lambda: [({}, LOOP_LAG.max)])
+METRICS.gauge("active_views", "Aktywne widoki eventów (ACTIVE_CAPTS/ACTIVE_AIRDROPS) i widoki persistent.",
+              _active_views)
+METRICS.gauge("roster_members", "Rozmiary list zapisów aktywnych eventów.", _roster_sizes)
+METRICS.gauge("render_scheduler", "Liczniki koalescencji edycji wiadomości (RenderScheduler.stats()).",
+              lambda: [({"stat": k}, v) for k, v in RENDER.stats().items()])
+
 # ===== Active registries =====
-ACTIVE_CAPTS = {}     # (guild_id, channel_id) -> list[CaptView]
-ACTIVE_AIRDROPS = {}  # (guild_id, channel_id) -> AirdropView
+EVENT_GRACE_HOURS = float(os.getenv("EVENT_GRACE_HOURS", "1"))       # po starcie event zostaje jeszcze tyle godzin
+EVENT_REGISTRY_MAX = int(os.getenv("EVENT_REGISTRY_MAX", "200"))    # limit aktywnych eventów jednego rodzaju
+
+class EventRegistry:
+    """Active events of one kind, indexed by message id and by (guild_id, channel_id).
+
+    Views are held weakly: while an event is live discord.py's view store owns it, so an
+    entry disappears by itself once the view is stopped and collected. Events are evicted
+    (view stopped, timers cancelled, STORE entry closed) EVENT_GRACE_HOURS after their start,
+    when their message or channel is deleted, or oldest-first once the registry holds more
+    than ``maxsize`` events. Event views are persistent (timeout=None), so there is no
+    timeout path: the start-based expiry covers abandoned events.
+    """
+
+    def __init__(self, kind: str, maxsize: int = EVENT_REGISTRY_MAX):
+        self.kind = kind
+        self.maxsize = maxsize
+        self._views: "weakref.WeakValueDictionary[int, discord.ui.View]" = weakref.WeakValueDictionary()
+        self._keys: dict[int, tuple[int, int]] = {}               # message_id -> channel key, oldest first
+        self._channels: dict[tuple[int, int], dict[int, None]] = {}  # channel key -> message ids, oldest first
+
+    def add(self, view: discord.ui.View):
+        """Index ``view`` under its current message; call again after the message is re-sent."""
+        msg = getattr(view, "message", None)
+        if msg is None:
+            return
+        mid = msg.id
+        old = getattr(view, "_registry_mid", None)
+        if old == mid:
+            return
+        if old is not None:
+            self._forget(old)
+        key = (view.guild.id, msg.channel.id)
+        self._views[mid] = view
+        self._keys[mid] = key
+        self._channels.setdefault(key, {})[mid] = None
+        view._registry_mid = mid
+        weakref.finalize(view, self._forget, mid)
+        while len(self._keys) > self.maxsize:
+            oldest = self._views.get(next(iter(self._keys)))
+            if oldest is None:
+                self._forget(next(iter(self._keys)))
+            else:
+                self.evict(oldest, "capacity")
+
+    def _forget(self, mid: int):
+        key = self._keys.pop(mid, None)
+        self._views.pop(mid, None)
+        mids = self._channels.get(key)
+        if mids is not None:
+            mids.pop(mid, None)
+            if not mids:
+                del self._channels[key]
+
+    def get(self, message_id: int) -> discord.ui.View | None:
+        return self._views.get(message_id)
+
+    def latest(self, guild_id: int, channel_id: int) -> discord.ui.View | None:
+        """Most recently created event in the channel."""
+        mids = self._channels.get((guild_id, channel_id))
+        for mid in reversed(mids or ()):
+            view = self._views.get(mid)
+            if view is not None:
+                return view
+        return None
+
+    def expire_at(self, view: discord.ui.View, starts_at: datetime):
+        """(Re)arm eviction EVENT_GRACE_HOURS after ``starts_at``."""
+        ref = weakref.ref(view)
+
+        async def expire():
+            v = ref()
+            if v is not None:
+                self.evict(v, "expired")
+
+        SCHEDULER.schedule(SCHEDULER.key("expire", view), starts_at + timedelta(hours=EVENT_GRACE_HOURS), expire)
+
+    def evict(self, view: discord.ui.View, reason: str) -> bool:
+        mid = getattr(view, "_registry_mid", None)
+        if mid is None or self._views.get(mid) is not view:
+            return False
+        self._forget(mid)
+        view._registry_mid = None
+        SCHEDULER.cancel(SCHEDULER.key("expire", view))
+        SCHEDULER.cancel(SCHEDULER.key("start", view))
+        view.stop()
+        STORE.close_event(getattr(view, "event_id", None))
+        METRICS.inc("event_registry_evictions_total", kind=self.kind, reason=reason)
+        log.info(f"{self.kind}: usunięto event {mid} z rejestru ({reason})")
+        return True
+
+    def evict_message(self, message_id: int, reason: str = "deleted"):
+        view = self._views.get(message_id)
+        if view is not None:
+            self.evict(view, reason)
+
+    def evict_channel(self, guild_id: int, channel_id: int, reason: str = "channel_deleted"):
+        for mid in list(self._channels.get((guild_id, channel_id), ())):
+            self.evict_message(mid, reason)
+
+    def values(self) -> list[discord.ui.View]:
+        return [v for v in (self._views.get(mid) for mid in self._keys) if v is not None]
+
+    def __len__(self):
+        return len(self._keys)
+
+ACTIVE_CAPTS = EventRegistry("capt")
+ACTIVE_AIRDROPS = EventRegistry("airdrop")
+ACTIVE_MCLS = EventRegistry("mcl")  # MCL i ZoneWars (MclView)
+REGISTRIES = (ACTIVE_CAPTS, ACTIVE_AIRDROPS, ACTIVE_MCLS)
+METRICS.describe("event_registry_evictions_total", "counter", "Eventy usunięte z rejestru wg powodu.")
+METRICS.gauge("event_registry_size", "Liczba eventów w rejestrach aktywnych eventów.",
+              lambda: [({"kind": r.kind}, len(r)) for r in REGISTRIES])
+
+@bot.event
+async def on_raw_message_delete(payload: discord.RawMessageDeleteEvent):
+    for registry in REGISTRIES:
+        registry.evict_message(payload.message_id)
+
+@bot.event
+async def on_raw_bulk_message_delete(payload: discord.RawBulkMessageDeleteEvent):
+    for registry in REGISTRIES:
+        for mid in payload.message_ids:
+            registry.evict_message(mid)
+
+@bot.event
+async def on_guild_channel_delete(channel: discord.abc.GuildChannel):
+    for registry in REGISTRIES:
+        registry.evict_channel(channel.guild.id, channel.id)
+
+# ===== Persistent event store (SQLite, WAL) =====
+EVENT_DB_PATH = os.getenv("EVENT_DB_PATH", "events.sqlite3")
+EVENT_DB_FLUSH_SECONDS = float(os.getenv("EVENT_DB_FLUSH_SECONDS", "0.5"))
+
+METRICS.describe("journal_ops_collapsed_total", "counter", "Pary add+remove skasowane w kolejce EventStore przed zapisem.")
+
+class EventStore:
+    """Event metadata + append-only signup journal in a local SQLite file.
+
+    All calls made from the event loop only enqueue; a single worker flushes the queue
+    in batches (one transaction per batch) on a thread, so interactions never wait on disk.
+    A "remove" that follows a still-queued "add" of the same user cancels it, so join/leave
+    toggles inside one flush window collapse into their net change.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: list[tuple | None] = []
+        self._queued_adds: dict[tuple, int] = {}  # (event_id, roster, user_id) -> index in _queue
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._conn: sqlite3.Connection | None = None
+        self._db_lock = threading.RLock()        # one thread at a time on the shared connection
+        self._flushing: asyncio.Future | None = None  # batch currently being written on a thread
+        self.written = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _connect(self) -> sqlite3.Connection:
+        with self._db_lock:
+            if self._conn is None:
+                conn = sqlite3.connect(self.path, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS events ("
+                    " event_id INTEGER PRIMARY KEY, kind TEXT NOT NULL,"
+                    " guild_id INTEGER, channel_id INTEGER, message_id INTEGER, meta TEXT)"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS ops ("
+                    " seq INTEGER PRIMARY KEY AUTOINCREMENT, event_id INTEGER NOT NULL,"
+                    " op TEXT NOT NULL, roster TEXT, user_id INTEGER, payload TEXT)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS ops_event ON ops(event_id, seq)")
+                conn.commit()
+                self._conn = conn
+            return self._conn
+
+    # --- loop side (never blocks) ---
+    def _push(self, item: tuple):
+        if not self.enabled:
+            return
+        self._queue.append(item)
+        if self._task is None or self._task.done():
+            try:
+                self._wakeup = asyncio.Event()
+                self._task = asyncio.get_running_loop().create_task(self._worker())
+            except RuntimeError:
+                return  # no running loop yet; flushed by the next push or aclose()
+        self._wakeup.set()
+
+    def save_event(self, event_id: int | None, kind: str, guild_id: int, channel_id: int,
+                   message_id: int | None, meta: dict):
+        if event_id is None:
+            return
+        self._push(("event", event_id, kind, guild_id, channel_id, message_id, json.dumps(meta)))
+
+    def append(self, event_id: int | None, op: str, roster: str | None = None,
+               user_id: int | None = None, payload=None):
+        """Journal one mutation: add/remove (roster, user_id), set (roster, payload=list),
+        text/label (user_id, payload=str or None)."""
+        if event_id is None or not self.enabled:
+            return
+        key = (event_id, roster, user_id)
+        if op == "remove":
+            idx = self._queued_adds.pop(key, None)
+            if idx is not None:
+                self._queue[idx] = None  # add + remove in one window: nothing to write
+                METRICS.inc("journal_ops_collapsed_total")
+                return
+        elif op == "set":
+            self._forget_adds(event_id, roster)
+        self._push(("op", event_id, op, roster, user_id, None if payload is None else json.dumps(payload)))
+        if op == "add":
+            self._queued_adds[key] = len(self._queue) - 1
+
+    def _forget_adds(self, event_id: int, roster: str | None = None):
+        """Queued adds covered by a later set/snap/close must not be cancelled any more."""
+        for key in [k for k in self._queued_adds if k[0] == event_id and (roster is None or k[1] == roster)]:
+            del self._queued_adds[key]
+
+    def _take_batch(self) -> list[tuple]:
+        batch, self._queue = self._queue, []
+        self._queued_adds.clear()
+        return [item for item in batch if item is not None]
+
+    def snapshot(self, event_id: int | None, roster: str, data: bytes):
+        """Replace the journal of one roster with a raw snapshot (Roster/ArrayRoster.to_bytes())."""
+        if event_id is None:
+            return
+        self._forget_adds(event_id, roster)
+        self._push(("snap", event_id, roster, data))
+
+    def close_event(self, event_id: int | None):
+        if event_id is None:
+            return
+        self._forget_adds(event_id)
+        self._push(("close", event_id))
+
+    async def _worker(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            await asyncio.sleep(EVENT_DB_FLUSH_SECONDS)
+            batch = self._take_batch()
+            if not batch:
+                continue
+            # shielded: cancelling the worker (aclose) must not abandon a write already on a thread
+            self._flushing = asyncio.ensure_future(asyncio.to_thread(self._write_batch, batch))
+            try:
+                await asyncio.shield(self._flushing)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning(f"EventStore: zapis {len(batch)} operacji nie powiódł się: {e}")
+            self._flushing = None
+
+    async def aclose(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        if self._flushing is not None:
+            try:
+                await self._flushing
+            except Exception as e:
+                log.warning(f"EventStore: zapis przy zamykaniu nie powiódł się: {e}")
+            self._flushing = None
+        batch = self._take_batch()
+        if batch:
+            await asyncio.to_thread(self._write_batch, batch)
+        with self._db_lock:  # every write has returned by now
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # --- worker thread side ---
+    def _write_batch(self, batch: list[tuple]):
+        with self._db_lock:
+            self._write_locked(batch)
+        self.written += len(batch)
+
+    def _write_locked(self, batch: list[tuple]):
+        conn = self._connect()
+        with conn:
+            for item in batch:
+                if item[0] == "op":
+                    conn.execute("INSERT INTO ops(event_id, op, roster, user_id, payload) VALUES (?, ?, ?, ?, ?)", item[1:])
+                elif item[0] == "event":
+                    conn.execute(
+                        "INSERT INTO events(event_id, kind, guild_id, channel_id, message_id, meta) VALUES (?, ?, ?, ?, ?, ?)"
+                        " ON CONFLICT(event_id) DO UPDATE SET message_id=excluded.message_id, meta=excluded.meta",
+                        item[1:],
+                    )
+                elif item[0] == "snap":
+                    conn.execute("DELETE FROM ops WHERE event_id=? AND roster=?", item[1:3])
+                    conn.execute("INSERT INTO ops(event_id, op, roster, payload) VALUES (?, 'snap', ?, ?)",
+                                 (item[1], item[2], sqlite3.Binary(item[3])))
+                elif item[0] == "close":
+                    conn.execute("DELETE FROM ops WHERE event_id=?", (item[1],))
+                    conn.execute("DELETE FROM events WHERE event_id=?", (item[1],))
+
+    def load(self) -> list[dict]:
+        """Read every open event with its journal (blocking; run via asyncio.to_thread)."""
+        if not self.enabled:
+            return []
+        with self._db_lock:
+            return self._load_locked()
+
+    def _load_locked(self) -> list[dict]:
+        conn = self._connect()
+        events: dict[int, dict] = {}
+        for event_id, kind, guild_id, channel_id, message_id, meta in conn.execute(
+            "SELECT event_id, kind, guild_id, channel_id, message_id, meta FROM events"
+        ):
+            events[event_id] = {
+                "event_id": event_id, "kind": kind, "guild_id": guild_id, "channel_id": channel_id,
+                "message_id": message_id, "meta": json.loads(meta or "{}"), "ops": [],
+            }
+        for event_id, op, roster, user_id, payload in conn.execute(
+            "SELECT event_id, op, roster, user_id, payload FROM ops ORDER BY seq"
+        ):
+            ev = events.get(event_id)
+            if ev is not None:
+                if isinstance(payload, str):
+                    payload = json.loads(payload)
+                ev["ops"].append((op, roster, user_id, payload))
+        return list(events.values())
+
+STORE = EventStore(EVENT_DB_PATH)
+
+def replay_ops(rosters: dict[str, "Roster"], texts: dict[str, dict[int, str]], ops: list[tuple]):
+    """Apply journalled ops onto in-memory rosters and text maps."""
+    for op, roster, uid, payload in ops:
+        if op == "add":
+            r = rosters.get(roster)
+            if r is not None:
+                r.add(uid)
+        elif op == "remove":
+            r = rosters.get(roster)
+            if r is not None:
+                r.discard(uid)
+        elif op == "set":
+            r = rosters.get(roster)
+            if r is not None:
+                r.replace(int(x) for x in (payload or []))
+        elif op == "snap":
+            r = rosters.get(roster)
+            if r is not None:
+                r.load_bytes(payload)
+        elif op in texts:
+            if payload:
+                texts[op][uid] = payload
+            else:
+                texts[op].pop(uid, None)
+
+# ===== Permissions =====
+def _parse_role_config(raw: str) -> dict[int | None, frozenset[int]]:
+    """'111,222' -> roles valid in every guild; '123:111,123:333' -> roles for guild 123 only."""
+    roles: dict[int | None, set[int]] = {}
+    for token in re.split(r"[,;\s]+", raw or ""):
+        if not token:
+            continue
+        try:
+            if ":" in token:
+                gid, rid = token.split(":", 1)
+                roles.setdefault(int(gid), set()).add(int(rid))
+            else:
+                roles.setdefault(None, set()).add(int(token))
+        except ValueError:
+            log.warning(f"REQUIRED_ROLE_IDS: pomijam niepoprawny wpis {token!r}")
+    return {gid: frozenset(ids) for gid, ids in roles.items()}
+
+class PermissionService:
+    """Who may run gated commands and manage events: the guild owner, administrators and
+    members holding one of the configured roles (REQUIRED_ROLE_ID plus REQUIRED_ROLE_IDS).
+
+    Verdicts are cached per (guild, member) and dropped by on_member_update (role changes),
+    on_member_remove, on_guild_role_update/delete and on_guild_update (owner change).
+    """
+
+    def __init__(self, roles: dict[int | None, frozenset[int]]):
+        self._roles = roles
+        self._verdicts: dict[int, dict[int, bool]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def roles_for(self, guild_id: int) -> frozenset[int]:
+        return self._roles.get(None, frozenset()) | self._roles.get(guild_id, frozenset())
+
+    def allowed(self, member) -> bool:
+        guild = getattr(member, "guild", None)
+        if guild is None:
+            return False
+        cache = self._verdicts.get(guild.id)
+        if cache is None:
+            cache = self._verdicts[guild.id] = {}
+        try:
+            verdict = cache[member.id]
+            self.hits += 1
+            return verdict
+        except KeyError:
+            pass
+        self.misses += 1
+        roles = self.roles_for(guild.id)
+        verdict = cache[member.id] = bool(
+            member.id == guild.owner_id
+            or member.guild_permissions.administrator
+            or (roles and not roles.isdisjoint(r.id for r in member.roles))
+        )
+        return verdict
+
+    def can_manage(self, member, event: "EventView | None" = None) -> bool:
+        """allowed(), or the author of ``event``."""
+        return (event is not None and event.is_author(member)) or self.allowed(member)
+
+    def check(self, interaction: discord.Interaction) -> bool:
+        """Command gate; the verdict is kept in interaction.extras so the tree check and
+        role_required_check() resolve it once per interaction."""
+        verdict = interaction.extras.get("perm_allowed")
+        if verdict is None:
+            if interaction.guild is None:
+                raise app_commands.CheckFailure("Tej komendy można użyć tylko na serwerze.")
+            verdict = interaction.extras["perm_allowed"] = self.allowed(interaction.user)
+        if not verdict:
+            raise app_commands.CheckFailure("Nie masz wymaganej roli.")
+        return True
+
+    def invalidate(self, guild_id: int, uid: int):
+        cache = self._verdicts.get(guild_id)
+        if cache is not None:
+            cache.pop(uid, None)
+
+    def drop_guild(self, guild_id: int):
+        self._verdicts.pop(guild_id, None)
+
+    def __len__(self):
+        return sum(len(c) for c in self._verdicts.values())
+
+_ROLE_CONFIG = _parse_role_config(REQUIRED_ROLE_IDS)
+if REQUIRED_ROLE_ID:
+    _ROLE_CONFIG[None] = _ROLE_CONFIG.get(None, frozenset()) | {REQUIRED_ROLE_ID}
+PERMS = PermissionService(_ROLE_CONFIG)
+
+METRICS.gauge("permission_cache", "Cache werdyktów uprawnień (hits/misses/size).",
+              lambda: [({"stat": "hits"}, PERMS.hits), ({"stat": "misses"}, PERMS.misses),
+                       ({"stat": "size"}, len(PERMS))])
 
-# ===== Permissions check =====
 def role_required_check():
     async def predicate(interaction: discord.Interaction) -> bool:
-        if interaction.guild is None:
-            raise app_commands.CheckFailure("Tej komendy można użyć tylko na serwerze.")
-        m: discord.Member = interaction.user
-        if m.guild_permissions.administrator or m == interaction.guild.owner:
-            return True
-        if REQUIRED_ROLE_ID and any(r.id == REQUIRED_ROLE_ID for r in m.roles):
-            return True
-        raise app_commands.CheckFailure("Nie masz wymaganej roli.")
+        return PERMS.check(interaction)
     return app_commands.check(predicate)
 
 @bot.tree.error
 async def on_app_command_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
+    _finish_interaction(interaction)
     msg = "Wystąpił błąd."
     if isinstance(error, app_commands.CheckFailure):
         msg = str(error)
@@ -148,33 +1128,81 @@ async def on_app_command_error(interaction: discord.Interaction, error: app_comm
     except Exception:
         pass
 
-# ===== Helpers =====
-
-# Extra helpers used by ping-* commands
-def _parse_hhmm_to_dt(raw_time: str):
-    """Parse times like '19:00', '19.00', '19 00', or '1900' -> datetime in the nearest future.
-    Tries Europe/Warsaw tz if available (WARSAW), otherwise naive local time.
-    """
-    raw = str(raw_time or "").strip()
-    parts = re.findall(r"\d+", raw)
-    if len(parts) >= 2:
-        hh, mm = int(parts[0]), int(parts[1])
-    elif len(parts) == 1 and len(parts[0]) in (3, 4):
-        hh = int(parts[0][:-2])
-        mm = int(parts[0][-2:])
-    else:
+# ===== Time parsing (HH:MM / +15m / DD.MM HH:MM -> Warsaw datetime) =====
+_TIME_RE = re.compile(r"""
+    \s*(?:
+        \+\s*(?:(?P<rel_h>\d{1,3})\s*(?:h|godz)\.?)?\s*(?:(?P<rel_m>\d{1,4})\s*(?:m|min)?\.?)?   # +15m, +2h, +1h30m, +90
+      | (?:
+            (?P<iso_y>\d{4})-(?P<iso_mo>\d{1,2})-(?P<iso_d>\d{1,2})[\sT]+                      # 2025-12-24 19:00
+          | (?P<d>\d{1,2})[./](?P<mo>\d{1,2})(?:[./](?P<y>\d{2}|\d{4}))?\s+                  # 24.12[.2025] 19:00
+        )?
+        (?:(?P<hh>\d{1,2})(?:\s*[^\d\s]\s*|\s+)(?P<mm>\d{1,2})                                # 19:00 19.00 19 00 19h00 19-00 19:5
+           (?:(?:\s*[^\d\s]\s*|\s+)\d{1,2})?                                                 # :00 seconds, ignored
+          | (?P<hhmm>\d{3,4}))                                                                # 1900
+    )\s*$""", re.VERBOSE | re.IGNORECASE)
+TIME_INPUT_HINT = "**HH:MM**, **+15m** albo **DD.MM HH:MM**"
+_TIME_CACHE_MAX = 512
+_time_cache: dict[str, datetime] = {}
+_time_cache_minute = -1
+
+def _now_minute() -> datetime:
+    return datetime.now(tz=WARSAW).replace(second=0, microsecond=0)
+
+def _parse_event_time(raw: str, now: datetime) -> datetime:
+    m = _TIME_RE.match(raw)
+    if m is None:
         raise ValueError("bad time format")
+    g = m.groupdict()
+    if raw.lstrip().startswith("+"):
+        if g["rel_h"] is None and g["rel_m"] is None:
+            raise ValueError("empty offset")
+        return now + timedelta(hours=int(g["rel_h"] or 0), minutes=int(g["rel_m"] or 0))
+    if g["hhmm"]:
+        hh, mm = int(g["hhmm"][:-2]), int(g["hhmm"][-2:])
+    else:
+        hh, mm = int(g["hh"]), int(g["mm"])
     if not (0 <= hh <= 23 and 0 <= mm <= 59):
         raise ValueError("time out of range")
-    from datetime import datetime, timedelta
-    try:
-        now_pl = datetime.now(tz=WARSAW)
-        t = datetime(now_pl.year, now_pl.month, now_pl.day, hh, mm, tzinfo=WARSAW)
-        return t if t > now_pl else t + timedelta(days=1)
-    except Exception:
-        now_local = datetime.now()
-        t = datetime(now_local.year, now_local.month, now_local.day, hh, mm)
-        return t if t > now_local else t + timedelta(days=1)
+    if g["iso_y"] or g["d"]:
+        if g["iso_y"]:
+            year, month, day = int(g["iso_y"]), int(g["iso_mo"]), int(g["iso_d"])
+        else:
+            year = int(g["y"]) if g["y"] else now.year
+            year += 2000 if year < 100 else 0
+            month, day = int(g["mo"]), int(g["d"])
+        t = datetime(year, month, day, hh, mm, tzinfo=WARSAW)
+        if t <= now and not (g["iso_y"] or g["y"]):
+            t = t.replace(year=now.year + 1)  # "24.12" in late December -> next year
+        if t <= now:
+            raise ValueError("date in the past")
+        return t
+    t = datetime(now.year, now.month, now.day, hh, mm, tzinfo=WARSAW)
+    return t if t > now else t + timedelta(days=1)
+
+def parse_event_time(raw_time: str) -> datetime:
+    """Parse user input into the event datetime (Europe/Warsaw, naive local without tzdata).
+
+    Accepts '19:00', '19.00', '19 00', '19h00', '19-00', '19:5', '19:00:00', '1900' (any
+    non-digit separator, seconds ignored; nearest future occurrence), '+15m', '+2h',
+    '+1h30m' (from now) and explicit dates '24.12 19:00', '24.12.2025 19:00',
+    '2025-12-24 19:00'. Raises ValueError otherwise. Results depend only on the current
+    minute, so they are memoized per (input, minute); the cache is dropped when the
+    minute changes.
+    """
+    global _time_cache_minute
+    raw = str(raw_time or "")
+    minute = int(time.time()) // 60
+    if minute != _time_cache_minute:
+        _time_cache.clear()
+        _time_cache_minute = minute
+    t = _time_cache.get(raw)
+    if t is None:
+        t = _parse_event_time(raw, _now_minute())
+        if len(_time_cache) < _TIME_CACHE_MAX:
+            _time_cache[raw] = t
+    return t
+
+# ===== Helpers =====
 
 def _rel_pl(dtobj):
     """Return Discord relative timestamp for an aware datetime."""
@@ -204,6 +1232,113 @@ def _channel_mention(guild: discord.Guild) -> str | None:
     return f"<#{CAPT_CHANNEL_ID}>"
 
 
+# ===== Member label cache =====
+class MemberLabel:
+    """Pre-rendered display fragments of one guild member."""
+    __slots__ = ("mention", "display_name", "name", "label")
+
+    def __init__(self, member: discord.Member):
+        self.mention = member.mention
+        self.display_name = member.display_name
+        self.name = member.name
+        self.label = f"{self.mention} | {self.display_name}"
+
+class MemberLabelCache:
+    """Per-guild ``user_id -> MemberLabel`` cache used by every roster render.
+
+    Misses (members not in the gateway cache) are cached as None too. Entries are dropped
+    by on_member_update/on_member_remove/on_member_join/on_user_update.
+    """
+
+    def __init__(self):
+        self._guilds: dict[int, dict[int, MemberLabel | None]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, guild: discord.Guild, uid: int) -> MemberLabel | None:
+        cache = self._guilds.get(guild.id)
+        if cache is None:
+            cache = self._guilds[guild.id] = {}
+        try:
+            entry = cache[uid]
+            self.hits += 1
+            return entry
+        except KeyError:
+            pass
+        self.misses += 1
+        m = guild.get_member(uid)
+        entry = cache[uid] = MemberLabel(m) if m else None
+        return entry
+
+    def invalidate(self, guild_id: int, uid: int):
+        cache = self._guilds.get(guild_id)
+        if cache is not None:
+            cache.pop(uid, None)
+
+    def invalidate_user(self, uid: int):
+        for cache in self._guilds.values():
+            cache.pop(uid, None)
+
+    def drop_guild(self, guild_id: int):
+        self._guilds.pop(guild_id, None)
+
+    def __len__(self):
+        return sum(len(c) for c in self._guilds.values())
+
+    async def resolve_missing(self, guild: discord.Guild, user_ids, chunk: int = 100):
+        """Fill entries for ids missing from the gateway cache with chunked
+        ``guild.query_members(user_ids=...)`` requests instead of one fetch_member per id."""
+        missing = [uid for uid in user_ids if guild.get_member(uid) is None]
+        for i in range(0, len(missing), chunk):
+            try:
+                found = await guild.query_members(user_ids=missing[i:i + chunk], limit=chunk, cache=True)
+            except Exception as e:
+                log.warning(f"query_members nie powiódł się: {e}")
+                return
+            cache = self._guilds.setdefault(guild.id, {})
+            for m in found:
+                cache[m.id] = MemberLabel(m)
+
+MEMBERS = MemberLabelCache()
+
+@bot.event
+async def on_member_update(before: discord.Member, after: discord.Member):
+    MEMBERS.invalidate(after.guild.id, after.id)
+    PERMS.invalidate(after.guild.id, after.id)
+
+@bot.event
+async def on_member_remove(member: discord.Member):
+    MEMBERS.invalidate(member.guild.id, member.id)
+    PERMS.invalidate(member.guild.id, member.id)
+
+@bot.event
+async def on_member_join(member: discord.Member):
+    MEMBERS.invalidate(member.guild.id, member.id)
+
+@bot.event
+async def on_user_update(before: discord.User, after: discord.User):
+    MEMBERS.invalidate_user(after.id)
+
+@bot.event
+async def on_guild_remove(guild: discord.Guild):
+    MEMBERS.drop_guild(guild.id)
+    PERMS.drop_guild(guild.id)
+
+@bot.event
+async def on_guild_update(before: discord.Guild, after: discord.Guild):
+    if before.owner_id != after.owner_id:
+        PERMS.drop_guild(after.id)
+
+@bot.event
+async def on_guild_role_update(before: discord.Role, after: discord.Role):
+    if before.permissions != after.permissions:
+        PERMS.drop_guild(after.guild.id)
+
+@bot.event
+async def on_guild_role_delete(role: discord.Role):
+    PERMS.drop_guild(role.guild.id)
+
+
 def fmt_users(
     user_ids: list[int],
     guild: discord.Guild,
@@ -221,7 +1356,7 @@ def fmt_users(
 
     lines: list[str] = []
     for idx, uid in enumerate(user_ids[:limit], start=start_index):
-        m = guild.get_member(uid)
+        m = MEMBERS.get(guild, uid)
         mention = (m.mention if m else f"<@{uid}>")
         parts = [mention]
 
@@ -243,21 +1378,409 @@ def fmt_users(
 def format_numbered_users(user_ids, guild: discord.Guild):
     lines = []
     for i, uid in enumerate(user_ids, start=1):
-        m = guild.get_member(uid)
-        lines.append(f"{i}. {m.mention} | {m.display_name}" if m else f"{i}. <@{uid}>")
+        m = MEMBERS.get(guild, uid)
+        lines.append(f"{i}. {m.label}" if m else f"{i}. <@{uid}>")
     return lines
 
-def chunk_lines(lines, max_chars: int = 1800):
-    chunks, cur, cur_len = [], [], 0
-    for line in lines:
-        ln = len(line) + 1
-        if cur_len + ln > max_chars and cur:
-            chunks.append("\n".join(cur)); cur, cur_len = [line], ln
-        else:
-            cur.append(line); cur_len += ln
-    if cur:
-        chunks.append("\n".join(cur))
-    return chunks
+def persistent_ids(view: discord.ui.View, kind: str, event_id: int, *names: str):
+    """Give the named button/select attributes deterministic custom_ids '<kind>:<event_id>:<name>'
+    so the view can be re-registered with bot.add_view() after a restart."""
+    for name in names:
+        getattr(view, name).custom_id = f"{kind}:{event_id}:{name}"
+
+class Roster:
+    """Insertion-ordered set of user ids used for every signup/picked/queue list.
+
+    add/discard/``in`` are O(1); iteration, slicing and ``numbered()`` follow join order, so
+    the 1-based numbers in embeds stay stable. ``move()`` transfers ids between rosters.
+    """
+    __slots__ = ("_ids",)
+
+    def __init__(self, ids=()):
+        self._ids: dict[int, None] = dict.fromkeys(ids)
+
+    def add(self, uid: int) -> bool:
+        if uid in self._ids:
+            return False
+        self._ids[uid] = None
+        return True
+
+    def discard(self, uid: int) -> bool:
+        if uid not in self._ids:
+            return False
+        del self._ids[uid]
+        return True
+
+    def replace(self, ids):
+        self._ids = dict.fromkeys(ids)
+
+    def clear(self):
+        self._ids.clear()
+
+    def move(self, ids, dst: "Roster") -> list[int]:
+        """Move ``ids`` present here to ``dst`` (appended in the given order); returns moved ids."""
+        moved = []
+        for uid in ids:
+            if uid in self._ids:
+                del self._ids[uid]
+                dst.add(uid)
+                moved.append(uid)
+        return moved
+
+    def numbered(self, start: int = 1):
+        return enumerate(self._ids, start=start)
+
+    def to_bytes(self) -> bytes:
+        ids = array("Q", self._ids)
+        if sys.byteorder != "little":
+            ids.byteswap()
+        return ids.tobytes()
+
+    def load_bytes(self, data: bytes):
+        ids = array("Q")
+        ids.frombytes(data)
+        if sys.byteorder != "little":
+            ids.byteswap()
+        self._ids = dict.fromkeys(ids)
+
+    def __contains__(self, uid) -> bool:
+        return uid in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            if (index.start or 0) >= 0 and (index.stop is None or index.stop >= 0) and index.step is None:
+                return list(itertools.islice(self._ids, index.start, index.stop))
+            return list(self._ids)[index]
+        if index < 0:
+            index += len(self._ids)
+        if not 0 <= index < len(self._ids):
+            raise IndexError("roster index out of range")
+        return next(itertools.islice(self._ids, index, None))
+
+    def __repr__(self):
+        return f"Roster({list(self._ids)!r})"
+
+class ArrayRoster:
+    """Roster backend for very large lists (server-wide pings).
+
+    Ids are packed in an ``array('Q')`` in join order, with an open-addressing hash index
+    (another ``array('Q')``) for O(1) ``in``/add. Costs ~24-40 bytes per id instead of the
+    ~70 of Roster's dict of boxed ints. Same interface as Roster; discard() is a C-level
+    memmove. ``to_bytes()``/``load_bytes()`` snapshot the ids as one little-endian buffer.
+    """
+    __slots__ = ("_ids", "_index", "_filled")
+    _FREE = 0                        # snowflakes are never 0
+    _DEAD = 0xFFFFFFFFFFFFFFFF       # tombstone left by discard()
+
+    def __init__(self, ids=()):
+        self._ids = array("Q")
+        self._index = array("Q", bytes(8 * 16))
+        self._filled = 0  # live + dead slots in _index
+        for uid in ids:
+            self.add(uid)
+
+    def _probe(self, uid: int) -> tuple[int, bool]:
+        """(slot of uid, True) or (slot to insert it into, False)."""
+        index = self._index
+        mask = len(index) - 1
+        i = ((uid * 0x9E3779B97F4A7C15) >> 32) & mask
+        dead = -1
+        while True:
+            v = index[i]
+            if v == uid:
+                return i, True
+            if v == self._FREE:
+                return (dead if dead >= 0 else i), False
+            if v == self._DEAD and dead < 0:
+                dead = i
+            i = (i + 1) & mask
+
+    def _reindex(self):
+        size = 16
+        while size < 2 * len(self._ids) + 2:
+            size *= 2
+        self._index = array("Q", bytes(8 * size))
+        self._filled = 0
+        for uid in self._ids:
+            i, _ = self._probe(uid)
+            self._index[i] = uid
+            self._filled += 1
+
+    def add(self, uid: int) -> bool:
+        i, found = self._probe(uid)
+        if found:
+            return False
+        if self._index[i] == self._FREE:
+            self._filled += 1
+        self._index[i] = uid
+        self._ids.append(uid)
+        if self._filled * 3 > len(self._index) * 2:
+            self._reindex()
+        return True
+
+    def discard(self, uid: int) -> bool:
+        i, found = self._probe(uid)
+        if not found:
+            return False
+        self._index[i] = self._DEAD
+        self._ids.remove(uid)
+        return True
+
+    def replace(self, ids):
+        self._ids = array("Q", dict.fromkeys(ids))
+        self._reindex()
+
+    def clear(self):
+        self._ids = array("Q")
+        self._reindex()
+
+    def move(self, ids, dst) -> list[int]:
+        """Move ``ids`` present here to ``dst`` (appended in the given order); returns moved ids."""
+        moved = []
+        for uid in ids:
+            if self.discard(uid):
+                dst.add(uid)
+                moved.append(uid)
+        return moved
+
+    def numbered(self, start: int = 1):
+        return enumerate(self._ids, start=start)
+
+    def to_bytes(self) -> bytes:
+        if sys.byteorder == "little":
+            return self._ids.tobytes()
+        ids = array("Q", self._ids)
+        ids.byteswap()
+        return ids.tobytes()
+
+    def load_bytes(self, data: bytes):
+        self._ids = array("Q")
+        self._ids.frombytes(data)
+        if sys.byteorder != "little":
+            self._ids.byteswap()
+        self._reindex()
+
+    def __contains__(self, uid) -> bool:
+        return isinstance(uid, int) and 0 < uid < self._DEAD and self._probe(uid)[1]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._ids[index].tolist()
+        return self._ids[index]
+
+    def __repr__(self):
+        return f"ArrayRoster({self._ids.tolist()!r})"
+
+# ===== Event state (ids only) =====
+class EventState:
+    """Long-lived data of one event, kept apart from the discord.ui.View that renders it.
+
+    Holds plain ids instead of Guild/Member/Message objects, so a finished view can be
+    dropped without pinning gateway objects, and ``meta()`` is a cheap snapshot for STORE.
+    """
+    __slots__ = ("event_id", "guild_id", "channel_id", "message_id", "author_id", "author_name", "started")
+
+    def __init__(self, event_id: int | None, guild: discord.Guild, author: discord.Member):
+        self.event_id = event_id
+        self.guild_id = guild.id
+        self.channel_id: int | None = None
+        self.message_id: int | None = None
+        self.author_id = author.id
+        self.author_name = author.display_name
+        self.started = False
+
+class CaptState(EventState):
+    __slots__ = ("starts_at", "image_url", "pick_message_id", "users", "picked_list")
+
+    def __init__(self, event_id, guild, author, starts_at: datetime, image_url: str):
+        super().__init__(event_id, guild, author)
+        self.starts_at = starts_at
+        self.image_url = image_url
+        self.pick_message_id: int | None = None
+        self.users = Roster()
+        self.picked_list = Roster()  # LISTA CAPTURES
+
+    def meta(self) -> dict:
+        return {
+            "starts_at": self.starts_at.isoformat(),
+            "author_id": self.author_id,
+            "image_url": self.image_url,
+            "pick_message_id": self.pick_message_id,
+        }
+
+class AirdropState(EventState):
+    __slots__ = ("starts_at", "info_text", "voice_id", "max_slots", "picked_message_id", "users", "queue", "picked_list")
+
+    def __init__(self, event_id, guild, author, starts_at: datetime, info_text: str, voice_id: int | None):
+        super().__init__(event_id, guild, author)
+        self.starts_at = starts_at
+        self.info_text = info_text
+        self.voice_id = voice_id
+        self.max_slots = 0  # 0 = bez limitu
+        self.picked_message_id: int | None = None
+        self.users = Roster()        # zapisani
+        self.queue = Roster()        # kolejka (gdy limit)
+        self.picked_list = Roster()  # WYTYPOWANI (drugi embed)
+
+    def meta(self) -> dict:
+        return {
+            "starts_at": self.starts_at.isoformat(),
+            "author_id": self.author_id,
+            "info_text": self.info_text,
+            "voice_id": self.voice_id,
+            "picked_message_id": self.picked_message_id,
+        }
+
+class MclState(EventState):
+    __slots__ = ("title_text", "voice_id", "start_at", "tp_at", "event_name", "max_pick",
+                 "selected_message_id", "picker_id", "signups", "input_map", "selected_ids", "extra_labels")
+
+    def __init__(self, event_id, guild, author, title_text: str, voice_id: int | None, start_at: datetime,
+                 tp_at: datetime, event_name: str, max_pick: int):
+        super().__init__(event_id, guild, author)
+        self.title_text = title_text
+        self.voice_id = voice_id
+        self.start_at = start_at
+        self.tp_at = tp_at
+        self.event_name = event_name
+        self.max_pick = int(max(1, max_pick))
+        self.selected_message_id: int | None = None
+        self.picker_id: int | None = None
+        self.signups = Roster()
+        self.input_map: dict[int, str] = {}     # user_id -> "Imię Nazwisko | UID"
+        self.selected_ids = Roster()
+        self.extra_labels: dict[int, str] = {}  # user_id -> label text
+
+    def meta(self) -> dict:
+        return {
+            "title_text": self.title_text,
+            "voice_id": self.voice_id,
+            "start_at": self.start_at.isoformat(),
+            "tp_at": self.tp_at.isoformat(),
+            "author_id": self.author_id,
+            "event_name": self.event_name,
+            "max_pick": self.max_pick,
+            "selected_message_id": self.selected_message_id,
+            "picker_id": self.picker_id,
+        }
+
+
+def state_property(name: str) -> property:
+    """``view.<name>`` reads and writes ``view.state.<name>``."""
+    return property(lambda self: getattr(self.state, name),
+                    lambda self, value: setattr(self.state, name, value))
+
+class StateMessage:
+    """View attribute backed by a message id in ``view.state`` (channel: ``state.channel_id``).
+
+    Assigning a Message keeps only its ids; reading returns a PartialMessage, which is all
+    the views need (edit/delete/channel/id).
+    """
+
+    def __init__(self, slot: str):
+        self.slot = slot
+
+    def __get__(self, view, owner=None):
+        if view is None:
+            return self
+        st = view.state
+        mid = getattr(st, self.slot)
+        if mid is None or st.channel_id is None:
+            return None
+        guild = bot.get_guild(st.guild_id)
+        return _partial_message(guild.get_channel_or_thread(st.channel_id) if guild else None, mid)
+
+    def __set__(self, view, message):
+        st = view.state
+        if message is None:
+            setattr(st, self.slot, None)
+            return
+        if st.channel_id is None or self.slot == "message_id":
+            st.channel_id = message.channel.id
+        setattr(st, self.slot, message.id)
+
+class EventView(MeteredView):
+    """Base of the CAPT/AirDrop/MCL announcement views: a thin renderer over ``self.state``."""
+    state: EventState
+
+    message = StateMessage("message_id")
+    event_id = state_property("event_id")  # id of the creating interaction; key in STORE
+    started = state_property("started")
+
+    @property
+    def guild(self) -> discord.Guild | None:
+        return bot.get_guild(self.state.guild_id)
+
+    @property
+    def author(self) -> discord.Member | None:
+        guild = self.guild
+        return guild.get_member(self.state.author_id) if guild else None
+
+    def is_author(self, member: discord.abc.User) -> bool:
+        return member.id == self.state.author_id
+
+    SIGNUPS = "users"        # roster counted on the announcement
+    PICKED = "picked_list"   # roster shown on the picked-list message
+
+    def journal_rosters(self, *names: str):
+        for name in names:
+            STORE.append(self.event_id, "set", name, payload=list(getattr(self, name)))
+
+    async def move(self, ids, src: str | None, dst: str | None, *, replace: bool = False,
+                   channel: discord.abc.Messageable | None = None,
+                   picker: discord.Member | None = None) -> tuple[list[int], list[int]]:
+        """Batch roster mutation, applied as one step under the event lock.
+
+        Removes ``ids`` from roster ``src`` and adds them to ``dst`` (``replace=True`` makes
+        ``dst`` exactly ``ids``); either side may be None. Each touched roster is journaled
+        once and each affected message gets one coalesced re-render (request_render).
+        Returns (ids taken from src, ids newly added to dst).
+        """
+        ids = list(dict.fromkeys(ids))
+        async with self._lock:
+            taken = [uid for uid in ids if getattr(self, src).discard(uid)] if src else []
+            given: list[int] = []
+            if dst:
+                target = getattr(self, dst)
+                if replace:
+                    given = [uid for uid in ids if uid not in target]
+                    replace = list(target) != ids
+                    target.replace(ids)
+                else:
+                    given = [uid for uid in ids if target.add(uid)]
+            changed = {name for name, hit in ((src, taken), (dst, given or replace)) if name and hit}
+            self.journal_rosters(*changed)
+        self.request_render(changed, channel, picker)
+        return taken, given
+
+    def request_render(self, rosters, channel: discord.abc.Messageable | None = None,
+                       picker: discord.Member | None = None):
+        """Queue one coalesced re-render (RENDER) of every message showing one of ``rosters``."""
+        if self.SIGNUPS in rosters and self.message:
+            RENDER.request(self.message.id, self._render_main)
+        if self.PICKED in rosters:
+            channel = channel or (self.message.channel if self.message else None)
+            picker = picker or self.author or (self.guild.me if self.guild else None)
+            if channel is not None and picker is not None:
+                RENDER.request(("picked", id(self)), lambda: self._render_picked(channel, picker))
+
+    async def _render_main(self):
+        raise NotImplementedError
+
+    async def _render_picked(self, channel: discord.abc.Messageable, picker: discord.Member):
+        raise NotImplementedError
 
 def make_simple_ping_embed(title: str,
                            voice: discord.VoiceChannel,
@@ -277,20 +1800,398 @@ def make_simple_ping_embed(title: str,
         emb.set_image(url=image_url)
     return emb
 
-def _parse_pl_time(start_time: str) -> datetime:
-    try:
-        hh, mm = (int(x) for x in start_time.strip().split(":"))
-        assert 0 <= hh <= 23 and 0 <= mm <= 59
-    except Exception:
-        raise ValueError("HH:MM")
-    try:
-        now_pl = datetime.now(tz=WARSAW)
-        today_start = datetime(now_pl.year, now_pl.month, now_pl.day, hh, mm, tzinfo=WARSAW)
-        return today_start if today_start > now_pl else today_start + timedelta(days=1)
-    except Exception:
-        now_local = datetime.now()
-        today_start = datetime(now_local.year, now_local.month, now_local.day, hh, mm)
-        return today_start if today_start > now_local else today_start + timedelta(days=1)
+# ===== Coalesced message re-render =====
+RENDER_COALESCE_SECONDS = float(os.getenv("RENDER_COALESCE_SECONDS", "1.0"))
+RENDER_CONCURRENCY = int(os.getenv("RENDER_CONCURRENCY", "4"))  # edycji wykonywanych jednocześnie
+
+class RenderScheduler:
+    """Per-message edit coalescing.
+
+    Every state change calls ``request(message_id, render)``; changes arriving within
+    ``window`` seconds collapse into a single ``render()`` call, the render always reads
+    the newest state, and there is never more than one edit in flight per message.
+
+    This is the background half of the acknowledge-first pipeline: callbacks change state,
+    answer the interaction and only ``request()`` a render; at most ``concurrency`` renders
+    run at once across all messages, so a slow edit never delays a response. It is the one
+    layer that drops superseded edits; the edit it does send then queues in REST.
+    """
+
+    def __init__(self, window: float = RENDER_COALESCE_SECONDS, concurrency: int = RENDER_CONCURRENCY):
+        self.window = window
+        self._slots = asyncio.Semaphore(max(1, concurrency))
+        self.waiting = 0       # renders due but waiting for a free slot
+        self._pending: dict[int, object] = {}      # message_id -> newest render coroutine fn
+        self._tasks: dict[int, asyncio.Task] = {}  # message_id -> worker task
+        self.requested = 0     # render requests received
+        self.sent = 0          # edits actually sent
+        self.saved = 0         # requests merged into an already pending edit
+        self.failed = 0
+        self.rate_limited = 0  # 429s seen by the scheduler
+
+    def request(self, key: int, render) -> None:
+        self.requested += 1
+        if key in self._pending:
+            self.saved += 1
+        self._pending[key] = render
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._worker(key))
+
+    async def _worker(self, key: int):
+        delay = self.window
+        try:
+            while key in self._pending:
+                await asyncio.sleep(delay)
+                delay = self.window
+                self.waiting += 1
+                try:
+                    await self._slots.acquire()
+                finally:
+                    self.waiting -= 1
+                try:
+                    delay = await self._render_one(key) or delay
+                finally:
+                    self._slots.release()
+        finally:
+            self._tasks.pop(key, None)
+
+    async def _render_one(self, key) -> float | None:
+        """Run the newest render for ``key``; returns a back-off delay after a 429."""
+        render = self._pending.pop(key, None)
+        if render is None:
+            return None
+        try:
+            await render()
+            self.sent += 1
+        except discord.HTTPException as e:
+            if e.status != 429:
+                self.failed += 1
+                log.warning(f"Render {key} nie powiódł się: {e}")
+                return None
+            # Bucket exhausted: keep the newest state queued and back off.
+            self.rate_limited += 1
+            self._pending.setdefault(key, render)
+            return max(self.window, float(getattr(e, "retry_after", 0) or 0) or 2.0)
+        except Exception as e:
+            self.failed += 1
+            log.warning(f"Render {key} nie powiódł się: {e}")
+        return None
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "requested": self.requested,
+            "sent": self.sent,
+            "saved": self.saved,
+            "failed": self.failed,
+            "rate_limited": self.rate_limited,
+            "pending": len(self._pending),
+            "in_flight": len(self._tasks),
+            "waiting": self.waiting,
+        }
+
+RENDER = RenderScheduler()
+
+# ===== Click throttle (join/leave/Będę spam) =====
+CLICK_BURST = float(os.getenv("CLICK_BURST", "4"))            # kliknięcia „na zapas”
+CLICK_PER_SECOND = float(os.getenv("CLICK_PER_SECOND", "0.5"))  # odnawianie tokenów
+CLICK_THROTTLED_REPLY = "⏳ Za szybko klikasz – spróbuj ponownie za kilka sekund."
+
+METRICS.describe("click_throttled_total", "counter", "Kliknięcia odrzucone przez ClickThrottle (wg rodzaju eventu).")
+
+class ClickThrottle:
+    """Token bucket per (event, user) for the join/leave/Będę buttons.
+
+    A rejected click is answered with one fixed ephemeral reply and never takes the event
+    lock, touches a roster or queues a render. Buckets that have refilled completely carry
+    no information and are swept once the table grows.
+    """
+    SWEEP_AT = 4096
+
+    def __init__(self, burst: float = CLICK_BURST, per_second: float = CLICK_PER_SECOND):
+        self.burst = burst
+        self.per_second = per_second
+        self._buckets: dict[tuple, list[float]] = {}  # (event key, user id) -> [tokens, updated at]
+
+    def allow(self, event_key, uid: int) -> bool:
+        if self.per_second <= 0:
+            return True
+        now = time.monotonic()
+        bucket = self._buckets.get((event_key, uid))
+        if bucket is None:
+            if len(self._buckets) >= self.SWEEP_AT:
+                self._sweep(now)
+            self._buckets[(event_key, uid)] = [self.burst - 1, now]
+            return True
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.per_second)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            return False
+        bucket[0] = tokens - 1
+        return True
+
+    def _sweep(self, now: float):
+        full_after = self.burst / self.per_second
+        for key in [k for k, b in self._buckets.items() if now - b[1] >= full_after]:
+            del self._buckets[key]
+
+    async def throttled(self, interaction: discord.Interaction, kind: str, event_key) -> bool:
+        """True when the click was rejected (and already answered)."""
+        if self.allow(event_key, interaction.user.id):
+            return False
+        METRICS.inc("click_throttled_total", kind=kind)
+        try:
+            await interaction.response.send_message(CLICK_THROTTLED_REPLY, ephemeral=True)
+        except discord.HTTPException:
+            pass
+        return True
+
+    def __len__(self):
+        return len(self._buckets)
+
+THROTTLE = ClickThrottle()
+METRICS.gauge("click_throttle_buckets", "Liczba aktywnych kubełków ClickThrottle.", lambda: [({}, len(THROTTLE))])
+
+# ===== Event scheduler (one task, min-heap of deadlines) =====
+class EventScheduler:
+    """Runs time-based event transitions from a single task.
+
+    Deadlines live in a min-heap; the task sleeps exactly until the earliest one (or until
+    schedule()/cancel() wakes it). Rescheduling a key replaces its deadline; stale heap
+    entries are skipped lazily.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[float, int, object]] = []
+        self._entries: dict[object, tuple[float, int, object]] = {}  # key -> (deadline, seq, callback)
+        self._seq = itertools.count()
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._firing: set[asyncio.Task] = set()  # strong refs: the loop only keeps weak ones
+        self.fired = 0
+
+    @staticmethod
+    def key(kind: str, view) -> tuple:
+        """Scheduler key of a view's transition: its event_id (stable, never reused), else
+        the announcement message id."""
+        ident = getattr(view, "event_id", None)
+        if ident is None:
+            message = getattr(view, "message", None)
+            ident = message.id if message is not None else id(view)
+        return (kind, ident)
+
+    def schedule(self, key, when: datetime, callback):
+        """(Re)schedule ``await callback()`` at ``when``; replaces any deadline for ``key``."""
+        deadline = when.timestamp()
+        seq = next(self._seq)
+        self._entries[key] = (deadline, seq, callback)
+        heapq.heappush(self._heap, (deadline, seq, key))
+        self._kick()
+
+    def cancel(self, key):
+        if self._entries.pop(key, None) is not None:
+            self._kick()
+
+    def deadline(self, key) -> float | None:
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start the scheduler task up front (it also starts lazily on the first schedule())."""
+        self._kick()
+
+    def _kick(self):
+        if self._task is None or self._task.done():
+            try:
+                self._wakeup = asyncio.Event()
+                self._task = asyncio.get_running_loop().create_task(self._run())
+            except RuntimeError:
+                return  # started by the next schedule() on a running loop
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            # drop entries that were cancelled or rescheduled
+            while self._heap:
+                deadline, seq, key = self._heap[0]
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] == seq:
+                    break
+                heapq.heappop(self._heap)
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            _, _, key = heapq.heappop(self._heap)
+            _, _, callback = self._entries.pop(key)
+            self.fired += 1
+            task = asyncio.create_task(self._fire(key, callback))
+            self._firing.add(task)
+            task.add_done_callback(self._firing.discard)
+
+    async def _fire(self, key, callback):
+        try:
+            await callback()
+        except Exception as e:
+            log.warning(f"Scheduler: {key} nie powiódł się: {e}")
+
+SCHEDULER = EventScheduler()
+
+# ===== Incremental embed rendering =====
+EMBED_DESC_LIMIT = 4096
+EMBED_FIELD_LIMIT = 1024
+EMBED_TOTAL_LIMIT = 6000
+
+class RosterLines:
+    """Pre-rendered row fragments of one roster embed.
+
+    ``row(uid)`` is called only for ids without a cached fragment; callers ``invalidate(uid)``
+    when something shown in that row changes (signup text, label). ``lines()`` then only
+    prefixes the cached fragments with their 1-based number.
+    """
+    __slots__ = ("_row", "_rows")
+
+    def __init__(self, row):
+        self._row = row
+        self._rows: dict[int, str] = {}
+
+    def invalidate(self, uid: int | None = None):
+        if uid is None:
+            self._rows.clear()
+        else:
+            self._rows.pop(uid, None)
+
+    def lines(self, ids) -> list[str]:
+        rows = self._rows
+        out = []
+        for i, uid in enumerate(ids, start=1):
+            frag = rows.get(uid)
+            if frag is None:
+                frag = rows[uid] = self._row(uid)
+            out.append(f"{i}. {frag}")
+        if len(rows) > 2 * len(out) + 32:  # forget rows of people no longer on the list
+            keep = set(ids)
+            self._rows = {uid: frag for uid, frag in rows.items() if uid in keep}
+        return out
+
+def _take_lines(lines: list[str], i: int, text: str, limit: int) -> tuple[str, int]:
+    first = True
+    while i < len(lines):
+        piece = lines[i] if first else "\n" + lines[i]
+        if len(text) + len(piece) > limit:
+            break
+        text += piece
+        first = False
+        i += 1
+    return text, i
+
+def fit_embed_lines(emb: discord.Embed, head: str, lines: list[str]):
+    """Set ``head + lines`` as the description. Rows that do not fit in 4096 chars go to
+    extra fields (1024 chars each) while the 6000-char embed budget allows; whatever is
+    still left is summarised as ``(+N)``."""
+    desc = head + "\n".join(lines)
+    if len(desc) <= EMBED_DESC_LIMIT:
+        emb.description = desc
+        return
+    desc, i = _take_lines(lines, 0, head, EMBED_DESC_LIMIT)
+    emb.description = desc
+    budget = EMBED_TOTAL_LIMIT - len(emb.title or "") - len(desc) - 128  # footer/author headroom
+    while i < len(lines) and len(emb.fields) < 24 and budget > 32:
+        value, j = _take_lines(lines, i, "", min(EMBED_FIELD_LIMIT, budget - 16))
+        if j == i:
+            break
+        emb.add_field(name="\u200b", value=value, inline=False)
+        budget -= len(value) + 1
+        i = j
+    if i < len(lines):
+        emb.add_field(name="\u200b", value=f"(+{len(lines) - i})", inline=False)
+
+LIST_PAGE_ROWS = int(os.getenv("LIST_PAGE_ROWS", "40"))  # max. wierszy na stronę listy
+
+def page_bounds(lines: list[str], limit: int = EMBED_DESC_LIMIT, max_rows: int = LIST_PAGE_ROWS) -> list[int]:
+    """Start index of every page: as many rows as fit in ``limit`` chars, at most ``max_rows``."""
+    bounds, size, rows = [0], 0, 0
+    for i, line in enumerate(lines):
+        ln = len(line) + (1 if rows else 0)
+        if rows and (rows >= max_rows or size + ln > limit):
+            bounds.append(i)
+            size, rows = len(line), 1
+        else:
+            size += ln
+            rows += 1
+    return bounds
+
+class ListPagerView(MeteredView):
+    """Ephemeral paginated list (signups, picked, Będę).
+
+    Rows are rendered and split into pages once, when the list is opened; each page embed is
+    built on first view and kept, so showing a list is one response and a page flip one
+    ``edit_message``.
+    """
+
+    def __init__(self, title: str, lines: list[str], *, color: int = 0xFFFFFF, timeout: float = 300):
+        super().__init__(timeout=timeout)
+        self.title = title
+        self.color = color
+        self.lines = [ln[:EMBED_DESC_LIMIT] for ln in lines]
+        self.bounds = page_bounds(self.lines)
+        self.page = 0
+        self._embeds: dict[int, discord.Embed] = {}
+        if self.pages == 1:
+            self.clear_items()
+        else:
+            self._sync_buttons()
+
+    @property
+    def pages(self) -> int:
+        return len(self.bounds)
+
+    def page_embed(self, page: int) -> discord.Embed:
+        emb = self._embeds.get(page)
+        if emb is None:
+            start = self.bounds[page]
+            end = self.bounds[page + 1] if page + 1 < self.pages else len(self.lines)
+            emb = discord.Embed(title=self.title, description="\n".join(self.lines[start:end]) or "-",
+                                color=self.color)
+            if self.pages > 1:
+                emb.set_footer(text=f"Strona {page + 1}/{self.pages} • pozycji: {len(self.lines)}")
+            self._embeds[page] = emb
+        return emb
+
+    def _sync_buttons(self):
+        self.prev_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.pages - 1
+
+    async def send(self, interaction: discord.Interaction):
+        kwargs = {"view": self} if self.pages > 1 else {}
+        await interaction.response.send_message(embed=self.page_embed(0), ephemeral=True, **kwargs)
+
+    async def _flip(self, interaction: discord.Interaction, step: int):
+        self.page = min(max(self.page + step, 0), self.pages - 1)
+        self._sync_buttons()
+        await interaction.response.edit_message(embed=self.page_embed(self.page), view=self)
+
+    @discord.ui.button(label="◀︎", style=discord.ButtonStyle.secondary)
+    async def prev_page(self, interaction: discord.Interaction, _: discord.ui.Button):
+        await self._flip(interaction, -1)
+
+    @discord.ui.button(label="▶︎", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, _: discord.ui.Button):
+        await self._flip(interaction, 1)
 
 # ===================== CAPT =====================
 def make_main_embed(starts_at: datetime, users, guild: discord.Guild,
@@ -319,8 +2220,8 @@ def make_pick_embed(selected_ids, total_count: int, guild: discord.Guild,
                     picker: discord.Member) -> discord.Embed:
     lines = []
     for i, uid in enumerate(selected_ids, start=1):
-        m = guild.get_member(uid)
-        lines.append(f"{i}. {m.mention} | {m.display_name}" if m else f"{i}. <@{uid}>")
+        m = MEMBERS.get(guild, uid)
+        lines.append(f"{i}. {m.label}" if m else f"{i}. <@{uid}>")
     now_pl = datetime.now(tz=WARSAW) if WARSAW else datetime.now()
     desc = f"Wybrano {len(selected_ids)}/{total_count} osób:\n\n**Wybrani gracze:**\n" + ("\n".join(lines) if lines else "-")
     emb = discord.Embed(title="Lista osób na captures!", description=desc, color=0xFFFFFF)
@@ -329,7 +2230,7 @@ def make_pick_embed(selected_ids, total_count: int, guild: discord.Guild,
     emb.set_footer(text=f"Wystawione przez {picker.display_name} • {now_pl.strftime('%d.%m.%Y %H:%M')}")
     return emb
 
-class PickView(discord.ui.View):
+class PickView(MeteredView):
     def __init__(self, capt: "CaptView", option_rows, total_count: int, picker: discord.Member):
         super().__init__(timeout=300)
         self.capt = capt
@@ -351,7 +2252,7 @@ class PickView(discord.ui.View):
             else:
                 lines = []
                 for i, uid in enumerate(chosen_ids, start=1):
-                    m = capt.guild.get_member(uid)
+                    m = MEMBERS.get(capt.guild, uid)
                     lines.append(f"{i}. {m.display_name if m else f'ID {uid}'}")
                 txt = f"Zaznaczono {len(chosen_ids)}/{self.total_count}:\n" + "\n".join(lines)
             try:
@@ -370,10 +2271,7 @@ class PickView(discord.ui.View):
         chosen = [int(v) for v in self.select.values]
         if not chosen:
             return await interaction.followup.send("Nie wybrałeś żadnych osób.", ephemeral=True)
-        self.capt.picked_list = list(dict.fromkeys(chosen))
-        emb = make_pick_embed(chosen, len(self.capt.users), self.capt.guild, self.picker)
-        msg = await interaction.channel.send(embed=emb)
-        self.capt.pick_message = msg
+        await self.capt.move(chosen, None, "picked_list", replace=True, channel=interaction.channel, picker=self.picker)
         await interaction.followup.send("Opublikowano listę i zapisano wybór.", ephemeral=True)
 
     @discord.ui.button(label="Anuluj", style=discord.ButtonStyle.secondary)
@@ -384,107 +2282,142 @@ class PickView(discord.ui.View):
 
 
 
-class CaptPagedPickView(discord.ui.View):
-    """Paginowany PICK dla CAPT: przeglądaj wszystkie zapisane (po 25) i wybierz max 25."""
+class PagedPickView(MeteredView):
+    """Paginated PICK shared by CAPT, AirDrop and MCL.
+
+    Only the visible page's options are built (``row()`` per user, once per page, then
+    memoized); the ids are a snapshot taken when PICK is opened. The chosen people are
+    kept in one ordered dict, so a select callback only applies the change on its page.
+    Subclasses set ``MAX_PICK``, implement ``row()`` and add their own publish button.
+    """
     PAGE_SIZE = 25
     MAX_PICK = 25
 
-    def __init__(self, capt: "CaptView", picker: discord.Member):
-        super().__init__(timeout=300)
-        self.capt = capt
-        self.picker = picker
+    def __init__(self, guild: discord.Guild, ids, *, timeout: float = 300):
+        super().__init__(timeout=timeout)
+        self.guild = guild
+        self.ids: list[int] = list(ids)
         self.page = 0
         self.page_selections: dict[int, set[int]] = {}
-        # zbuduj cache opcji
-        self.option_rows: list[tuple[int, str, str]] = []
-        for uid in self.capt.users:
-            m = self.capt.guild.get_member(uid)
-            label = m.display_name if m else f"Użytkownik {uid}"
-            desc = f"@{m.name}" if m else f"ID {uid}"
-            self.option_rows.append((uid, label, desc))
-        self._rebuild_select()
-
-    def _rebuild_select(self):
-        # Usuń istniejący select (jeśli jest)
+        self.chosen: dict[int, str] = {}                          # uid -> display name, pick order
+        self._pages: dict[int, list[discord.SelectOption]] = {}   # page -> built options
+        self._names: dict[int, str] = {}                          # uid -> label, for built pages only
+        self._build_page()
+
+    @property
+    def max_pick(self) -> int:
+        return self.MAX_PICK
+
+    @property
+    def total_pages(self) -> int:
+        return max(1, (len(self.ids) - 1) // self.PAGE_SIZE + 1)
+
+    def row(self, uid: int, member: discord.Member | None) -> tuple[str, str]:
+        """(label, description) of one option."""
+        return (member.display_name if member else f"User {uid}",
+                f"@{member.name}" if member else f"ID {uid}")
+
+    def _options(self, page: int) -> list[discord.SelectOption]:
+        options = self._pages.get(page)
+        if options is None:
+            start = page * self.PAGE_SIZE
+            options = []
+            for idx, uid in enumerate(self.ids[start:start + self.PAGE_SIZE], start=1):
+                try:
+                    m = MEMBERS.get(self.guild, uid)
+                except Exception:
+                    m = None
+                label, desc = self.row(uid, m)
+                self._names[uid] = label
+                options.append(discord.SelectOption(label=f"{idx}. {label}"[:100], value=str(uid),
+                                                    description=(desc or f"ID {uid}")[:100]))
+            self._pages[page] = options
+        return options
+
+    def picked(self) -> list[int]:
+        return list(self.chosen)[:self.max_pick]
+
+    def _build_page(self):
         for child in list(self.children):
-            if isinstance(child, discord.ui.Select):
+            if isinstance(child, discord.ui.Select) or getattr(child, "custom_id", None) == "pick:empty":
                 self.remove_item(child)
-        start = self.page * self.PAGE_SIZE
-        end = start + self.PAGE_SIZE
-        slice_rows = self.option_rows[start:end]
-        options = []
-        for idx, (uid, label, desc) in enumerate(slice_rows, start=1):
-            options.append(discord.SelectOption(label=f"{idx}. {label}"[:100], value=str(uid), description=(desc or f"ID {uid}")[:100]))
 
-        current_total = sum(len(s) for s in self.page_selections.values())
-        remaining = max(0, self.MAX_PICK - current_total)
-        total_pages = (len(self.option_rows) - 1) // self.PAGE_SIZE + 1 if self.option_rows else 1
+        options = self._options(self.page)
+        if not options:
+            self.add_item(discord.ui.Button(label="Brak osób na tej stronie", style=discord.ButtonStyle.secondary,
+                                            disabled=True, custom_id="pick:empty"))
+            return
 
-        if not options or remaining == 0:
-            max_values = 0
+        # a new selection on this page replaces the page's previous one
+        remaining = max(0, self.max_pick - len(self.chosen) + len(self.page_selections.get(self.page, ())))
+        if remaining == 0:
+            sel = discord.ui.Select(
+                placeholder=f"Wybrano {len(self.chosen)}/{self.max_pick}. Limit osiągnięty.",
+                min_values=0, max_values=0, options=options, disabled=True
+            )
         else:
-            max_values = min(len(options), remaining)
-
-        sel = discord.ui.Select(
-            placeholder=f"Wybierz graczy (strona {self.page+1}/{total_pages})",
-            min_values=0,
-            max_values=max_values,
-            options=options,
-            disabled=(max_values == 0 and bool(options)),
-        )
+            sel = discord.ui.Select(
+                placeholder=f"Strona {self.page+1}/{self.total_pages} • wybierz (max {remaining})",
+                min_values=0, max_values=min(len(options), remaining), options=options
+            )
 
         async def _on_select(inter: discord.Interaction):
-            chosen = {int(v) for v in (sel.values or [])}
-            self.page_selections[self.page] = chosen
-            current_total = sum(len(s) for s in self.page_selections.values())
-            names = []
-            for s in self.page_selections.values():
-                for uid in s:
-                    m = self.capt.guild.get_member(uid)
-                    names.append(m.display_name if m else f"ID {uid}")
-            txt = f"Zaznaczono {current_total}/{self.MAX_PICK}: " + (", ".join(names) if names else "-")
-            self._rebuild_select()
+            self._select(self.page, {int(v) for v in (sel.values or [])})
+            txt = (f"Zaznaczono {len(self.chosen)}/{self.max_pick}:\n"
+                   + (", ".join(self.chosen.values()) if self.chosen else "-"))
+            self._build_page()
             try:
                 await inter.response.edit_message(content=txt, view=self)
             except Exception:
                 try:
                     await inter.response.defer(ephemeral=True, thinking=False)
-                    await inter.followup.send(txt, ephemeral=True, view=self)
                 except Exception:
                     pass
 
         sel.callback = _on_select
         self.add_item(sel)
 
+    def _select(self, page: int, new: set[int]):
+        old = self.page_selections.get(page, set())
+        for uid in old - new:
+            self.chosen.pop(uid, None)
+        for uid in new - old:
+            self.chosen[uid] = self._names.get(uid, f"ID {uid}")
+        self.page_selections[page] = new
+
     @discord.ui.button(label="◀︎", style=discord.ButtonStyle.secondary)
     async def prev_page(self, interaction: discord.Interaction, _: discord.ui.Button):
         if self.page > 0:
             self.page -= 1
-            self._rebuild_select()
-        try:
-            await interaction.response.edit_message(content=None, view=self)
-        except Exception:
-            await interaction.followup.send("◀︎", ephemeral=True, view=self)
+            self._build_page()
+        await interaction.response.edit_message(view=self)
 
     @discord.ui.button(label="▶︎", style=discord.ButtonStyle.secondary)
     async def next_page(self, interaction: discord.Interaction, _: discord.ui.Button):
-        max_page = (len(self.option_rows) - 1) // self.PAGE_SIZE if self.option_rows else 0
-        if self.page < max_page:
+        if self.page < self.total_pages - 1:
             self.page += 1
-            self._rebuild_select()
-        try:
-            await interaction.response.edit_message(content=None, view=self)
-        except Exception:
-            await interaction.followup.send("▶︎", ephemeral=True, view=self)
+            self._build_page()
+        await interaction.response.edit_message(view=self)
 
     @discord.ui.button(label="Wyczyść wybór", style=discord.ButtonStyle.danger)
     async def clear_sel(self, interaction: discord.Interaction, _: discord.ui.Button):
         self.page_selections.clear()
-        self._rebuild_select()
-        try:
-            await interaction.response.edit_message(content="Wyczyszczono wybór.", view=self)
-        except Exception:
-            await interaction.followup.send("Wyczyszczono wybór.", ephemeral=True, view=self)
+        self.chosen.clear()
+        self._build_page()
+        await interaction.response.edit_message(content="Wyczyszczono wybór.", view=self)
+
+class CaptPagedPickView(PagedPickView):
+    """Paginowany PICK dla CAPT: przeglądaj wszystkie zapisane (po 25) i wybierz max 25."""
+    MAX_PICK = 25
+
+    def __init__(self, capt: "CaptView", picker: discord.Member):
+        self.capt = capt
+        self.picker = picker
+        super().__init__(capt.guild, capt.users)
+
+    def row(self, uid: int, member: discord.Member | None) -> tuple[str, str]:
+        return (member.display_name if member else f"Użytkownik {uid}",
+                f"@{member.name}" if member else f"ID {uid}")
 
     @discord.ui.button(label="Publikuj listę", style=discord.ButtonStyle.success)
     async def publish(self, interaction: discord.Interaction, _: discord.ui.Button):
@@ -492,62 +2425,103 @@ class CaptPagedPickView(discord.ui.View):
             await interaction.response.send_message("Publikuję listę…", ephemeral=True)
         except Exception:
             pass
-        chosen: list[int] = []
-        for s in self.page_selections.values():
-            chosen.extend(list(s))
-        chosen = list(dict.fromkeys(chosen))[:self.MAX_PICK]
+        chosen = self.picked()
         if not chosen:
             return await interaction.followup.send("Nie wybrałeś żadnych osób.", ephemeral=True)
-        # Zapisz listę wytypowanych i przenieś osoby z zapisanych
-        self.capt.picked_list = list(dict.fromkeys(chosen))
-        removed_cnt = 0
-        for uid in chosen:
-            if uid in self.capt.users:
-                try:
-                    self.capt.users.remove(uid)
-                    removed_cnt += 1
-                except ValueError:
-                    pass
-        # Odśwież ogłoszenie i embed z listą
-        await self.capt.refresh_announce()
-        emb = make_pick_embed(chosen, len(self.capt.users), self.capt.guild, self.picker)
-        msg = await interaction.channel.send(embed=emb)
-        self.capt.pick_message = msg
-        await interaction.followup.send(f"Opublikowano listę i przeniesiono z zapisanych: {removed_cnt}.", ephemeral=True)
-
-class CaptView(discord.ui.View):
-    def __init__(self, starts_at: datetime, guild: discord.Guild, author: discord.Member, image_url: str):
+        # Zapisz listę wytypowanych i przenieś osoby z zapisanych (jedna edycja na wiadomość)
+        taken, _ = await self.capt.move(chosen, "users", "picked_list", replace=True,
+                                        channel=interaction.channel, picker=self.picker)
+        await interaction.followup.send(f"Opublikowano listę i przeniesiono z zapisanych: {len(taken)}.", ephemeral=True)
+
+class CaptView(EventView):
+    pick_message = StateMessage("pick_message_id")
+    starts_at = state_property("starts_at")
+    image_url = state_property("image_url")
+    users = state_property("users")
+    picked_list = state_property("picked_list")  # LISTA CAPTURES
+    event_name = "CAPT"
+
+    def __init__(self, starts_at: datetime, guild: discord.Guild, author: discord.Member, image_url: str,
+                 event_id: int | None = None):
         try:
             remain = int((starts_at - datetime.now(tz=WARSAW)).total_seconds())
         except Exception:
             remain = 0
         timeout_seconds = max(60, remain + 3600)
-        super().__init__(timeout=timeout_seconds)
-        self.starts_at = starts_at
-        self.users = []
-        self.picked_list = []  # LISTA CAPTURES
-        self.guild = guild
-        self.author = author
-        self.event_name = "CAPT"
-        self.image_url = image_url
-        self.message: discord.Message | None = None
-        self.pick_message: discord.Message | None = None
+        # Persistent (restorable) views must not time out.
+        super().__init__(timeout=None if event_id is not None else timeout_seconds)
+        if event_id is not None:
+            persistent_ids(self, "capt", event_id, "join", "leave", "pick")
+        self.state = CaptState(event_id, guild, author, starts_at, image_url)
+        self._embed: discord.Embed | None = None
+        self._embed_key = None
         self._lock = asyncio.Lock()
 
+    def build_embed(self) -> discord.Embed:
+        """Announcement embed; the static part is built once per start time and only the
+        'Zapisani (N)' field and footer are patched on later renders."""
+        key = (self.starts_at, self.image_url, self.started)
+        if self._embed is None or self._embed_key != key:
+            guild = self.guild
+            self._embed = make_main_embed(self.starts_at, self.users, guild, self.author or guild.me, self.image_url)
+            self._embed.set_footer(text=f"Wystawione przez {self.state.author_name}")
+            if self.started:
+                self._embed.description += "\n**CAPT rozpoczął się.**"
+            self._embed_key = key
+            return self._embed
+        self._embed.set_field_at(0, name=f"Zapisani ({len(self.users)}):", value="-", inline=False)
+        self._embed.set_footer(text=f"Wystawione przez {self.state.author_name}")
+        return self._embed
+
+    def schedule_start(self):
+        """(Re)arm the 'CAPT rozpoczął się' transition at starts_at and the registry expiry."""
+        self.started = False
+        SCHEDULER.schedule(SCHEDULER.key("start", self), self.starts_at, self.on_started)
+        ACTIVE_CAPTS.expire_at(self, self.starts_at)
+
+    async def on_started(self):
+        self.started = True
+        await self.refresh_announce()
+
+    def persist(self):
+        """Upsert event metadata (times, message ids) in STORE; re-index a re-sent message."""
+        st = self.state
+        if st.message_id is None:
+            return
+        ACTIVE_CAPTS.add(self)
+        STORE.save_event(st.event_id, "capt", st.guild_id, st.channel_id, st.message_id, st.meta())
+
     async def refresh_announce(self):
+        """Schedule a coalesced re-render of the announcement (see RenderScheduler)."""
+        self.request_render({self.SIGNUPS})
+
+    async def _render_main(self):
         if not self.message:
             return
-        emb = make_main_embed(self.starts_at, self.users, self.guild, self.author, self.image_url)
+        emb = self.build_embed()
         try:
             await self.message.edit(embed=emb, view=self)
+        except discord.HTTPException as e:
+            if e.status == 429:
+                raise
+            try:
+                ch = self.message.channel
+                self.message = await ch.send(embed=emb, view=self)
+                self.persist()
+            except Exception:
+                pass
         except Exception:
             try:
                 # Try to re-send as a normal message if previous was an interaction response
                 ch = self.message.channel
                 self.message = await ch.send(embed=emb, view=self)
+                self.persist()
             except Exception:
                 pass
 
+    async def _render_picked(self, channel: discord.abc.Messageable, picker: discord.Member):
+        await self.refresh_pick_embed(channel, picker)
+
     async def refresh_pick_embed(self, channel: discord.abc.Messageable, picker: discord.Member):
         if not self.picked_list:
             if self.pick_message:
@@ -567,37 +2541,43 @@ class CaptView(discord.ui.View):
         try:
             msg = await channel.send(embed=emb)
             self.pick_message = msg
+            self.persist()
         except Exception:
             pass
 
     @discord.ui.button(label="Dołącz", style=discord.ButtonStyle.success)
     async def join(self, interaction: discord.Interaction, _: discord.ui.Button):
+        if await THROTTLE.throttled(interaction, "capt", self.event_id or id(self)):
+            return
         async with self._lock:
             uid = interaction.user.id
-            if uid not in self.users:
-                self.users.append(uid)
+            if self.users.add(uid):
+                STORE.append(self.event_id, "add", "users", uid)
         await interaction.response.send_message("Dołączono.", ephemeral=True)
         await self.refresh_announce()
 
     @discord.ui.button(label="Opuść", style=discord.ButtonStyle.danger)
     async def leave(self, interaction: discord.Interaction, _: discord.ui.Button):
+        if await THROTTLE.throttled(interaction, "capt", self.event_id or id(self)):
+            return
         async with self._lock:
             uid = interaction.user.id
             changed = False
-            if uid in self.users:
-                self.users.remove(uid); changed = True
-            if uid in self.picked_list:
-                self.picked_list.remove(uid); changed = True
+            if self.users.discard(uid):
+                changed = True
+                STORE.append(self.event_id, "remove", "users", uid)
+            if self.picked_list.discard(uid):
+                changed = True
+                STORE.append(self.event_id, "remove", "picked_list", uid)
         await interaction.response.send_message("Zaktualizowano.", ephemeral=True)
         if changed:
-            await self.refresh_announce()
-            await self.refresh_pick_embed(interaction.channel, interaction.user)
+            self.request_render({self.SIGNUPS, self.PICKED}, interaction.channel, interaction.user)
 
     
     @discord.ui.button(label="PICK", style=discord.ButtonStyle.primary)
     async def pick(self, interaction: discord.Interaction, _: discord.ui.Button):
         mem: discord.Member = interaction.user
-        if not (mem.guild_permissions.administrator or mem == self.author or (REQUIRED_ROLE_ID and any(r.id == REQUIRED_ROLE_ID for r in mem.roles))):
+        if not PERMS.can_manage(mem, self):
             await interaction.response.send_message("Tylko wystawiający / admin / uprawniona rola może wybierać osoby.", ephemeral=True)
             return
         if not self.users:
@@ -609,7 +2589,7 @@ class CaptView(discord.ui.View):
             view=view, ephemeral=True
         )
 
-class CaptAddInstantView(discord.ui.View):
+class CaptAddInstantView(MeteredView):
     def __init__(self, capt: "CaptView"):
         super().__init__(timeout=240)
         self.capt = capt
@@ -620,14 +2600,10 @@ class CaptAddInstantView(discord.ui.View):
         self.add_item(self.user_select)
         async def _on_pick(inter: discord.Interaction):
             await inter.response.defer(ephemeral=True, thinking=False)
-            added = 0
-            names = []
-            for u in self.user_select.values:
-                if u.id not in self.capt.picked_list:
-                    self.capt.picked_list.append(u.id); added += 1
-                names.append(f"- {getattr(u, 'display_name', getattr(u, 'name', ''))}")
-            await self.capt.refresh_pick_embed(inter.channel, inter.user)
-            await inter.followup.send(f"✅ Dodano do **listy CAPTURES**: **{added}**.\n" + ("\n".join(names) if names else ""), ephemeral=True)
+            names = [f"- {getattr(u, 'display_name', getattr(u, 'name', ''))}" for u in self.user_select.values]
+            _, given = await self.capt.move([u.id for u in self.user_select.values], None, "picked_list",
+                                            channel=inter.channel, picker=inter.user)
+            await inter.followup.send(f"✅ Dodano do **listy CAPTURES**: **{len(given)}**.\n" + ("\n".join(names) if names else ""), ephemeral=True)
         self.user_select.callback = _on_pick
 
     @discord.ui.button(label="Zamknij", style=discord.ButtonStyle.secondary)
@@ -636,13 +2612,13 @@ class CaptAddInstantView(discord.ui.View):
 
 
 
-class CaptAddFromSignupsView(discord.ui.View):
+class CaptAddFromSignupsView(MeteredView):
     def __init__(self, capt: "CaptView"):
         super().__init__(timeout=240)
         self.capt = capt
         options = []
         for uid in self.capt.users[:25]:
-            m = self.capt.guild.get_member(uid)
+            m = MEMBERS.get(self.capt.guild, uid)
             label = (m.display_name if m else f"User {uid}")[:100]
             desc  = (f"@{m.name}" if m else f"ID {uid}")[:100]
             options.append(discord.SelectOption(label=label, value=str(uid), description=desc))
@@ -657,18 +2633,8 @@ class CaptAddFromSignupsView(discord.ui.View):
             async def _on_pick(inter: discord.Interaction):
                 await inter.response.defer(ephemeral=True, thinking=False)
                 chosen = [int(v) for v in self.sel.values]
-                added, moved = 0, 0
-                for uid in chosen:
-                    if uid not in self.capt.picked_list:
-                        self.capt.picked_list.append(uid); added += 1
-                    if uid in self.capt.users:
-                        try:
-                            self.capt.users.remove(uid); moved += 1
-                        except ValueError:
-                            pass
-                await self.capt.refresh_announce()
-                await self.capt.refresh_pick_embed(inter.channel, inter.user)
-                await inter.followup.send(f"✅ Dodano do listy CAPT: {added} (przeniesiono z zapisanych: {moved}).", ephemeral=True)
+                taken, given = await self.capt.move(chosen, "users", "picked_list", channel=inter.channel, picker=inter.user)
+                await inter.followup.send(f"✅ Dodano do listy CAPT: {len(given)} (przeniesiono z zapisanych: {len(taken)}).", ephemeral=True)
             self.sel.callback = _on_pick
 
     @discord.ui.button(label="Zamknij", style=discord.ButtonStyle.secondary)
@@ -676,13 +2642,13 @@ class CaptAddFromSignupsView(discord.ui.View):
         await interaction.response.edit_message(content="Zamknięto.", view=None)
 
 
-class CaptRemoveToSignupsView(discord.ui.View):
+class CaptRemoveToSignupsView(MeteredView):
     def __init__(self, capt: "CaptView"):
         super().__init__(timeout=240)
         self.capt = capt
         options = []
         for uid in self.capt.picked_list[:25]:
-            m = self.capt.guild.get_member(uid)
+            m = MEMBERS.get(self.capt.guild, uid)
             label = (m.display_name if m else f"User {uid}")[:100]
             desc  = (f"@{m.name}" if m else f"ID {uid}")[:100]
             options.append(discord.SelectOption(label=label, value=str(uid), description=desc))
@@ -697,16 +2663,9 @@ class CaptRemoveToSignupsView(discord.ui.View):
             async def _on_remove(inter: discord.Interaction):
                 await inter.response.defer(ephemeral=True, thinking=False)
                 chosen = [int(v) for v in self.sel.values]
-                removed, returned = 0, 0
                 # Usuń z picked_list i zwróć do users
-                self.capt.picked_list = [uid for uid in self.capt.picked_list if uid not in chosen]
-                removed = len(chosen)
-                for uid in chosen:
-                    if uid not in self.capt.users:
-                        self.capt.users.append(uid); returned += 1
-                await self.capt.refresh_pick_embed(inter.channel, inter.user)
-                await self.capt.refresh_announce()
-                await inter.followup.send(f"✅ Usunięto z listy CAPT: {removed} (zwrócono do zapisanych: {returned}).", ephemeral=True)
+                taken, given = await self.capt.move(chosen, "picked_list", "users", channel=inter.channel, picker=inter.user)
+                await inter.followup.send(f"✅ Usunięto z listy CAPT: {len(taken)} (zwrócono do zapisanych: {len(given)}).", ephemeral=True)
             self.sel.callback = _on_remove
 
     @discord.ui.button(label="Zamknij", style=discord.ButtonStyle.secondary)
@@ -714,39 +2673,29 @@ class CaptRemoveToSignupsView(discord.ui.View):
         await interaction.response.edit_message(content="Zamknięto.", view=None)
 
 
-class CaptChangeTimeModal(discord.ui.Modal, title="Zmień godzinę startu (HH:MM)"):
+class CaptChangeTimeModal(MeteredModal, title="Zmień godzinę startu (HH:MM)"):
     def __init__(self, capt: "CaptView"):
         super().__init__()
         self.capt = capt
         self.time_input = discord.ui.TextInput(
             label="Nowa godzina startu (HH:MM)",
-            placeholder="np. 19:30",
-            max_length=5,
+            placeholder="np. 19:30, +15m lub 24.12 19:30",
+            max_length=16,
             required=True
         )
         self.add_item(self.time_input)
 
     async def on_submit(self, interaction: discord.Interaction):
-        raw = str(self.time_input.value).strip()
         try:
-            hh, mm = (int(x) for x in raw.split(":"))
-            assert 0 <= hh <= 23 and 0 <= mm <= 59
-        except Exception:
-            return await interaction.response.send_message("Podaj godzinę w formacie **HH:MM**.", ephemeral=True)
+            new_dt = parse_event_time(self.time_input.value)
+        except ValueError:
+            return await interaction.response.send_message(f"Podaj godzinę w formacie {TIME_INPUT_HINT}.", ephemeral=True)
         # Remember old/new times
         old_ts = int(self.capt.starts_at.timestamp()) if getattr(self.capt, "starts_at", None) else None
-        # Compute next occurrence for today/tomorrow in WARSAW tz
-        try:
-            now_pl = datetime.now(tz=WARSAW)
-            new_dt = datetime(now_pl.year, now_pl.month, now_pl.day, hh, mm, tzinfo=WARSAW)
-            if new_dt <= now_pl:
-                new_dt = new_dt + timedelta(days=1)
-        except Exception:
-            now_local = datetime.now()
-            new_dt = datetime(now_local.year, now_local.month, now_local.day, hh, mm)
-            if new_dt <= now_local:
-                new_dt = new_dt + timedelta(days=1)
         self.capt.starts_at = new_dt
+        self.capt.schedule_start()
+        self.capt.persist()
+        await interaction.response.send_message("✅ Zmieniono godzinę startu.", ephemeral=True)
         # Refresh main embed
         await self.capt.refresh_announce()
         # Send a clean info embed about the change
@@ -761,21 +2710,16 @@ class CaptChangeTimeModal(discord.ui.Modal, title="Zmień godzinę startu (HH:MM
             await interaction.channel.send(content='@everyone', embed=info)
         except Exception:
             pass
-        await interaction.response.send_message("✅ Zmieniono godzinę startu.", ephemeral=True)
 
 
-class PanelView(discord.ui.View):
+class PanelView(MeteredView):
     def __init__(self, capt: "CaptView", opener: discord.Member):
         super().__init__(timeout=600)
         self.capt = capt
         self.opener = opener
 
     async def _check_perms(self, interaction: discord.Interaction) -> bool:
-        mem: discord.Member = interaction.user
-        if mem.guild_permissions.administrator or mem == self.capt.author:
-            return True
-        REQUIRED = globals().get("REQUIRED_ROLE_ID", 0)
-        if REQUIRED and any(r.id == REQUIRED for r in mem.roles):
+        if PERMS.can_manage(interaction.user, self.capt):
             return True
         await interaction.response.send_message("Brak uprawnień do panelu CAPT.", ephemeral=True)
         return False
@@ -784,15 +2728,9 @@ class PanelView(discord.ui.View):
     async def clear_picked(self, interaction: discord.Interaction, _: discord.ui.Button):
         if not await self._check_perms(interaction):
             return
-        moved = 0
-        for uid in list(self.capt.picked_list):
-            if uid not in self.capt.users:
-                self.capt.users.append(uid)
-                moved += 1
-        self.capt.picked_list.clear()
-        await self.capt.refresh_pick_embed(interaction.channel, interaction.user)
-        await self.capt.refresh_announce()
-        await interaction.response.send_message(f"✅ Wyczyszczono wytypowanych (przeniesiono do zapisanych: {moved}).", ephemeral=True)
+        _, given = await self.capt.move(list(self.capt.picked_list), "picked_list", "users",
+                                        channel=interaction.channel, picker=interaction.user)
+        await interaction.response.send_message(f"✅ Wyczyszczono wytypowanych (przeniesiono do zapisanych: {len(given)}).", ephemeral=True)
 
     @discord.ui.button(label="Pokaż zapisanych", style=discord.ButtonStyle.secondary)
     async def show_signups(self, interaction: discord.Interaction, _: discord.ui.Button):
@@ -801,10 +2739,7 @@ class PanelView(discord.ui.View):
         if not self.capt.users:
             return await interaction.response.send_message("Brak zapisanych.", ephemeral=True)
         lines = format_numbered_users(self.capt.users, self.capt.guild)
-        parts = chunk_lines(lines, 1800)
-        await interaction.response.send_message(f"**Lista zapisanych (część 1):**\n{parts[0]}", ephemeral=True)
-        for i, p in enumerate(parts[1:], start=2):
-            await interaction.followup.send(f"**Lista zapisanych (część {i}):**\n{p}", ephemeral=True)
+        await ListPagerView(f"Lista zapisanych ({len(lines)})", lines).send(interaction)
 
     @discord.ui.button(label="Dodaj z zapisanych", style=discord.ButtonStyle.success)
     async def add_from_signups(self, interaction: discord.Interaction, _: discord.ui.Button):
@@ -828,17 +2763,13 @@ class PanelView(discord.ui.View):
             return
         await interaction.response.send_modal(CaptChangeTimeModal(self.capt))
 
-class AirdropPickedControlsView(discord.ui.View):
+class AirdropPickedControlsView(MeteredView):
     def __init__(self, adr: "AirdropView"):
         super().__init__(timeout=300)
         self.adr = adr
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        mem: discord.Member = interaction.user
-        if mem.guild_permissions.administrator or mem == self.adr.author:
-            return True
-        REQUIRED = globals().get("REQUIRED_ROLE_ID", 0)
-        if REQUIRED and any(r.id == REQUIRED for r in mem.roles):
+        if PERMS.can_manage(interaction.user, self.adr):
             return True
         await interaction.response.send_message("Brak uprawnień do panelu AirDrop.", ephemeral=True)
         return False
@@ -846,138 +2777,25 @@ class AirdropPickedControlsView(discord.ui.View):
     @discord.ui.button(label="PANEL", style=discord.ButtonStyle.primary)
     async def open_panel(self, interaction: discord.Interaction, _: discord.ui.Button):
         await interaction.response.send_message("Panel AirDrop", view=AirdropPanelView(self.adr, interaction.user), ephemeral=True)
-class AirdropPagedPickView(discord.ui.View):
+class AirdropPagedPickView(PagedPickView):
     """Paginowany PICK z zapisanych do WYTYPOWANYCH (AirDrop): max 20, strony po 25 opcji."""
-    PAGE_SIZE = 25
     MAX_PICK = 20
 
     def __init__(self, adr: "AirdropView", picker: discord.Member):
-        super().__init__(timeout=300)
         self.adr = adr
         self.picker = picker
-        self.option_rows: list[tuple[int,str,str]] = []
-        for uid in getattr(self.adr, "users", []):
-            try:
-                m = self.adr.guild.get_member(uid)
-            except Exception:
-                m = None
-            nick = m.display_name if m else f"User {uid}"
-            desc = f"@{m.name}" if m else f"ID {uid}"
-            self.option_rows.append((uid, nick, desc))
-        self.page = 0
-        self.page_selections: dict[int, set[int]] = {}
-        self._build_page()
-
-    def _build_page(self):
-        for child in list(self.children):
-            if isinstance(child, discord.ui.Select):
-                self.remove_item(child)
-
-        start = self.page * self.PAGE_SIZE
-        end   = start + self.PAGE_SIZE
-        slice_rows = self.option_rows[start:end]
-
-        current_total = sum(len(s) for s in self.page_selections.values())
-        remaining = max(0, self.MAX_PICK - current_total)
-
-        options = [
-            discord.SelectOption(
-                label=f"{idx}. {label}"[:100],
-                value=str(uid),
-                description=(desc or f"ID {uid}")[:100]
-            )
-            for idx, (uid, label, desc) in enumerate(slice_rows, start=1)
-        ]
-
-        if not options:
-            self.add_item(discord.ui.Button(label="Brak osób na tej stronie", style=discord.ButtonStyle.secondary, disabled=True))
-            return
-
-        if remaining == 0:
-            sel = discord.ui.Select(
-                placeholder=f"Wybrano {current_total}/{self.MAX_PICK}. Limit osiągnięty.",
-                min_values=0, max_values=0, options=options, disabled=True
-            )
-        else:
-            total_pages = (len(self.option_rows)-1)//self.PAGE_SIZE+1 if self.option_rows else 1
-            sel = discord.ui.Select(
-                placeholder=f"Strona {self.page+1}/{total_pages} • wybierz (max {remaining})",
-                min_values=0, max_values=min(len(options), remaining), options=options
-            )
-
-        async def _on_select(inter: discord.Interaction):
-            chosen = {int(v) for v in (sel.values or [])}
-            self.page_selections[self.page] = chosen
-            current_total = sum(len(s) for s in self.page_selections.values())
-            names = []
-            for s in self.page_selections.values():
-                for uid in s:
-                    try:
-                        m = self.adr.guild.get_member(uid)
-                        names.append(m.display_name if m else f"ID {uid}")
-                    except Exception:
-                        names.append(f"ID {uid}")
-            txt = f"Zaznaczono {current_total}/{self.MAX_PICK}:\n" + (", ".join(names) if names else "-")
-            self._build_page()
-            try:
-                await inter.response.edit_message(content=txt, view=self)
-            except Exception:
-                try:
-                    await inter.response.defer(ephemeral=True, thinking=False)
-                except Exception:
-                    pass
-
-        sel.callback = _on_select
-        self.add_item(sel)
-
-    @discord.ui.button(label="◀︎", style=discord.ButtonStyle.secondary)
-    async def prev_page(self, interaction: discord.Interaction, _: discord.ui.Button):
-        if self.page > 0:
-            self.page -= 1
-            self._build_page()
-        await interaction.response.edit_message(view=self)
-
-    @discord.ui.button(label="▶︎", style=discord.ButtonStyle.secondary)
-    async def next_page(self, interaction: discord.Interaction, _: discord.ui.Button):
-        max_page = (len(self.option_rows) - 1) // self.PAGE_SIZE if self.option_rows else 0
-        if self.page < max_page:
-            self.page += 1
-            self._build_page()
-        await interaction.response.edit_message(view=self)
-
-    @discord.ui.button(label="Wyczyść wybór", style=discord.ButtonStyle.danger)
-    async def clear_sel(self, interaction: discord.Interaction, _: discord.ui.Button):
-        self.page_selections.clear()
-        self._build_page()
-        await interaction.response.edit_message(content="Wyczyszczono wybór.", view=self)
+        super().__init__(adr.guild, getattr(adr, "users", []))
 
     
     @discord.ui.button(label="Publikuj Wytypowanych", style=discord.ButtonStyle.success)
     async def publish(self, interaction: discord.Interaction, _: discord.ui.Button):
-        chosen: list[int] = []
-        for s in self.page_selections.values():
-            chosen.extend(list(s))
-        chosen = list(dict.fromkeys(chosen))[:self.MAX_PICK]
+        chosen = self.picked()
         if not chosen:
             return await interaction.response.edit_message(content="Nie wybrano żadnych osób.", view=self)
 
         try:
-            existing = list(getattr(self.adr, "picked_list", []))
-            self.adr.picked_list = list(dict.fromkeys(existing + chosen))
-
-            # usuń wytypowanych z listy zapisanych, żeby nie pokazywali się w zapisanych
-            for _uid in chosen:
-                if _uid in getattr(self.adr, "users", []):
-                    try:
-                        self.adr.users.remove(_uid)
-                    except ValueError:
-                        pass
-
-            # odśwież embed zapisanych (licznik)
-            await self.adr.refresh_embed()
-
-            # odśwież embed wytypowanych
-            await self.adr.refresh_picked_embed(interaction.channel, interaction.user)
+            # przenieś wytypowanych z listy zapisanych (jedna edycja na każdą wiadomość)
+            await self.adr.move(chosen, "users", "picked_list", channel=interaction.channel, picker=interaction.user)
 
             await interaction.response.edit_message(
                 content="Opublikowano/odświeżono listę Wytypowani na AirDrop!",
@@ -995,6 +2813,19 @@ class AirdropPagedPickView(discord.ui.View):
             await interaction.response.edit_message(content="Opublikowano listę (fallback).", view=None)
     
 
+def _airdrop_embed_head(starts_at: datetime, info_text: str, voice: discord.VoiceChannel | None) -> str:
+    ts = int(starts_at.timestamp())
+    parts = []
+    if (info_text or "").strip():
+        parts.append(str(info_text).strip())
+    parts.append("")
+    parts.append("**Kanał głosowy:** " + (voice.mention if isinstance(voice, discord.VoiceChannel) else "-"))
+    parts.append("")
+    parts.append("**Czas rozpoczęcia:**")
+    parts.append(f"Rozpoczęcie AirDrop o <t:{ts}:t> ( <t:{ts}:R> )")
+    parts.append("")
+    return "\n".join(parts) + "\n"
+
 def make_airdrop_embed(starts_at: datetime,
                        users: list[int],
                        guild: discord.Guild,
@@ -1028,8 +2859,8 @@ def make_airdrop_picked_embed(picked_ids: list[int],
                               picker: discord.Member | None) -> discord.Embed:
     lines = []
     for i, uid in enumerate(picked_ids, start=1):
-        m = guild.get_member(uid)
-        lines.append(f"{i}. {m.mention} | {m.display_name}" if m else f"{i}. <@{uid}>")
+        m = MEMBERS.get(guild, uid)
+        lines.append(f"{i}. {m.label}" if m else f"{i}. <@{uid}>")
     desc = "**Wytypowani na AirDrop!**\n" + ("\n".join(lines) if lines else "-")
     emb = discord.Embed(title="Wytypowani na AirDrop!", description=desc, color=0xFFFFFF)
     thumb = _thumb_url(guild)
@@ -1043,41 +2874,91 @@ def make_airdrop_picked_embed(picked_ids: list[int],
         pass
     return emb
 
-class AirdropView(discord.ui.View):
+class AirdropView(EventView):
+    picked_message = StateMessage("picked_message_id")
+    starts_at = state_property("starts_at")
+    info_text = state_property("info_text")
+    max_slots = state_property("max_slots")
+    users = state_property("users")              # zapisani
+    queue = state_property("queue")              # kolejka (gdy limit)
+    picked_list = state_property("picked_list")  # WYTYPOWANI (drugi embed)
+    event_name = "AirDrop"
+
     def __init__(self, starts_at: datetime, guild: discord.Guild, author: discord.Member,
-                 info_text: str, voice: discord.VoiceChannel | None, max_slots: int = 0):
+                 info_text: str, voice: discord.VoiceChannel | None, max_slots: int = 0,
+                 event_id: int | None = None):
         try:
             remain = int((starts_at - datetime.now(tz=WARSAW)).total_seconds())
         except Exception:
             remain = 0
         timeout_seconds = max(60, remain + 3600)
-        super().__init__(timeout=timeout_seconds)
-        self.starts_at = starts_at
-        self.guild = guild
-        self.author = author
-        self.event_name = "AirDrop"
-        self.info_text = info_text
-        self.voice = voice
-        self.max_slots = 0  # unlimited signups  # 0 = bez limitu
-        self.users = []    # zapisani
-        self.queue = []    # kolejka (gdy limit)
-        self.picked_list = []  # WYTYPOWANI (drugi embed)
-        self.message: discord.Message | None = None
-        self.picked_message: discord.Message | None = None
+        # Persistent (restorable) views must not time out.
+        super().__init__(timeout=None if event_id is not None else timeout_seconds)
+        if event_id is not None:
+            persistent_ids(self, "airdrop", event_id, "join", "leave", "pick_from_signups")
+        self.state = AirdropState(event_id, guild, author, starts_at, info_text, voice.id if voice else None)
+        self._embed_head: str | None = None
+        self._embed_key = None
         self._lock = asyncio.Lock()
 
+    def build_embed(self) -> discord.Embed:
+        """Same output as make_airdrop_embed(); the static head of the description is
+        cached per (start, info text, voice) and only the count line is rebuilt."""
+        key = (self.starts_at, self.info_text, self.state.voice_id)
+        if self._embed_head is None or self._embed_key != key:
+            self._embed_head = _airdrop_embed_head(self.starts_at, self.info_text, self.voice)
+            self._embed_key = key
+        desc = self._embed_head + f"**Zapisani ({len(self.users)})**\n-"
+        if self.started:
+            desc += "\n**AirDrop rozpoczął się.**"
+        emb = discord.Embed(title="AirDrop!", description=desc, color=0xFFFFFF)
+        thumb = _thumb_url(self.guild)
+        if thumb:
+            emb.set_thumbnail(url=thumb)
+        emb.set_footer(text=f"Wystawione przez {self.state.author_name}")
+        return emb
+
+    @property
+    def voice(self) -> discord.VoiceChannel | None:
+        guild = self.guild
+        return guild.get_channel(self.state.voice_id) if guild and self.state.voice_id else None
+
+    def schedule_start(self):
+        """(Re)arm the 'AirDrop rozpoczął się' transition at starts_at and the registry expiry."""
+        self.started = False
+        SCHEDULER.schedule(SCHEDULER.key("start", self), self.starts_at, self.on_started)
+        ACTIVE_AIRDROPS.expire_at(self, self.starts_at)
+
+    async def on_started(self):
+        self.started = True
+        await self.refresh_embed()
+
+    def persist(self):
+        """Upsert event metadata (times, message ids) in STORE; re-index a re-sent message."""
+        st = self.state
+        if st.message_id is None:
+            return
+        ACTIVE_AIRDROPS.add(self)
+        STORE.save_event(st.event_id, "airdrop", st.guild_id, st.channel_id, st.message_id, st.meta())
+
     async def refresh_embed(self):
+        """Schedule a coalesced re-render of the announcement (see RenderScheduler)."""
+        self.request_render({self.SIGNUPS})
+
+    async def _render_main(self):
         if not self.message:
             return
         is_full = (self.max_slots > 0 and len(self.users) >= self.max_slots)
         for item in self.children:
             if isinstance(item, discord.ui.Button) and item.label == "Dołącz":
                 item.disabled = is_full
-        emb = make_airdrop_embed(self.starts_at, self.users, self.guild, self.author, self.info_text, self.voice, self.max_slots, len(self.queue))
-        await self.message.edit(embed=emb, view=self)
+        await self.message.edit(embed=self.build_embed(), view=self)
+
+    async def _render_picked(self, channel: discord.abc.Messageable, picker: discord.Member):
+        await self.refresh_picked_embed(channel, picker)
 
     async def refresh_picked_embed(self, channel: discord.abc.Messageable, picker: discord.Member | None):
-        emb = make_airdrop_picked_embed(self.picked_list, self.guild, picker or self.author)
+        emb = make_airdrop_picked_embed(self.picked_list, self.guild, picker or self.author or self.guild.me)
         if self.picked_message:
             try:
                 await self.picked_message.edit(embed=emb)
@@ -1086,11 +2967,14 @@ class AirdropView(discord.ui.View):
                 self.picked_message = None
         try:
             self.picked_message = await channel.send(embed=emb)
+            self.persist()
         except Exception:
             pass
 
     @discord.ui.button(label="Dołącz", style=discord.ButtonStyle.success)
     async def join(self, interaction: discord.Interaction, _: discord.ui.Button):
+        if await THROTTLE.throttled(interaction, "airdrop", self.event_id or id(self)):
+            return
         async with self._lock:
             uid = interaction.user.id
             if uid in self.users:
@@ -1099,27 +2983,32 @@ class AirdropView(discord.ui.View):
                 if self.max_slots > 0 and len(self.users) >= self.max_slots:
                     await interaction.response.send_message(f"Limit miejsc osiągnięty ({self.max_slots}). Użyj **Dołącz do kolejki**.", ephemeral=True)
                     return
-                self.users.append(uid)
-                if uid in self.queue:
-                    self.queue.remove(uid)
+                self.users.add(uid)
+                STORE.append(self.event_id, "add", "users", uid)
+                if self.queue.discard(uid):
+                    STORE.append(self.event_id, "remove", "queue", uid)
         await interaction.response.send_message("Dołączono.", ephemeral=True)
         await self.refresh_embed()
 
     @discord.ui.button(label="Opuść", style=discord.ButtonStyle.danger)
     async def leave(self, interaction: discord.Interaction, _: discord.ui.Button):
+        if await THROTTLE.throttled(interaction, "airdrop", self.event_id or id(self)):
+            return
         async with self._lock:
             uid = interaction.user.id
             changed = False
-            if uid in self.users:
-                self.users.remove(uid); changed = True
-            if uid in self.queue:
-                self.queue.remove(uid); changed = True
-            if uid in self.picked_list:
-                self.picked_list.remove(uid); changed = True
+            if self.users.discard(uid):
+                changed = True
+                STORE.append(self.event_id, "remove", "users", uid)
+            if self.queue.discard(uid):
+                changed = True
+                STORE.append(self.event_id, "remove", "queue", uid)
+            if self.picked_list.discard(uid):
+                changed = True
+                STORE.append(self.event_id, "remove", "picked_list", uid)
         await interaction.response.send_message("Zaktualizowano.", ephemeral=True)
         if changed:
-            await self.refresh_embed()
-            await self.refresh_picked_embed(interaction.channel, interaction.user)
+            self.request_render({self.SIGNUPS, self.PICKED}, interaction.channel, interaction.user)
 
     @discord.ui.button(label="PICK", style=discord.ButtonStyle.secondary)
     async def pick_from_signups(self, interaction: discord.Interaction, _: discord.ui.Button):
@@ -1132,7 +3021,7 @@ class AirdropView(discord.ui.View):
             view=view, ephemeral=True
         )
 
-class AirdropAddAnyView(discord.ui.View):
+class AirdropAddAnyView(MeteredView):
     def __init__(self, adr: "AirdropView"):
         super().__init__(timeout=240)
         self.adr = adr
@@ -1145,37 +3034,22 @@ class AirdropAddAnyView(discord.ui.View):
         async def _on_pick(inter: discord.Interaction):
             await inter.response.defer(ephemeral=True, thinking=False)
             chosen = list(self.user_select.values)
-            added = 0
-            names = []
-            removed_from_signups = 0
-            for u in chosen:
-                if u.id not in self.adr.picked_list:
-                    self.adr.picked_list.append(u.id)
-                    added += 1
-                # jeżeli był na liście zapisanych, usuń go z niej
-                if u.id in getattr(self.adr, "users", []):
-                    try:
-                        self.adr.users.remove(u.id)
-                        removed_from_signups += 1
-                    except ValueError:
-                        pass
-                names.append(f"- {getattr(u,'display_name', getattr(u,'name',''))}")
-            # Odśwież: najpierw główny embed (licznik zapisanych), potem lista wytypowanych
-            # Odśwież: najpierw główny embed (licznik zapisanych), potem lista wytypowanych
-            await self.adr.refresh_embed()
-            await self.adr.refresh_picked_embed(inter.channel, inter.user)
+            names = [f"- {getattr(u,'display_name', getattr(u,'name',''))}" for u in chosen]
+            # jeżeli ktoś był na liście zapisanych, zostaje z niej przeniesiony
+            taken, given = await self.adr.move([u.id for u in chosen], "users", "picked_list",
+                                               channel=inter.channel, picker=inter.user)
             await inter.followup.send(
-                f"✅ Dodano do WYTYPOWANYCH: **{added}** (przeniesiono z zapisanych: {removed_from_signups}).\n"
+                f"✅ Dodano do WYTYPOWANYCH: **{len(given)}** (przeniesiono z zapisanych: {len(taken)}).\n"
                 + ("\n".join(names) if names else ""),
                 ephemeral=True
             )
-    
+        self.user_select.callback = _on_pick
 
     @discord.ui.button(label="Zamknij", style=discord.ButtonStyle.secondary)
     async def close_btn(self, interaction: discord.Interaction, _: discord.ui.Button):
         await interaction.response.edit_message(content="Zamknięto.", view=None)
 
-class AirdropRemovePickedView(discord.ui.View):
+class AirdropRemovePickedView(MeteredView):
     def __init__(self, adr: "AirdropView"):
         super().__init__(timeout=240)
         self.adr = adr
@@ -1184,7 +3058,7 @@ class AirdropRemovePickedView(discord.ui.View):
             return
         options = []
         for uid in adr.picked_list[:25]:
-            m = adr.guild.get_member(uid)
+            m = MEMBERS.get(adr.guild, uid)
             options.append(discord.SelectOption(label=(m.display_name if m else f"User {uid}")[:100],
                                                value=str(uid),
                                                description=(f"@{m.name}" if m else f"ID {uid}")[:100]))
@@ -1198,13 +3072,10 @@ class AirdropRemovePickedView(discord.ui.View):
             chosen = [int(v) for v in self.sel.values]
             removed_names = []
             for uid in chosen:
-                m = self.adr.guild.get_member(uid)
+                m = MEMBERS.get(self.adr.guild, uid)
                 removed_names.append(f"- {m.display_name if m else f'ID {uid}'}")
             # Usuń z listy WYTYPOWANYCH
-            self.adr.picked_list = [uid for uid in self.adr.picked_list if uid not in chosen]
-            # Odśwież obie listy
-            await self.adr.refresh_picked_embed(inter.channel, inter.user)
-            await self.adr.refresh_embed()
+            await self.adr.move(chosen, "picked_list", None, channel=inter.channel, picker=inter.user)
             await inter.followup.send(
                 "✅ Usunięto z WYTYPOWANYCH:\n" + ("\n".join(removed_names) if removed_names else ""),
                 ephemeral=True
@@ -1228,7 +3099,7 @@ def mcl_make_embed(title_text: str,
     desc = (
         f"**Start:** <t:{ts_start}:t> • <t:{ts_start}:R>\n"
         f"**Teleportacja:** <t:{ts_tp}:t> • <t:{ts_tp}:R>\n"
-        f"**Kanał głosowy:** {voice.mention}\n\n"
+        f"**Kanał głosowy:** {voice.mention if voice else '-'}\n\n"
         "Kliknij **Zapisz się** aby dołączyć. Wpisz: **Imię Nazwisko | UID**.\n\n"
         f"**Zapisani ({signed_count}):**\n-"
     )
@@ -1247,7 +3118,7 @@ def mcl_make_selected_embed(picker: discord.Member,
     now_pl = datetime.now(tz=WARSAW) if WARSAW else datetime.now()
     lines = []
     for i, uid in enumerate(selected_ids, start=1):
-        m = guild.get_member(uid)
+        m = MEMBERS.get(guild, uid)
         nick = f"{m.mention}" if m else f"<@{uid}>"
         extra = input_map.get(uid, "").strip()
         role = extra_labels.get(uid, "").strip()
@@ -1263,7 +3134,7 @@ def mcl_make_selected_embed(picker: discord.Member,
     emb.set_footer(text=f"Wytypował: {picker.display_name} • {now_pl.strftime('%d.%m.%Y %H:%M')}")
     return emb
 
-class MclSignupModal(discord.ui.Modal):
+class MclSignupModal(MeteredModal):
     def __init__(self, view: "MclView"):
         super().__init__(title=f"Zapis na {view.event_name}")
         self.view = view
@@ -1278,13 +3149,13 @@ class MclSignupModal(discord.ui.Modal):
 
     async def on_submit(self, interaction: discord.Interaction):
         text = str(self.name_uid.value).strip()
-        await self.view.add_or_update_signup(interaction.user, text)
+        await self.view.add_or_update_signup(interaction.user, text)  # state + queued render only
         try:
             await interaction.response.send_message("✅ Zapis przyjęty.", ephemeral=True)
         except Exception:
             pass
 
-class MclAssignLabelModal(discord.ui.Modal, title="Nadaj/edytuj etykietę"):
+class MclAssignLabelModal(MeteredModal, title="Nadaj/edytuj etykietę"):
     def __init__(self, sel_view: "MclSelectedView", uid: int):
         super().__init__()
         self.sel_view = sel_view
@@ -1305,26 +3176,22 @@ class MclAssignLabelModal(discord.ui.Modal, title="Nadaj/edytuj etykietę"):
             self.sel_view.extra_labels[self.uid] = text[:30]
         else:
             self.sel_view.extra_labels.pop(self.uid, None)
-        # Update the published embed
+        self.sel_view.parent.selected_lines.invalidate(self.uid)
+        STORE.append(self.sel_view.parent.event_id, "label", None, self.uid, text[:30] or None)
         try:
-            await self.sel_view.refresh_selected_embed(interaction.channel, interaction.user)
             await interaction.response.send_message("Zapisano etykietę.", ephemeral=True)
-        except Exception:
-            # in case the message is already acknowledged
-            try:
-                if interaction.response.is_done():
-                    await interaction.followup.send("Zapisano etykietę.", ephemeral=True)
-                else:
-                    await interaction.response.send_message("Zapisano etykietę.", ephemeral=True)
-            except Exception:
-                pass
-class MclAssignLabelPicker(discord.ui.View):
+        except discord.HTTPException:
+            pass
+        # Update the published embed in the background
+        parent = self.sel_view.parent
+        parent.request_render({parent.PICKED}, interaction.channel, interaction.user)
+class MclAssignLabelPicker(MeteredView):
     def __init__(self, selected_view: "MclSelectedView"):
         super().__init__(timeout=300)
         self.sel_view = selected_view
         options = []
         for uid in selected_view.selected_ids[:25]:
-            m = selected_view.guild.get_member(uid)
+            m = MEMBERS.get(selected_view.guild, uid)
             label = (m.display_name if m else f"User {uid}")[:100]
             signup_text = (selected_view.input_map.get(uid, "")[:40])
             current = selected_view.extra_labels.get(uid, "")
@@ -1347,19 +3214,21 @@ class MclAssignLabelPicker(discord.ui.View):
     async def close_btn(self, interaction: discord.Interaction, _: discord.ui.Button):
         await interaction.response.edit_message(content="Zamknięto.", view=None)
 
-class MclSelectedView(discord.ui.View):
+class MclSelectedView(MeteredView):
     def __init__(self, parent: "MclView", picker: discord.Member):
-        super().__init__(timeout=600)
+        super().__init__(timeout=None if parent.event_id is not None else 600)
+        if parent.event_id is not None:
+            persistent_ids(self, "mclsel", parent.event_id, "assign_labels", "manage_panel")
         self.parent = parent
         self.picker = picker
         self.guild = parent.guild
-        self.selected_ids: list[int] = list(parent.selected_ids)  # snapshot
+        self.selected_ids: Roster = parent.selected_ids  # shared with the parent MclView
         self.input_map: dict[int, str] = parent.input_map
         self.extra_labels: dict[int, str] = parent.extra_labels
         self.message: discord.Message | None = None
 
     async def refresh_selected_embed(self, channel: discord.abc.Messageable, picker: discord.Member | None):
-        emb = mcl_make_selected_embed(picker or self.picker, self.guild, self.selected_ids, self.input_map, self.extra_labels, self.parent.event_name)
+        emb = self.parent.build_selected_embed(picker or self.picker)
         if self.message:
             try:
                 await self.message.edit(embed=emb, view=self)
@@ -1368,13 +3237,14 @@ class MclSelectedView(discord.ui.View):
                 self.message = None
         try:
             self.message = await channel.send(embed=emb, view=self)
+            self.parent.selected_view = self
+            self.parent.persist()
         except Exception:
             pass
 
     @discord.ui.button(label="NadajRole", style=discord.ButtonStyle.primary)
     async def assign_labels(self, interaction: discord.Interaction, _: discord.ui.Button):
-        mem: discord.Member = interaction.user
-        if not (mem.guild_permissions.administrator or (REQUIRED_ROLE_ID and any(r.id == REQUIRED_ROLE_ID for r in mem.roles))):
+        if not PERMS.allowed(interaction.user):
             return await interaction.response.send_message("Brak uprawnień.", ephemeral=True)
         await interaction.response.send_message("Wybierz gracza do nadania/edycji etykiety:", view=MclAssignLabelPicker(self), ephemeral=True)
     @discord.ui.button(label="PANEL", style=discord.ButtonStyle.secondary)
@@ -1387,146 +3257,42 @@ class MclSelectedView(discord.ui.View):
                 await interaction.followup.send("Panel zarządzania składem:", ephemeral=True, view=MclManagePanel(self))
             except Exception:
                 pass
-class MclPagedPickView(discord.ui.View):
+class MclPagedPickView(PagedPickView):
     """Paginowany PICK dla MCL/ZoneWars: przeglądaj wszystkich zapisanych (po 25) i wybierz max self.mcl.max_pick."""
-    PAGE_SIZE = 25
 
     def __init__(self, mclview: "MclView", opener: discord.Member):
-        super().__init__(timeout=300)
         self.mcl = mclview
         self.opener = opener
-        self.option_rows: list[tuple[int,str,str]] = []
-        for uid in getattr(self.mcl, "signups", []):
-            try:
-                m = self.mcl.guild.get_member(uid)
-            except Exception:
-                m = None
-            label = m.display_name if m else f"User {uid}"
-            desc  = ""
-            try:
-                desc = (self.mcl.input_map.get(uid, "")[:96])
-            except Exception:
-                pass
-            if not desc:
-                desc = (f"@{m.name}" if m else f"ID {uid}")
-            self.option_rows.append((uid, label, desc))
-        self.page = 0
-        self.page_selections: dict[int, set[int]] = {}
-        self._build_page()
-
-    def _build_page(self):
-        for child in list(self.children):
-            if isinstance(child, discord.ui.Select):
-                self.remove_item(child)
-
-        start = self.page * self.PAGE_SIZE
-        end   = start + self.PAGE_SIZE
-        slice_rows = self.option_rows[start:end]
-
-        current_total = sum(len(s) for s in self.page_selections.values())
-        max_pick = getattr(self.mcl, "max_pick", 20)
-        remaining = max(0, max_pick - current_total)
-
-        options: list[discord.SelectOption] = []
-        for idx, (uid, label, desc) in enumerate(slice_rows, start=1):
-            options.append(discord.SelectOption(
-                label=f"{idx}. {label}"[:100],
-                value=str(uid),
-                description=(desc or f"ID {uid}")[:100]
-            ))
-
-        if not options:
-            self.add_item(discord.ui.Button(label="Brak osób na tej stronie", style=discord.ButtonStyle.secondary, disabled=True))
-            return
-
-        if remaining == 0:
-            sel = discord.ui.Select(
-                placeholder=f"Wybrano {current_total}/{max_pick}. Limit osiągnięty.",
-                min_values=0, max_values=0, options=options, disabled=True
-            )
-        else:
-            total_pages = (len(self.option_rows)-1)//self.PAGE_SIZE+1 if self.option_rows else 1
-            sel = discord.ui.Select(
-                placeholder=f"Strona {self.page+1}/{total_pages} • wybierz (max {remaining})",
-                min_values=0, max_values=min(len(options), remaining), options=options
-            )
-
-        async def _on_select(inter: discord.Interaction):
-            chosen = {int(v) for v in (sel.values or [])}
-            self.page_selections[self.page] = chosen
-            current_total = sum(len(s) for s in self.page_selections.values())
-            names = []
-            for s in self.page_selections.values():
-                for uid in s:
-                    try:
-                        m = self.mcl.guild.get_member(uid)
-                        names.append(m.display_name if m else f"ID {uid}")
-                    except Exception:
-                        names.append(f"ID {uid}")
-            txt = f"Zaznaczono {current_total}/{getattr(self.mcl,'max_pick',20)}:\n" + (", ".join(names) if names else "-")
-            self._build_page()
-            try:
-                await inter.response.edit_message(content=txt, view=self)
-            except Exception:
-                try:
-                    await inter.response.defer(ephemeral=True, thinking=False)
-                except Exception:
-                    pass
-
-        sel.callback = _on_select
-        self.add_item(sel)
+        super().__init__(mclview.guild, getattr(mclview, "signups", []))
 
-    @discord.ui.button(label="◀︎", style=discord.ButtonStyle.secondary)
-    async def prev_page(self, interaction: discord.Interaction, _: discord.ui.Button):
-        if self.page > 0:
-            self.page -= 1
-            self._build_page()
-        await interaction.response.edit_message(view=self)
-
-    @discord.ui.button(label="▶︎", style=discord.ButtonStyle.secondary)
-    async def next_page(self, interaction: discord.Interaction, _: discord.ui.Button):
-        max_page = (len(self.option_rows) - 1) // self.PAGE_SIZE if self.option_rows else 0
-        if self.page < max_page:
-            self.page += 1
-            self._build_page()
-        await interaction.response.edit_message(view=self)
+    @property
+    def max_pick(self) -> int:
+        return getattr(self.mcl, "max_pick", 20)
 
-    @discord.ui.button(label="Wyczyść wybór", style=discord.ButtonStyle.danger)
-    async def clear_sel(self, interaction: discord.Interaction, _: discord.ui.Button):
-        self.page_selections.clear()
-        self._build_page()
-        await interaction.response.edit_message(content="Wyczyszczono wybór.", view=self)
+    def row(self, uid: int, member: discord.Member | None) -> tuple[str, str]:
+        desc = ""
+        try:
+            desc = (self.mcl.input_map.get(uid, "")[:96])
+        except Exception:
+            pass
+        return (member.display_name if member else f"User {uid}",
+                desc or (f"@{member.name}" if member else f"ID {uid}"))
 
     
     @discord.ui.button(label="Publikuj listę", style=discord.ButtonStyle.success)
     async def publish(self, interaction: discord.Interaction, _: discord.ui.Button):
 
-            chosen: list[int] = []
-            for s in self.page_selections.values():
-                chosen.extend(list(s))
-            chosen = list(dict.fromkeys(chosen))[:getattr(self.mcl,'max_pick',20)]
+            chosen = self.picked()
             if not chosen:
                 return await interaction.response.edit_message(content="Nie wybrano żadnych osób.", view=self)
 
-            # Ustaw wytypowanych i PRZENIEŚ z zapisanych
-            self.mcl.selected_ids = list(chosen)
-            moved = 0
-            for uid in list(chosen):
-                if uid in self.mcl.signups:
-                    try:
-                        self.mcl.signups.remove(uid); moved += 1
-                    except ValueError:
-                        pass
-            try:
-                await self.mcl.refresh_main()
-            except Exception:
-                pass
+            # Ustaw wytypowanych i PRZENIEŚ z zapisanych (jedna edycja na każdą wiadomość)
+            taken, _ = await self.mcl.move(chosen, "signups", "selected_ids", replace=True,
+                                           channel=interaction.channel, picker=interaction.user)
 
             try:
-                sel_view = MclSelectedView(self.mcl, interaction.user)
-                await sel_view.refresh_selected_embed(interaction.channel, interaction.user)
                 await interaction.response.edit_message(
-                    content=f"Opublikowano listę Wytypowani na {getattr(self.mcl,'event_name','MCL')}! (przeniesiono z zapisanych: {moved})",
+                    content=f"Opublikowano listę Wytypowani na {getattr(self.mcl,'event_name','MCL')}! (przeniesiono z zapisanych: {len(taken)})",
                     view=None
                 )
             except Exception:
@@ -1544,21 +3310,21 @@ async def confirm_publish(self, interaction: discord.Interaction, button: discor
 
 
 
-class MclChangeTimesModal(discord.ui.Modal, title="Zmień godziny (start / teleport)"):
+class MclChangeTimesModal(MeteredModal, title="Zmień godziny (start / teleport)"):
     def __init__(self, parent_view: "MclSelectedView"):
         super().__init__()
         self.parent_view = parent_view
 
         self.start_input = discord.ui.TextInput(
             label="Nowa godzina STARTU (HH:MM)",
-            placeholder="np. 19:00",
-            max_length=5,
+            placeholder="np. 19:00, +15m lub 24.12 19:00",
+            max_length=16,
             required=False
         )
         self.tp_input = discord.ui.TextInput(
             label="Nowa godzina TELEPORTU (HH:MM)",
-            placeholder="np. 18:50",
-            max_length=5,
+            placeholder="np. 18:50, +15m lub 24.12 18:50",
+            max_length=16,
             required=False
         )
         self.add_item(self.start_input)
@@ -1572,48 +3338,36 @@ class MclChangeTimesModal(discord.ui.Modal, title="Zmień godziny (start / telep
         except Exception:
             pass
 
-        def _parse(hhmm: str):
-            hh, mm = (int(x) for x in hhmm.split(":"))
-            assert 0 <= hh <= 23 and 0 <= mm <= 59
-            try:
-                now_pl = datetime.now(tz=WARSAW)
-                dt = datetime(now_pl.year, now_pl.month, now_pl.day, hh, mm, tzinfo=WARSAW)
-                return dt if dt > now_pl else dt + timedelta(days=1)
-            except Exception:
-                now_local = datetime.now()
-                dt = datetime(now_local.year, now_local.month, now_local.day, hh, mm)
-                return dt if dt > now_local else dt + timedelta(days=1)
-
         parent = self.parent_view.parent
         old_start_dt = getattr(parent, "start_at", None)
         old_tp_dt    = getattr(parent, "tp_at", None)
 
-        # START
+        # Parse both first: a bad value must leave the event untouched.
         raw_start = (str(self.start_input.value or "").strip())
-        if raw_start:
-            try:
-                new_start = _parse(raw_start)
-                parent.start_at = new_start
-            except Exception:
-                try:
-                    await interaction.followup.send("❌ Błędny format STARTU. Użyj HH:MM.", ephemeral=True)
-                except Exception:
-                    pass
-                return
-
-        # TELEPORT
         raw_tp = (str(self.tp_input.value or "").strip())
-        if raw_tp:
+        parsed: dict[str, datetime] = {}
+        for what, raw in (("STARTU", raw_start), ("TELEPORTU", raw_tp)):
+            if not raw:
+                continue
             try:
-                new_tp = _parse(raw_tp)
-                parent.tp_at = new_tp
+                parsed[what] = parse_event_time(raw)
             except Exception:
                 try:
-                    await interaction.followup.send("❌ Błędny format TELEPORTU. Użyj HH:MM.", ephemeral=True)
+                    await interaction.followup.send(f"❌ Błędny format {what}. Użyj {TIME_INPUT_HINT}.", ephemeral=True)
                 except Exception:
                     pass
                 return
-
+        new_start, new_tp = parsed.get("STARTU"), parsed.get("TELEPORTU")
+
+        if new_start is not None:
+            parent.start_at = new_start
+        if new_tp is not None:
+            parent.tp_at = new_tp
+        if new_start is not None:
+            parent.schedule_start()  # also re-arms the registry expiry from tp_at
+        elif new_tp is not None:
+            ACTIVE_MCLS.expire_at(parent, parent.tp_at)
+        parent.persist()
         # Refresh the main announcement
         try:
             await parent.refresh_main()
@@ -1656,7 +3410,7 @@ class MclChangeTimesModal(discord.ui.Modal, title="Zmień godziny (start / telep
             except Exception:
                 pass
 
-class MclManagePanel(discord.ui.View):
+class MclManagePanel(MeteredView):
     """Panel z przyciskami: Dodaj z zapisanych / Usuń z wytypowanych"""
     def __init__(self, sel_view: "MclSelectedView"):
         super().__init__(timeout=300)
@@ -1686,7 +3440,7 @@ class MclManagePanel(discord.ui.View):
     async def close_btn(self, interaction: discord.Interaction, _: discord.ui.Button):
         await interaction.response.edit_message(content="Zamknięto panel.", view=None)
 
-class _BasePanelSelect(discord.ui.View):
+class _BasePanelSelect(MeteredView):
     def __init__(self, sel_view: "MclSelectedView"):
         super().__init__(timeout=300)
         self.sel_view = sel_view
@@ -1710,7 +3464,7 @@ class MclPanelAddView(_BasePanelSelect):
         available = [uid for uid in sel_view.parent.signups if uid not in sel_view.selected_ids]
         options: list[discord.SelectOption] = []
         for uid in available[:25]:
-            m = sel_view.guild.get_member(uid)
+            m = MEMBERS.get(sel_view.guild, uid)
             label = (m.display_name if m else f"User {uid}")[:100]
             desc = (sel_view.input_map.get(uid, "")[:96]) or f"ID {uid}"
             options.append(discord.SelectOption(label=label, value=str(uid), description=desc))
@@ -1723,21 +3477,8 @@ class MclPanelAddView(_BasePanelSelect):
             async def _on_pick(inter: discord.Interaction):
                 try:
                     uid = int(self.select.values[0])
-                    if uid not in self.sel_view.selected_ids:
-                        self.sel_view.selected_ids.append(uid)
-                        # synchronizuj z parentem
-                        self.sel_view.parent.selected_ids = list(self.sel_view.selected_ids)
-                        # Usuń z zapisanych jeżeli tam był
-                        try:
-                            if uid in self.sel_view.parent.signups:
-                                self.sel_view.parent.signups.remove(uid)
-                                await self.sel_view.parent.refresh_main()
-                        except Exception:
-                            pass
-                        try:
-                            await self.sel_view.refresh_selected_embed(inter.channel, inter.user)
-                        except Exception:
-                            pass
+                    # Dodaj do wytypowanych i usuń z zapisanych, jeżeli tam był
+                    await self.sel_view.parent.move([uid], "signups", "selected_ids", channel=inter.channel, picker=inter.user)
                     # przebuduj opcje (żeby zniknęła dodana osoba)
                     new_view = MclPanelAddView(self.sel_view)
                     content = f"Dodano: <@{uid}>. Wybierz kolejną osobę albo wróć."
@@ -1772,7 +3513,7 @@ class MclPanelRemoveView(_BasePanelSelect):
         super().__init__(sel_view)
         options: list[discord.SelectOption] = []
         for uid in sel_view.selected_ids[:25]:
-            m = sel_view.guild.get_member(uid)
+            m = MEMBERS.get(sel_view.guild, uid)
             label = (m.display_name if m else f"User {uid}")[:100]
             desc = (sel_view.input_map.get(uid, "")[:96]) or f"ID {uid}"
             options.append(discord.SelectOption(label=label, value=str(uid), description=desc))
@@ -1785,21 +3526,8 @@ class MclPanelRemoveView(_BasePanelSelect):
             async def _on_pick(inter: discord.Interaction):
                 try:
                     uid = int(self.select.values[0])
-                    if uid in self.sel_view.selected_ids:
-                        self.sel_view.selected_ids = [x for x in self.sel_view.selected_ids if x != uid]
-                        # synchronizuj z parentem
-                        self.sel_view.parent.selected_ids = list(self.sel_view.selected_ids)
-                        # Dodaj z powrotem do zapisanych
-                        try:
-                            if uid not in self.sel_view.parent.signups:
-                                self.sel_view.parent.signups.append(uid)
-                                await self.sel_view.parent.refresh_main()
-                        except Exception:
-                            pass
-                        try:
-                            await self.sel_view.refresh_selected_embed(inter.channel, inter.user)
-                        except Exception:
-                            pass
+                    # Usuń z wytypowanych i dodaj z powrotem do zapisanych
+                    await self.sel_view.parent.move([uid], "selected_ids", "signups", channel=inter.channel, picker=inter.user)
                     new_view = MclPanelRemoveView(self.sel_view)
                     content = f"Usunięto: <@{uid}>. Wybierz kolejną osobę albo wróć."
                     try:
@@ -1826,62 +3554,148 @@ class MclPanelRemoveView(_BasePanelSelect):
     async def close_btn(self, interaction: discord.Interaction, _: discord.ui.Button):
         await interaction.response.edit_message(content="Zamknięto panel.", view=None)
 
-class MclView(discord.ui.View):
-    def __init__(self, title_text: str, voice: discord.VoiceChannel, start_at: datetime, tp_at: datetime, guild: discord.Guild, author: discord.Member, event_name: str = "MCL", max_pick: int = 20):
+class MclView(EventView):
+    title_text = state_property("title_text")
+    start_at = state_property("start_at")
+    tp_at = state_property("tp_at")
+    event_name = state_property("event_name")
+    max_pick = state_property("max_pick")
+    signups = state_property("signups")
+    input_map = state_property("input_map")        # user_id -> "Imię Nazwisko | UID"
+    selected_ids = state_property("selected_ids")
+    extra_labels = state_property("extra_labels")  # user_id -> label text
+    SIGNUPS = "signups"
+    PICKED = "selected_ids"
+
+    def __init__(self, title_text: str, voice: discord.VoiceChannel, start_at: datetime, tp_at: datetime, guild: discord.Guild, author: discord.Member, event_name: str = "MCL", max_pick: int = 20,
+                 event_id: int | None = None):
         remain = int((tp_at - datetime.now(tz=WARSAW)).total_seconds()) if WARSAW else 0
-        super().__init__(timeout=max(60, remain + 3600))
-        self.title_text = title_text
-        self.voice = voice
-        self.start_at = start_at
-        self.tp_at = tp_at
-        self.guild = guild
-        self.author = author
-        self.event_name = event_name
-        self.message: discord.Message | None = None
-        self.max_pick = int(max(1, max_pick))
-        # signups and data
-        self.signups: list[int] = []
-        self.input_map: dict[int, str] = {}  # user_id -> "Imię Nazwisko | UID"
-        # selected data
-        self.selected_ids: list[int] = []
-        self.extra_labels: dict[int, str] = {}  # user_id -> label text
+        # Persistent (restorable) views must not time out.
+        super().__init__(timeout=None if event_id is not None else max(60, remain + 3600))
+        if event_id is not None:
+            persistent_ids(self, "mcl", event_id, "join_btn", "leave_btn", "admin_pick_btn")
+        self.state = MclState(event_id, guild, author, title_text, voice.id if voice else None, start_at, tp_at,
+                              event_name, max_pick)
+        self.selected_view: "MclSelectedView | None" = None
+        self.selected_lines = RosterLines(self._selected_row)
         self._lock = asyncio.Lock()
 
+    @property
+    def voice(self) -> discord.VoiceChannel | None:
+        guild = self.guild
+        return guild.get_channel(self.state.voice_id) if guild and self.state.voice_id else None
+
+    def _selected_row(self, uid: int) -> str:
+        m = MEMBERS.get(self.guild, uid)
+        nick = f"{m.mention}" if m else f"<@{uid}>"
+        extra = self.input_map.get(uid, "").strip()
+        role = self.extra_labels.get(uid, "").strip()
+        row = f"{nick} | {extra}" if extra else nick
+        if role:
+            row += f" {role}"
+        return row
+
+    def build_selected_embed(self, picker: discord.Member) -> discord.Embed:
+        """Same output as mcl_make_selected_embed(), built from cached row fragments."""
+        now_pl = datetime.now(tz=WARSAW) if WARSAW else datetime.now()
+        title = f"Wytypowani na {self.event_name}!"
+        emb = discord.Embed(title=title, color=0xFFFFFF)
+        fit_embed_lines(emb, f"**{title}**\n", self.selected_lines.lines(self.selected_ids) or ["-"])
+        thumb = _thumb_url(self.guild)
+        if thumb:
+            emb.set_thumbnail(url=thumb)
+        emb.set_footer(text=f"Wytypował: {picker.display_name} • {now_pl.strftime('%d.%m.%Y %H:%M')}")
+        return emb
+
+    def stop(self):
+        super().stop()
+        if self.selected_view is not None:
+            self.selected_view.stop()
+
+    def schedule_start(self):
+        """(Re)arm the '<event> rozpoczął się' transition at start_at and the registry expiry
+        (counted from the teleport time)."""
+        self.started = False
+        SCHEDULER.schedule(SCHEDULER.key("start", self), self.start_at, self.on_started)
+        ACTIVE_MCLS.expire_at(self, self.tp_at)
+
+    async def on_started(self):
+        self.started = True
+        await self.refresh_main()
+
+    def persist(self):
+        """Upsert event metadata (times, message ids) in STORE; re-index a re-sent message."""
+        st = self.state
+        if st.message_id is None:
+            return
+        ACTIVE_MCLS.add(self)
+        sel = self.selected_view
+        st.selected_message_id = sel.message.id if sel and sel.message else None
+        st.picker_id = sel.picker.id if sel else None
+        STORE.save_event(st.event_id, "mcl", st.guild_id, st.channel_id, st.message_id, st.meta())
+
     async def add_or_update_signup(self, member: discord.Member | discord.User, text: str):
         uid = member.id
         async with self._lock:
-            if uid not in self.signups:
-                self.signups.append(uid)
+            if self.signups.add(uid):
+                STORE.append(self.event_id, "add", "signups", uid)
             self.input_map[uid] = text
+            self.selected_lines.invalidate(uid)
+            STORE.append(self.event_id, "text", None, uid, text)
         await self.refresh_main()
 
     async def remove_signup(self, member: discord.Member | discord.User):
         uid = member.id
         async with self._lock:
             changed = False
-            if uid in self.signups:
-                self.signups.remove(uid); changed = True
-            if uid in self.selected_ids:
-                self.selected_ids.remove(uid); changed = True
-            self.input_map.pop(uid, None)
-            self.extra_labels.pop(uid, None)
+            if self.signups.discard(uid):
+                changed = True
+                STORE.append(self.event_id, "remove", "signups", uid)
+            if self.selected_ids.discard(uid):
+                changed = True
+                STORE.append(self.event_id, "remove", "selected_ids", uid)
+            if self.input_map.pop(uid, None) is not None:
+                STORE.append(self.event_id, "text", None, uid, None)
+            if self.extra_labels.pop(uid, None) is not None:
+                STORE.append(self.event_id, "label", None, uid, None)
+            self.selected_lines.invalidate(uid)
         if changed:
             await self.refresh_main()
 
     async def refresh_main(self):
+        """Schedule a coalesced re-render of the announcement (see RenderScheduler)."""
+        self.request_render({self.SIGNUPS})
+
+    async def _render_main(self):
         if not self.message:
             return
         emb = mcl_make_embed(self.title_text, self.voice, self.start_at, self.tp_at, self.guild, len(self.signups))
-        emb.set_footer(text=f"Wystawione przez {self.author.display_name}")
+        if self.started:
+            emb.description += f"\n**{self.event_name} rozpoczął się.**"
+        emb.set_footer(text=f"Wystawione przez {self.state.author_name}")
         try:
             await self.message.edit(embed=emb, view=self)
+        except discord.HTTPException as e:
+            if e.status == 429:
+                raise
+            try:
+                ch = self.message.channel
+                self.message = await ch.send(embed=emb, view=self)
+                self.persist()
+            except Exception:
+                pass
         except Exception:
             try:
                 ch = self.message.channel
                 self.message = await ch.send(embed=emb, view=self)
+                self.persist()
             except Exception:
                 pass
 
+    async def _render_picked(self, channel: discord.abc.Messageable, picker: discord.Member):
+        sel_view = self.selected_view or MclSelectedView(self, picker)
+        await sel_view.refresh_selected_embed(channel, picker)
+
     @discord.ui.button(label="Zapisz się", style=discord.ButtonStyle.success)
     async def join_btn(self, interaction: discord.Interaction, _: discord.ui.Button):
         await interaction.response.send_modal(MclSignupModal(self))
@@ -1911,37 +3725,15 @@ class MclView(discord.ui.View):
     tp_time="Godzina teleportacji 24h, np. 20:00."
 )
 async def create_mcl(interaction: discord.Interaction, opis: str, voice: discord.VoiceChannel, start_time: str, tp_time: str):
-    # Parse times -> nearest future
-    def _p(hhmm: str) -> datetime:
-        """Parse times like '19:00', '19.00', '19 00', or '1900' -> nearest future."""
-        raw = hhmm.strip()
-        parts = re.findall(r"\d+", raw)
-        if len(parts) >= 2:
-            hh, mm = int(parts[0]), int(parts[1])
-        elif len(parts) == 1 and len(parts[0]) in (3, 4):
-            hh = int(parts[0][:-2])
-            mm = int(parts[0][-2:])
-        else:
-            raise ValueError("bad time")
-        if not (0 <= hh <= 23 and 0 <= mm <= 59):
-            raise ValueError("range")
-        try:
-            now_pl = datetime.now(tz=WARSAW)
-            t = datetime(now_pl.year, now_pl.month, now_pl.day, hh, mm, tzinfo=WARSAW)
-            return t if t > now_pl else t + timedelta(days=1)
-        except Exception:
-            now_local = datetime.now()
-            t = datetime(now_local.year, now_local.month, now_local.day, hh, mm)
-            return t if t > now_local else t + timedelta(days=1)
-
     try:
-        start_at = _p(start_time)
-        tp_at = _p(tp_time)
-    except Exception:
-        return await interaction.response.send_message("Podaj godziny w formacie **HH:MM** (np. 19:00).", ephemeral=True)
+        start_at = parse_event_time(start_time)
+        tp_at = parse_event_time(tp_time)
+    except ValueError:
+        return await interaction.response.send_message(f"Podaj godziny w formacie {TIME_INPUT_HINT} (np. 19:00).", ephemeral=True)
 
     author = interaction.user if isinstance(interaction.user, discord.Member) else interaction.guild.get_member(interaction.user.id)
-    view = MclView(opis, voice, start_at, tp_at, interaction.guild, author, event_name="MCL", max_pick=20)
+    view = MclView(opis, voice, start_at, tp_at, interaction.guild, author, event_name="MCL", max_pick=20,
+                   event_id=interaction.id)
     embed = mcl_make_embed(opis, voice, start_at, tp_at, interaction.guild, 0)
     embed.set_footer(text=f"Wystawione przez {author.display_name}")
     allowed = discord.AllowedMentions(everyone=True)
@@ -1951,21 +3743,20 @@ async def create_mcl(interaction: discord.Interaction, opis: str, voice: discord
         pass
     msg = await interaction.channel.send(content="@everyone", embed=embed, view=view, allowed_mentions=allowed)
     view.message = msg
+    view.persist()
+    ACTIVE_MCLS.add(view)
+    view.schedule_start()
 
 
 
-class AirdropPanelView(discord.ui.View):
+class AirdropPanelView(MeteredView):
     def __init__(self, adr: AirdropView, invoker: discord.Member):
         super().__init__(timeout=300)
         self.adr = adr
         self.invoker = invoker
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        mem: discord.Member = interaction.user
-        if mem.guild_permissions.administrator or mem == self.adr.author:
-            return True
-        REQUIRED = globals().get("REQUIRED_ROLE_ID", 0)
-        if REQUIRED and any(r.id == REQUIRED for r in mem.roles):
+        if PERMS.can_manage(interaction.user, self.adr):
             return True
         await interaction.response.send_message("Brak uprawnień do panelu AirDrop.", ephemeral=True)
         return False
@@ -1976,16 +3767,9 @@ class AirdropPanelView(discord.ui.View):
     @discord.ui.button(label="Wyczyść wytypowanych", style=discord.ButtonStyle.danger)
     async def clear_picked(self, it: discord.Interaction, _: discord.ui.Button):
         # Przenieś wszystkich WYTYPOWANYCH do zapisanych
-        moved = 0
-        for uid in list(getattr(self.adr, "picked_list", [])):
-            if uid not in self.adr.users:
-                self.adr.users.append(uid)
-                moved += 1
-        # Wyczyść listę wytypowanych
-        self.adr.picked_list.clear()
-        await self.adr.refresh_embed()
-        await self.adr.refresh_picked_embed(it.channel, it.user)
-        await it.response.send_message(f"🧹 Wyczyszczono WYTYPOWANYCH (przeniesiono {moved} do zapisanych).", ephemeral=True)
+        _, given = await self.adr.move(list(self.adr.picked_list), "picked_list", "users",
+                                       channel=it.channel, picker=it.user)
+        await it.response.send_message(f"🧹 Wyczyszczono WYTYPOWANYCH (przeniesiono {len(given)} do zapisanych).", ephemeral=True)
     @discord.ui.button(label="Pokaż zapisanych", style=discord.ButtonStyle.secondary)
     async def show_picked(self, it: discord.Interaction, _: discord.ui.Button):
         users = list(getattr(self.adr, "users", []))
@@ -1993,10 +3777,9 @@ class AirdropPanelView(discord.ui.View):
             return await it.response.send_message("📭 Lista zapisanych jest pusta.", ephemeral=True)
         mentions = []
         for i, uid in enumerate(users, start=1):
-            m = self.adr.guild.get_member(uid)
+            m = MEMBERS.get(self.adr.guild, uid)
             mentions.append(f"{i}. " + (m.mention if m else f"<@{uid}>"))
-        emb = discord.Embed(title=f"Lista zapisanych ({len(users)})", description="\n".join(mentions), color=0xFFFFFF)
-        await it.response.send_message(embed=emb, ephemeral=True)
+        await ListPagerView(f"Lista zapisanych ({len(users)})", mentions).send(it)
     @discord.ui.button(label="Dodaj z zapisanych", style=discord.ButtonStyle.primary)
     async def add_person(self, it: discord.Interaction, _: discord.ui.Button):
         await it.response.send_message(
@@ -2011,7 +3794,7 @@ class AirdropPanelView(discord.ui.View):
             view=RemovePickedView(self.adr), ephemeral=True
         )
 
-class AddFromRegisteredView(discord.ui.View):
+class AddFromRegisteredView(MeteredView):
     """Dodawanie z listy ZAPISANYCH do WYTYPOWANYCH — działa od razu po wyborze."""
     def __init__(self, adr: "AirdropView"):
         super().__init__(timeout=180)
@@ -2020,7 +3803,7 @@ class AddFromRegisteredView(discord.ui.View):
         for uid in list(getattr(self.adr, "users", [])):
             if uid in getattr(self.adr, "picked_list", []):
                 continue
-            m = self.adr.guild.get_member(uid)
+            m = MEMBERS.get(self.adr.guild, uid)
             label = (m.display_name if m else f"User {uid}")[:100]
             options.append(discord.SelectOption(label=label, value=str(uid), description=f"ID: {uid}"))
             if len(options) >= 25:
@@ -2033,23 +3816,10 @@ class AddFromRegisteredView(discord.ui.View):
             async def _on_select(inter: discord.Interaction):
                 await inter.response.defer(ephemeral=True, thinking=False)
                 chosen_ids = [int(v) for v in sel.values]
-                added = []
-                for uid in chosen_ids:
-                    if uid not in self.adr.picked_list:
-                        self.adr.picked_list.append(uid)
-                        added.append(uid)
-                    # Usuń z zapisanych, jeśli był
-                    if uid in getattr(self.adr, "users", []):
-                        try:
-                            self.adr.users.remove(uid)
-                        except ValueError:
-                            pass
-                # Odśwież: najpierw główny embed (licznik zapisanych), potem lista wytypowanych
-                await self.adr.refresh_embed()
-                await self.adr.refresh_picked_embed(inter.channel, inter.user)
+                _, added = await self.adr.move(chosen_ids, "users", "picked_list", channel=inter.channel, picker=inter.user)
                 names = []
                 for uid in added:
-                    m = self.adr.guild.get_member(uid)
+                    m = MEMBERS.get(self.adr.guild, uid)
                     names.append(m.mention if m else f"<@{uid}>")
                 await inter.followup.send("✅ Dodano do WYTYPOWANYCH: " + (", ".join(names) if names else "-"), ephemeral=True)
             sel.callback = _on_select
@@ -2057,7 +3827,7 @@ class AddFromRegisteredView(discord.ui.View):
         else:
             self.add_item(discord.ui.Button(label="Brak osób na liście zapisanych", style=discord.ButtonStyle.secondary, disabled=True))
 
-class AddPickedView(discord.ui.View):
+class AddPickedView(MeteredView):
     def __init__(self, adr: "AirdropView"):
         super().__init__(timeout=180)
         self.adr = adr
@@ -2070,20 +3840,17 @@ class AddPickedView(discord.ui.View):
         if not self.user_select.values:
             return
         user = self.user_select.values[0]
-        if user.id not in self.adr.picked_list:
-            self.adr.picked_list.append(user.id)
-        await self.adr.refresh_embed()
-        await self.adr.refresh_picked_embed(it.channel, it.user)
+        await self.adr.move([user.id], None, "picked_list", channel=it.channel, picker=it.user)
         await it.followup.send(f"✅ Dodano do WYTYPOWANYCH: {user.mention}", ephemeral=True)
 
-class RemovePickedView(discord.ui.View):
+class RemovePickedView(MeteredView):
     """Usuwanie z listy WYTYPOWANYCH — działa od razu po wyborze."""
     def __init__(self, adr: "AirdropView"):
         super().__init__(timeout=180)
         self.adr = adr
         options = []
         for uid in list(getattr(self.adr, "picked_list", [])):
-            m = self.adr.guild.get_member(uid)
+            m = MEMBERS.get(self.adr.guild, uid)
             label = (m.display_name if m else f"User {uid}")[:100]
             options.append(discord.SelectOption(label=label, value=str(uid), description=f"ID: {uid}"))
             if len(options) >= 25:
@@ -2092,19 +3859,11 @@ class RemovePickedView(discord.ui.View):
             sel = discord.ui.Select(placeholder="Wybierz osoby do usunięcia (max 25)", min_values=1, max_values=min(25, len(options)), options=options)
             async def _on_select(inter: discord.Interaction):
                 await inter.response.defer(ephemeral=True, thinking=False)
-                removed = []
-                for v in sel.values:
-                    uid = int(v)
-                    if uid in self.adr.picked_list:
-                        self.adr.picked_list.remove(uid)
-                        removed.append(uid)
-                    if uid not in self.adr.users:
-                        self.adr.users.append(uid)
-                await self.adr.refresh_embed()
-                await self.adr.refresh_picked_embed(inter.channel, inter.user)
+                removed, _ = await self.adr.move([int(v) for v in sel.values], "picked_list", "users",
+                                                 channel=inter.channel, picker=inter.user)
                 names = []
                 for uid in removed:
-                    m = self.adr.guild.get_member(uid)
+                    m = MEMBERS.get(self.adr.guild, uid)
                     names.append(m.mention if m else f"<@{uid}>")
                 await inter.followup.send("🗑️ Usunięto z WYTYPOWANYCH: " + (", ".join(names) if names else "-"), ephemeral=True)
             sel.callback = _on_select
@@ -2124,37 +3883,15 @@ class RemovePickedView(discord.ui.View):
     tp_time="Godzina teleportacji 24h, np. 20:00."
 )
 async def create_zonewars(interaction: discord.Interaction, opis: str, voice: discord.VoiceChannel, start_time: str, tp_time: str):
-    # Parse times -> nearest future
-    def _p(hhmm: str) -> datetime:
-        """Parse times like '19:00', '19.00', '19 00', or '1900' -> nearest future."""
-        raw = hhmm.strip()
-        parts = re.findall(r"\d+", raw)
-        if len(parts) >= 2:
-            hh, mm = int(parts[0]), int(parts[1])
-        elif len(parts) == 1 and len(parts[0]) in (3, 4):
-            hh = int(parts[0][:-2])
-            mm = int(parts[0][-2:])
-        else:
-            raise ValueError("bad time")
-        if not (0 <= hh <= 23 and 0 <= mm <= 59):
-            raise ValueError("range")
-        try:
-            now_pl = datetime.now(tz=WARSAW)
-            t = datetime(now_pl.year, now_pl.month, now_pl.day, hh, mm, tzinfo=WARSAW)
-            return t if t > now_pl else t + timedelta(days=1)
-        except Exception:
-            now_local = datetime.now()
-            t = datetime(now_local.year, now_local.month, now_local.day, hh, mm)
-            return t if t > now_local else t + timedelta(days=1)
-
     try:
-        start_at = _p(start_time)
-        tp_at = _p(tp_time)
-    except Exception:
-        return await interaction.response.send_message("Podaj godziny w formacie **HH:MM** (np. 19:00).", ephemeral=True)
+        start_at = parse_event_time(start_time)
+        tp_at = parse_event_time(tp_time)
+    except ValueError:
+        return await interaction.response.send_message(f"Podaj godziny w formacie {TIME_INPUT_HINT} (np. 19:00).", ephemeral=True)
 
     author = interaction.user if isinstance(interaction.user, discord.Member) else interaction.guild.get_member(interaction.user.id)
-    view = MclView(opis, voice, start_at, tp_at, interaction.guild, author, event_name="ZoneWars", max_pick=25)
+    view = MclView(opis, voice, start_at, tp_at, interaction.guild, author, event_name="ZoneWars", max_pick=25,
+                   event_id=interaction.id)
     embed = mcl_make_embed(opis, voice, start_at, tp_at, interaction.guild, 0)
     embed.set_footer(text=f"Wystawione przez {author.display_name}")
     allowed = discord.AllowedMentions(everyone=True)
@@ -2164,6 +3901,31 @@ async def create_zonewars(interaction: discord.Interaction, opis: str, voice: di
         pass
     msg = await interaction.channel.send(content="@everyone", embed=embed, view=view, allowed_mentions=allowed)
     view.message = msg
+    view.persist()
+    ACTIVE_MCLS.add(view)
+    view.schedule_start()
+
+
+@bot.tree.command(name="panel-mcl", description="Otwórz panel MCL/ZoneWars (zarządza WYTYPOWANYMI).")
+@role_required_check()
+@app_commands.describe(wiadomosc="ID lub link ogłoszenia (domyślnie ostatnie MCL/ZoneWars w tym kanale).")
+async def panel_mcl(interaction: discord.Interaction, wiadomosc: str | None = None):
+    if wiadomosc:
+        ids = re.findall(r"\d{15,21}", wiadomosc)
+        mcl = ACTIVE_MCLS.get(int(ids[-1])) if ids else None
+    else:
+        mcl = ACTIVE_MCLS.latest(interaction.guild.id, interaction.channel.id)
+    if not mcl or not mcl.message:
+        return await interaction.response.send_message("Brak aktywnego MCL/ZoneWars w tym kanale.", ephemeral=True)
+    mem: discord.Member = interaction.user
+    if not PERMS.can_manage(mem, mcl):
+        return await interaction.response.send_message("Panel dostępny dla wystawiającego, administratora lub roli uprawnionej.", ephemeral=True)
+    # Bez opublikowanej listy panel tworzy ją przy pierwszym dodaniu osób.
+    sel_view = mcl.selected_view or MclSelectedView(mcl, mem)
+    await interaction.response.send_message(
+        f"Panel {mcl.event_name} – zapisanych: **{len(mcl.signups)}**, WYTYPOWANI: **{len(mcl.selected_ids)}**.",
+        view=MclManagePanel(sel_view), ephemeral=True
+    )
 
 
 @bot.tree.command(name="create-capt", description="Utwórz CAPT z odliczaniem, zdjęciem i pingiem @everyone.")
@@ -2172,20 +3934,11 @@ async def create_zonewars(interaction: discord.Interaction, opis: str, voice: di
                        image_url="Link do dużego zdjęcia (pokaże się w embeddzie).")
 async def create_capt(interaction: discord.Interaction, start_time: str, image_url: str):
     try:
-        hh, mm = (int(x) for x in start_time.strip().split(":"))
-        assert 0 <= hh <= 23 and 0 <= mm <= 59
-    except Exception:
-        return await interaction.response.send_message("Podaj godzinę **HH:MM** (np. 15:40).", ephemeral=True)
-    try:
-        now_pl = datetime.now(tz=WARSAW)
-        today_start = datetime(now_pl.year, now_pl.month, now_pl.day, hh, mm, tzinfo=WARSAW)
-        starts_at = today_start if today_start > now_pl else today_start + timedelta(days=1)
-    except Exception:
-        now_local = datetime.now()
-        today_start = datetime(now_local.year, now_local.month, now_local.day, hh, mm)
-        starts_at = today_start if today_start > now_local else today_start + timedelta(days=1)
+        starts_at = parse_event_time(start_time)
+    except ValueError:
+        return await interaction.response.send_message(f"Podaj godzinę {TIME_INPUT_HINT} (np. 15:40).", ephemeral=True)
     author = interaction.user if isinstance(interaction.user, discord.Member) else interaction.guild.get_member(interaction.user.id)
-    view = CaptView(starts_at, interaction.guild, author, image_url)
+    view = CaptView(starts_at, interaction.guild, author, image_url, event_id=interaction.id)
     embed = make_main_embed(starts_at, [], interaction.guild, author, image_url)
     allowed = discord.AllowedMentions(everyone=True)
     try:
@@ -2194,34 +3947,18 @@ async def create_capt(interaction: discord.Interaction, start_time: str, image_u
         pass
     msg = await interaction.channel.send(content="@everyone", embed=embed, view=view, allowed_mentions=allowed)
     view.message = msg
-    ACTIVE_CAPTS.setdefault((interaction.guild.id, interaction.channel.id), []).append(view)
-
-    async def ticker():
-        try:
-            while True:
-                await asyncio.sleep(15)
-                try:
-                    if datetime.now(tz=WARSAW) >= starts_at:
-                        final = make_main_embed(starts_at, view.users, interaction.guild, author, image_url)
-                        final.description += "\n**CAPT rozpoczął się.**"
-                        await msg.edit(embed=final, view=view)
-                        break
-                except Exception:
-                    break
-        except asyncio.CancelledError:
-            pass
-    interaction.client.loop.create_task(ticker())
+    view.persist()
+    ACTIVE_CAPTS.add(view)
+    view.schedule_start()
 
 @bot.tree.command(name="panel-capt", description="Otwórz panel CAPT w tym kanale.")
 @role_required_check()
 async def panel_capt(interaction: discord.Interaction):
-    key = (interaction.guild.id, interaction.channel.id)
-    capt_entry = ACTIVE_CAPTS.get(key)
-    capt = (capt_entry[-1] if isinstance(capt_entry, list) and capt_entry else capt_entry)
+    capt = ACTIVE_CAPTS.latest(interaction.guild.id, interaction.channel.id)
     if not capt or not capt.message:
         return await interaction.response.send_message("Brak aktywnego ogłoszenia w tym kanale.", ephemeral=True)
     mem: discord.Member = interaction.user
-    if not (mem.guild_permissions.administrator or mem == capt.author or (REQUIRED_ROLE_ID and any(r.id == REQUIRED_ROLE_ID for r in mem.roles))):
+    if not PERMS.can_manage(mem, capt):
         return await interaction.response.send_message("Panel dostępny dla wystawiającego, administratora lub roli uprawnionej.", ephemeral=True)
     view = PanelView(capt, mem)
     await interaction.response.send_message(
@@ -2237,20 +3974,11 @@ async def panel_capt(interaction: discord.Interaction):
     start_time="Godzina startu 24h, np. 20:00 (czas Polski).",)
 async def airdrop(interaction: discord.Interaction, info_text: str, voice: discord.VoiceChannel, start_time: str):
     try:
-        hh, mm = (int(x) for x in start_time.strip().split(":"))
-        assert 0 <= hh <= 23 and 0 <= mm <= 59
-    except Exception:
-        return await interaction.response.send_message("Podaj godzinę **HH:MM** (np. 20:00).", ephemeral=True)
-    try:
-        now_pl = datetime.now(tz=WARSAW)
-        today_start = datetime(now_pl.year, now_pl.month, now_pl.day, hh, mm, tzinfo=WARSAW)
-        starts_at = today_start if today_start > now_pl else today_start + timedelta(days=1)
-    except Exception:
-        now_local = datetime.now()
-        today_start = datetime(now_local.year, now_local.month, now_local.day, hh, mm)
-        starts_at = today_start if today_start > now_local else today_start + timedelta(days=1)
+        starts_at = parse_event_time(start_time)
+    except ValueError:
+        return await interaction.response.send_message(f"Podaj godzinę {TIME_INPUT_HINT} (np. 20:00).", ephemeral=True)
     author = interaction.user if isinstance(interaction.user, discord.Member) else interaction.guild.get_member(interaction.user.id)
-    view = AirdropView(starts_at, interaction.guild, author, info_text, voice, 0)
+    view = AirdropView(starts_at, interaction.guild, author, info_text, voice, 0, event_id=interaction.id)
     embed = make_airdrop_embed(starts_at, [], interaction.guild, author, info_text, voice, 0, queue_len=0)
     allowed = discord.AllowedMentions(everyone=True)
     try:
@@ -2259,33 +3987,18 @@ async def airdrop(interaction: discord.Interaction, info_text: str, voice: disco
         pass
     msg = await interaction.channel.send(content="@everyone", embed=embed, view=view, allowed_mentions=allowed)
     view.message = msg
-    ACTIVE_AIRDROPS[(interaction.guild.id, interaction.channel.id)] = view
-
-    async def ticker():
-        try:
-            while True:
-                await asyncio.sleep(15)
-                try:
-                    if datetime.now(tz=WARSAW) >= starts_at:
-                        final = make_airdrop_embed(starts_at, view.users, interaction.guild, author, info_text, voice, 0, queue_len=0)
-                        final.description += "\n**AirDrop rozpoczął się.**"
-                        await msg.edit(embed=final, view=view)
-                        break
-                except Exception:
-                    break
-        except asyncio.CancelledError:
-            pass
-    interaction.client.loop.create_task(ticker())
+    view.persist()
+    ACTIVE_AIRDROPS.add(view)
+    view.schedule_start()
 
 @bot.tree.command(name="panel-airdrop", description="Otwórz panel AIRDROP w tym kanale (zarządza WYTYPOWANYMI).")
 @role_required_check()
 async def panel_airdrop(interaction: discord.Interaction):
-    key = (interaction.guild.id, interaction.channel.id)
-    adr = ACTIVE_AIRDROPS.get(key)
+    adr = ACTIVE_AIRDROPS.latest(interaction.guild.id, interaction.channel.id)
     if not adr or not adr.message:
         return await interaction.response.send_message("Brak aktywnego airdropa w tym kanale.", ephemeral=True)
     mem: discord.Member = interaction.user
-    if not (mem.guild_permissions.administrator or (REQUIRED_ROLE_ID and any(r.id == REQUIRED_ROLE_ID for r in mem.roles))):
+    if not PERMS.allowed(mem):
         return await interaction.response.send_message("Panel dostępny tylko dla administracji lub posiadaczy wymaganej roli.", ephemeral=True)
 
     await interaction.response.send_message(
@@ -2311,6 +4024,7 @@ async def purge_commands(interaction: discord.Interaction):
         # 2) Clear GLOBAL commands (removes stale global entries)
         bot.tree.clear_commands(guild=None)
         await bot.tree.sync()
+        _forget_tree_hashes()
 
         await interaction.response.send_message("✅ Wyczyszczono stare komendy i wgrano aktualne na tę gildię.", ephemeral=True)
     except Exception as e:
@@ -2319,251 +4033,376 @@ async def purge_commands(interaction: discord.Interaction):
         except Exception:
             pass
 
-# ===== Lifecycle =====
-@bot.event
-async def on_ready():
-    log.info(f"Zalogowano jako {bot.user} (id={bot.user.id})")
-    # Start health server
+# ===== Restore persisted events =====
+_events_restored = False
+
+async def _resolve_member(guild: discord.Guild, uid: int | None) -> discord.Member | None:
+    if not uid:
+        return None
+    m = guild.get_member(uid)
+    if m is None:
+        try:
+            m = await guild.fetch_member(uid)
+        except Exception:
+            m = None
+    return m
+
+def _partial_message(channel, message_id: int | None):
+    if not message_id or channel is None or not hasattr(channel, "get_partial_message"):
+        return None
+    return channel.get_partial_message(message_id)
+
+PING_RESTORE_HOURS = 24
+# Co ile zapisów PingView zastępuje dziennik listy "users" jednym snapshotem (surowe bajty).
+PING_SNAPSHOT_EVERY = int(os.getenv("PING_SNAPSHOT_EVERY", "100"))
+
+async def restore_events():
+    """Rebuild CAPT/AirDrop/MCL/ping views from STORE and re-register them on their messages
+    with bot.add_view(), so buttons on old announcements keep working."""
     try:
-        asyncio.create_task(_setup_http())
-    except Exception:
+        events = await asyncio.to_thread(STORE.load)
+    except Exception as e:
+        log.warning(f"EventStore: odczyt nie powiódł się: {e}")
+        return
+    now = datetime.now(tz=WARSAW)
+    restored = 0
+    for ev in events:
+        try:
+            guild = bot.get_guild(ev["guild_id"])
+            channel = guild.get_channel_or_thread(ev["channel_id"]) if guild else None
+            message = _partial_message(channel, ev["message_id"])
+            if message is None:
+                STORE.close_event(ev["event_id"])
+                continue
+            meta = ev["meta"]
+            author = await _resolve_member(guild, meta.get("author_id")) or guild.me
+            kind = ev["kind"]
+            if kind == "capt":
+                starts_at = datetime.fromisoformat(meta["starts_at"])
+                if starts_at + timedelta(hours=EVENT_GRACE_HOURS) < now:
+                    STORE.close_event(ev["event_id"])
+                    continue
+                view = CaptView(starts_at, guild, author, meta.get("image_url") or "", event_id=ev["event_id"])
+                replay_ops({"users": view.users, "picked_list": view.picked_list}, {}, ev["ops"])
+                await MEMBERS.resolve_missing(guild, [*view.users, *view.picked_list])
+                view.message = message
+                view.pick_message = _partial_message(channel, meta.get("pick_message_id"))
+                bot.add_view(view, message_id=message.id)
+                ACTIVE_CAPTS.add(view)
+                await view.refresh_announce()
+                view.schedule_start()
+            elif kind == "airdrop":
+                starts_at = datetime.fromisoformat(meta["starts_at"])
+                if starts_at + timedelta(hours=EVENT_GRACE_HOURS) < now:
+                    STORE.close_event(ev["event_id"])
+                    continue
+                voice = guild.get_channel(meta.get("voice_id") or 0)
+                view = AirdropView(starts_at, guild, author, meta.get("info_text") or "", voice, 0, event_id=ev["event_id"])
+                replay_ops({"users": view.users, "queue": view.queue, "picked_list": view.picked_list}, {}, ev["ops"])
+                await MEMBERS.resolve_missing(guild, [*view.users, *view.picked_list])
+                view.message = message
+                view.picked_message = _partial_message(channel, meta.get("picked_message_id"))
+                bot.add_view(view, message_id=message.id)
+                ACTIVE_AIRDROPS.add(view)
+                await view.refresh_embed()
+                view.schedule_start()
+            elif kind == "mcl":
+                start_at = datetime.fromisoformat(meta["start_at"])
+                tp_at = datetime.fromisoformat(meta["tp_at"])
+                voice = guild.get_channel(meta.get("voice_id") or 0)
+                if tp_at + timedelta(hours=EVENT_GRACE_HOURS) < now or voice is None:
+                    STORE.close_event(ev["event_id"])
+                    continue
+                view = MclView(meta.get("title_text") or "", voice, start_at, tp_at, guild, author,
+                               event_name=meta.get("event_name") or "MCL", max_pick=meta.get("max_pick") or 20,
+                               event_id=ev["event_id"])
+                replay_ops({"signups": view.signups, "selected_ids": view.selected_ids},
+                           {"text": view.input_map, "label": view.extra_labels}, ev["ops"])
+                await MEMBERS.resolve_missing(guild, [*view.signups, *view.selected_ids])
+                view.message = message
+                bot.add_view(view, message_id=message.id)
+                ACTIVE_MCLS.add(view)
+                sel_message = _partial_message(channel, meta.get("selected_message_id"))
+                if sel_message is not None:
+                    picker = await _resolve_member(guild, meta.get("picker_id")) or author
+                    sel_view = MclSelectedView(view, picker)
+                    sel_view.message = sel_message
+                    view.selected_view = sel_view
+                    bot.add_view(sel_view, message_id=sel_message.id)
+                    await sel_view.refresh_selected_embed(channel, picker)
+                view.schedule_start()
+                await view.refresh_main()
+            elif kind == "ping":
+                created_at = datetime.fromisoformat(meta["created_at"])
+                voice = guild.get_channel(meta.get("voice_id") or 0)
+                if created_at + timedelta(hours=PING_RESTORE_HOURS) < now or voice is None:
+                    STORE.close_event(ev["event_id"])
+                    continue
+                ptype = PING_TYPES.get(meta.get("type")) or PingType(
+                    "", meta.get("title") or "", meta.get("image_url") or "", "")
+                start = meta.get("start") or ""
+                starts_at = (datetime.fromisoformat(meta["starts_at"]) if meta.get("starts_at")
+                             else parse_event_time(start))
+                view = PingView(ptype, voice, start, starts_at, event_id=ev["event_id"])
+                view.created_at = created_at
+                replay_ops({"users": view.users}, {}, ev["ops"])
+                view.message = message
+                bot.add_view(view, message_id=message.id)
+            else:
+                continue
+            restored += 1
+        except Exception as e:
+            log.warning(f"EventStore: nie udało się odtworzyć eventu {ev.get('event_id')}: {e}")
+    if events:
+        log.info(f"EventStore: odtworzono {restored}/{len(events)} eventów")
+
+# ===== Command tree sync (hash-gated, background) =====
+# Plik z hashami ostatnio wgranego drzewa komend (per zakres: gildia / global).
+COMMAND_HASH_PATH = os.getenv("COMMAND_HASH_PATH", ".command_tree.json")
+COMMAND_SYNC_FORCE = os.getenv("COMMAND_SYNC_FORCE", "0") == "1"
+COMMAND_SYNC_RETRIES = int(os.getenv("COMMAND_SYNC_RETRIES", "5"))        # próby w jednym READY
+COMMAND_SYNC_BACKOFF = float(os.getenv("COMMAND_SYNC_BACKOFF", "5"))      # s, podwajane do 300 s
+_command_sync_task: asyncio.Task | None = None
+
+METRICS.describe("command_sync_total", "counter", "Synchronizacje drzewa komend wg wyniku (synced/skipped/failed).")
+
+def _tree_hash(guild: discord.abc.Snowflake | None) -> str:
+    """sha256 of the payload tree.sync(guild=...) would upload (same to_dict() serialization)."""
+    payload = [c.to_dict(bot.tree) for c in bot.tree.get_commands(guild=guild)]
+    blob = json.dumps([bot.application_id, payload], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+def _load_tree_hashes() -> dict[str, str]:
+    try:
+        with open(COMMAND_HASH_PATH, encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def _store_tree_hashes(hashes: dict[str, str]):
+    tmp = COMMAND_HASH_PATH + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(hashes, f, indent=1, sort_keys=True)
+        os.replace(tmp, COMMAND_HASH_PATH)
+    except OSError as e:
+        log.warning(f"/ Nie udało się zapisać hasha komend ({COMMAND_HASH_PATH}): {e}")
+
+def _forget_tree_hashes():
+    """Force the next sync (after /purge-commands changed what Discord has)."""
+    try:
+        os.remove(COMMAND_HASH_PATH)
+    except OSError:
         pass
 
-    # Guild-preferred sync
-    try:
-        if GUILD_ID:
-            guild = discord.Object(id=int(GUILD_ID))
-            bot.tree.copy_global_to(guild=guild)
+async def sync_commands(force: bool = False) -> bool:
+    """Sync the tree only when its serialized form changed since the last successful sync.
+
+    A failed upload (429/5xx during a reconnect storm) is retried with exponential backoff,
+    COMMAND_SYNC_RETRIES times; returns False if every attempt failed.
+    """
+    if GUILD_ID:
+        guild = discord.Object(id=int(GUILD_ID))
+        bot.tree.copy_global_to(guild=guild)
+        scope = f"guild:{GUILD_ID}"
+    else:
+        guild = None
+        scope = "global"
+    hashes = await asyncio.to_thread(_load_tree_hashes)
+    digest = _tree_hash(guild)
+    if not force and hashes.get(scope) == digest:
+        METRICS.inc("command_sync_total", result="skipped")
+        log.info(f"/ Drzewo komend bez zmian ({scope}) – pomijam sync")
+        HEALTH.commands = True
+        return True
+    delay = COMMAND_SYNC_BACKOFF
+    for attempt in range(1, max(1, COMMAND_SYNC_RETRIES) + 1):
+        try:
             synced = await bot.tree.sync(guild=guild)
-            log.info(f"/ Synced {len(synced)} komend do gildii {GUILD_ID}")
-        else:
-            synced = await bot.tree.sync()
-            log.info(f"/ Synced {len(synced)} komend globalnie")
+            break
+        except Exception as e:
+            METRICS.inc("command_sync_total", result="failed")
+            if attempt >= COMMAND_SYNC_RETRIES:
+                log.exception(f"Sync komend nie powiódł się (po {attempt} próbach): {e}")
+                return False
+            wait = max(delay, float(getattr(e, "retry_after", 0) or 0))
+            log.warning(f"Sync komend nie powiódł się (próba {attempt}): {e} – ponawiam za {wait:.0f}s")
+            await asyncio.sleep(wait)
+            delay = min(delay * 2, 300.0)
+    METRICS.inc("command_sync_total", result="synced")
+    log.info(f"/ Synced {len(synced)} komend ({scope})")
+    HEALTH.commands = True
+    hashes[scope] = digest
+    await asyncio.to_thread(_store_tree_hashes, hashes)
+    return True
+
+async def _sync_commands_once():
+    """on_ready's background sync; after a final failure the next READY tries again."""
+    global _command_sync_task
+    try:
+        ok = await sync_commands(force=COMMAND_SYNC_FORCE)
     except Exception as e:
-        log.exception(f"Sync komend nie powiódł się: {e}")
+        log.exception(f"Sync komend przerwany: {e}")
+        ok = False
+    if not ok:
+        _command_sync_task = None
 
+# ===== Lifecycle =====
+@bot.event
+async def on_ready():
+    global _events_restored
+    log.info(f"Zalogowano jako {bot.user} (id={bot.user.id})")
+    if not _events_restored:
+        _events_restored = True
+        asyncio.create_task(restore_events())
+    LOOP_LAG.start()
+    HEALTH.gateway = True
+
+    # Guild-preferred sync: in the background, skipped when unchanged. READY also fires after
+    # gateway reconnects; those only touch the commands endpoint if the last sync failed.
+    global _command_sync_task
+    if _command_sync_task is None:
+        _command_sync_task = asyncio.create_task(_sync_commands_once())
 
+@bot.event
+async def on_resumed():
+    HEALTH.gateway = True
 
-@bot.tree.command(name="ping-cayo", description="Ping o Cayo (z licznikiem i przyciskiem Będę)")
-@app_commands.describe(voice_channel="Kanał głosowy", start="Godzina startu HH:MM")
-async def ping_cayo(interaction: discord.Interaction, voice_channel: discord.VoiceChannel, start: str):
-    LOGO = os.getenv("LOGO_URL", "")
-    IMAGE = os.getenv("CAYO_IMAGE_URL", "")
-    class PV(discord.ui.View):
-        def __init__(self):
-            super().__init__(timeout=None)
-            self.users: list[int] = []
-        @discord.ui.button(label="Będę", style=discord.ButtonStyle.success)
-        async def bede(self, it: discord.Interaction, btn: discord.ui.Button):
-            if it.user.id not in self.users:
-                self.users.append(it.user.id)
-            start_dt = _parse_hhmm_to_dt(start)
-            emb = discord.Embed(title="Atak na CAYO PERICO!", color=0xFFFFFF)
-            emb.add_field(name="Zapraszamy na", value=f"{voice_channel.mention}", inline=False)
-            emb.add_field(name="Start", value=f"**{start}** · {_rel_pl(start_dt)}", inline=False)
-            if LOGO: emb.set_thumbnail(url=LOGO)
-            if IMAGE: emb.set_image(url=IMAGE)
-            emb.set_footer(text=f"Zapisani: {len(self.users)}")
-            await it.message.edit(embed=emb, view=self)
-            await it.response.send_message("✅ Zapisano!", ephemeral=True)
-    
-        @discord.ui.button(label="ListaBędę", style=discord.ButtonStyle.secondary)
-        async def lista_bede(self, it: discord.Interaction, btn: discord.ui.Button):
-            if not self.users:
-                await it.response.send_message("📭 Nikt się jeszcze nie zapisał.", ephemeral=True)
-                return
-            mentions = [f"<@{uid}>" for uid in self.users[:100]]
-            left = len(self.users) - len(mentions)
-            lines = "\n".join(f"{i+1}. {m}" for i, m in enumerate(mentions))
-            if left > 0:
-                lines += f"\n… i jeszcze {left} więcej"
-            emb = discord.Embed(title=f"Lista zapisanych ({len(self.users)})", description=lines, color=0xFFFFFF)
-            await it.response.send_message(embed=emb, ephemeral=True)
-
-    view = PV()
-    start_dt = _parse_hhmm_to_dt(start)
-    embed = discord.Embed(title="Atak na CAYO PERICO!", color=0xFFFFFF)
-    embed.add_field(name="Zapraszamy na", value=f"{voice_channel.mention}", inline=False)
-    embed.add_field(name="Start", value=f"**{start}** · {_rel_pl(start_dt)}", inline=False)
-    LOGO = os.getenv("LOGO_URL", ""); IMAGE = os.getenv("CAYO_IMAGE_URL", "")
-    if LOGO: embed.set_thumbnail(url=LOGO)
-    if IMAGE: embed.set_image(url=IMAGE)
-    embed.set_footer(text="Zapisani: 0")
-    try:
-        await interaction.response.send_message("✅ Wysłano ping.", ephemeral=True)
-    except Exception:
-        pass
-    await interaction.channel.send(content="@everyone", embed=embed, view=view)
+@bot.event
+async def on_disconnect():
+    HEALTH.gateway = False
 
 
-@bot.tree.command(name="ping-zancudo", description="Ping o Zancudo (z licznikiem i przyciskiem Będę)")
-@app_commands.describe(voice_channel="Kanał głosowy", start="Godzina startu HH:MM")
-async def ping_zancudo(interaction: discord.Interaction, voice_channel: discord.VoiceChannel, start: str):
-    LOGO = os.getenv("LOGO_URL", "")
-    IMAGE = os.getenv("ZANCUDO_IMAGE_URL", "")
-    class PV(discord.ui.View):
-        def __init__(self):
-            super().__init__(timeout=None)
-            self.users: list[int] = []
-        @discord.ui.button(label="Będę", style=discord.ButtonStyle.success)
-        async def bede(self, it: discord.Interaction, btn: discord.ui.Button):
-            if it.user.id not in self.users:
-                self.users.append(it.user.id)
-            start_dt = _parse_hhmm_to_dt(start)
-            emb = discord.Embed(title="Atak na FORT ZANCUDO!", color=0xFFFFFF)
-            emb.add_field(name="Zapraszamy na", value=f"{voice_channel.mention}", inline=False)
-            emb.add_field(name="Start", value=f"**{start}** · {_rel_pl(start_dt)}", inline=False)
-            if LOGO: emb.set_thumbnail(url=LOGO)
-            if IMAGE: emb.set_image(url=IMAGE)
-            emb.set_footer(text=f"Zapisani: {len(self.users)}")
-            await it.message.edit(embed=emb, view=self)
-            await it.response.send_message("✅ Zapisano!", ephemeral=True)
-    
-        @discord.ui.button(label="ListaBędę", style=discord.ButtonStyle.secondary)
-        async def lista_bede(self, it: discord.Interaction, btn: discord.ui.Button):
-            if not self.users:
-                await it.response.send_message("📭 Nikt się jeszcze nie zapisał.", ephemeral=True)
-                return
-            mentions = [f"<@{uid}>" for uid in self.users[:100]]
-            left = len(self.users) - len(mentions)
-            lines = "\n".join(f"{i+1}. {m}" for i, m in enumerate(mentions))
-            if left > 0:
-                lines += f"\n… i jeszcze {left} więcej"
-            emb = discord.Embed(title=f"Lista zapisanych ({len(self.users)})", description=lines, color=0xFFFFFF)
-            await it.response.send_message(embed=emb, ephemeral=True)
-
-    view = PV()
-    start_dt = _parse_hhmm_to_dt(start)
-    embed = discord.Embed(title="Atak na FORT ZANCUDO!", color=0xFFFFFF)
-    embed.add_field(name="Zapraszamy na", value=f"{voice_channel.mention}", inline=False)
-    embed.add_field(name="Start", value=f"**{start}** · {_rel_pl(start_dt)}", inline=False)
-    LOGO = os.getenv("LOGO_URL", ""); IMAGE = os.getenv("ZANCUDO_IMAGE_URL", "")
-    if LOGO: embed.set_thumbnail(url=LOGO)
-    if IMAGE: embed.set_image(url=IMAGE)
-    embed.set_footer(text="Zapisani: 0")
-    try:
-        await interaction.response.send_message("✅ Wysłano ping.", ephemeral=True)
-    except Exception:
-        pass
-    await interaction.channel.send(content="@everyone", embed=embed, view=view)
 
+class PingType:
+    """One row of PING_TYPES: everything that differs between the ping-* commands."""
+    __slots__ = ("key", "title", "image_url", "color", "description")
 
-@bot.tree.command(name="ping-magazyny", description="Ping o magazynach (z licznikiem i przyciskiem Będę)")
-@app_commands.describe(voice_channel="Kanał głosowy", start="Godzina startu HH:MM")
-async def ping_magazyny(interaction: discord.Interaction, voice_channel: discord.VoiceChannel, start: str):
-    LOGO = os.getenv("LOGO_URL", "")
-    class PV(discord.ui.View):
-        def __init__(self):
-            super().__init__(timeout=None)
-            self.users: list[int] = []
-        @discord.ui.button(label="Będę", style=discord.ButtonStyle.success)
-        async def bede(self, it: discord.Interaction, btn: discord.ui.Button):
-            if it.user.id not in self.users:
-                self.users.append(it.user.id)
-            start_dt = _parse_hhmm_to_dt(start)
-            emb = discord.Embed(title="Ping o MAGAZYNACH!", color=0xFFFFFF)
-            emb.add_field(name="Zapraszamy na", value=f"{voice_channel.mention}", inline=False)
-            emb.add_field(name="Start", value=f"**{start}** · {_rel_pl(start_dt)}", inline=False)
-            if LOGO: emb.set_thumbnail(url=LOGO)
-            emb.set_footer(text=f"Zapisani: {len(self.users)}")
-            await it.message.edit(embed=emb, view=self)
-            await it.response.send_message("✅ Zapisano!", ephemeral=True)
-    
-        @discord.ui.button(label="ListaBędę", style=discord.ButtonStyle.secondary)
-        async def lista_bede(self, it: discord.Interaction, btn: discord.ui.Button):
-            if not self.users:
-                await it.response.send_message("📭 Nikt się jeszcze nie zapisał.", ephemeral=True)
-                return
-            mentions = [f"<@{uid}>" for uid in self.users[:100]]
-            left = len(self.users) - len(mentions)
-            lines = "\n".join(f"{i+1}. {m}" for i, m in enumerate(mentions))
-            if left > 0:
-                lines += f"\n… i jeszcze {left} więcej"
-            emb = discord.Embed(title=f"Lista zapisanych ({len(self.users)})", description=lines, color=0xFFFFFF)
-            await it.response.send_message(embed=emb, ephemeral=True)
-
-    view = PV()
-    start_dt = _parse_hhmm_to_dt(start)
-    embed = discord.Embed(title="Ping o MAGAZYNACH!", color=0xFFFFFF)
-    embed.add_field(name="Zapraszamy na", value=f"{voice_channel.mention}", inline=False)
-    embed.add_field(name="Start", value=f"**{start}** · {_rel_pl(start_dt)}", inline=False)
-    LOGO = os.getenv("LOGO_URL", "")
-    if LOGO: embed.set_thumbnail(url=LOGO)
-    embed.set_footer(text="Zapisani: 0")
-    try:
-        await interaction.response.send_message("✅ Wysłano ping.", ephemeral=True)
-    except Exception:
-        pass
-    await interaction.channel.send(content="@everyone", embed=embed, view=view)
+    def __init__(self, key: str, title: str, image_url: str, description: str, color: int = 0xFFFFFF):
+        self.key = key
+        self.title = title
+        self.image_url = image_url
+        self.description = description
+        self.color = color
 
+PING_TYPES: dict[str, PingType] = {p.key: p for p in (
+    PingType("cayo", "Atak na CAYO PERICO!", CAYO_IMAGE_URL, "Ping o Cayo (z licznikiem i przyciskiem Będę)"),
+    PingType("zancudo", "Atak na FORT ZANCUDO!", ZANCUDO_IMAGE_URL, "Ping o Zancudo (z licznikiem i przyciskiem Będę)"),
+    PingType("magazyny", "Ping o MAGAZYNACH!", "", "Ping o magazynach (z licznikiem i przyciskiem Będę)"),
+    PingType("dilerzy", "Ping o DILERACH!", DILERZY_IMAGE_URL, "Ping o dilerach (z licznikiem i przyciskiem Będę)"),
+)}
 
-@bot.tree.command(name="ping-dilerzy", description="Ping o dilerach (z licznikiem i przyciskiem Będę)")
-@app_commands.describe(voice_channel="Kanał głosowy", start="Godzina startu HH:MM")
-async def ping_dilerzy(interaction: discord.Interaction, voice_channel: discord.VoiceChannel, start: str):
-    LOGO = os.getenv("LOGO_URL", "")
-    IMAGE = os.getenv("DILERZY_IMAGE_URL", "")
-    class PV(discord.ui.View):
-        def __init__(self):
-            super().__init__(timeout=None)
-            self.users: list[int] = []
-        @discord.ui.button(label="Będę", style=discord.ButtonStyle.success)
-        async def bede(self, it: discord.Interaction, btn: discord.ui.Button):
-            if it.user.id not in self.users:
-                self.users.append(it.user.id)
-            start_dt = _parse_hhmm_to_dt(start)
-            emb = discord.Embed(title="Ping o DILERACH!", color=0xFFFFFF)
-            if IMAGE: emb.set_image(url=IMAGE)
-            emb.add_field(name="Zapraszamy na", value=f"{voice_channel.mention}", inline=False)
-            emb.add_field(name="Start", value=f"**{start}** · {_rel_pl(start_dt)}", inline=False)
-            if LOGO: emb.set_thumbnail(url=LOGO)
-            emb.set_footer(text=f"Zapisani: {len(self.users)}")
-            await it.message.edit(embed=emb, view=self)
-            await it.response.send_message("✅ Zapisano!", ephemeral=True)
-    
-        @discord.ui.button(label="ListaBędę", style=discord.ButtonStyle.secondary)
-        async def lista_bede(self, it: discord.Interaction, btn: discord.ui.Button):
-            if not self.users:
-                await it.response.send_message("📭 Nikt się jeszcze nie zapisał.", ephemeral=True)
-                return
-            mentions = [f"<@{uid}>" for uid in self.users[:100]]
-            left = len(self.users) - len(mentions)
-            lines = "\n".join(f"{i+1}. {m}" for i, m in enumerate(mentions))
-            if left > 0:
-                lines += f"\n… i jeszcze {left} więcej"
-            emb = discord.Embed(title=f"Lista zapisanych ({len(self.users)})", description=lines, color=0xFFFFFF)
-            await it.response.send_message(embed=emb, ephemeral=True)
-
-    view = PV()
-    start_dt = _parse_hhmm_to_dt(start)
-    embed = discord.Embed(title="Ping o DILERACH!", color=0xFFFFFF)
-    if IMAGE: embed.set_image(url=IMAGE)
-    embed.add_field(name="Zapraszamy na", value=f"{voice_channel.mention}", inline=False)
-    embed.add_field(name="Start", value=f"**{start}** · {_rel_pl(start_dt)}", inline=False)
-    LOGO = os.getenv("LOGO_URL", "")
-    if LOGO: embed.set_thumbnail(url=LOGO)
-    embed.set_footer(text="Zapisani: 0")
+
+class PingView(MeteredView):
+    """Ogłoszenie ping-* z przyciskami Będę / ListaBędę (wspólne dla wszystkich pingów).
+
+    Start time and the static part of the embed are computed once per ping; clicks only
+    touch the roster and ask RENDER for a coalesced footer update.
+    """
+    def __init__(self, ptype: PingType, voice_channel: discord.VoiceChannel, start: str, starts_at: datetime,
+                 event_id: int | None = None):
+        super().__init__(timeout=None)
+        if event_id is not None:
+            persistent_ids(self, "ping", event_id, "bede", "lista_bede")
+        self.ptype = ptype
+        self.voice_channel = voice_channel
+        self.start = start
+        self.starts_at = starts_at
+        self.users = ArrayRoster()
+        self._unsnapped = 0  # journaled adds since the last snapshot
+        self.event_id = event_id
+        self.message: discord.Message | None = None
+        self.created_at = datetime.now(tz=WARSAW)
+        self._embed = discord.Embed(title=ptype.title, color=ptype.color)
+        self._embed.add_field(name="Zapraszamy na", value=f"{voice_channel.mention}", inline=False)
+        self._embed.add_field(name="Start", value=f"**{start}** · {_rel_pl(starts_at)}", inline=False)
+        if LOGO_URL:
+            self._embed.set_thumbnail(url=LOGO_URL)
+        if ptype.image_url:
+            self._embed.set_image(url=ptype.image_url)
+
+    def build_embed(self) -> discord.Embed:
+        self._embed.set_footer(text=f"Zapisani: {len(self.users)}")
+        return self._embed
+
+    def persist(self):
+        if not self.message:
+            return
+        STORE.save_event(self.event_id, "ping", self.message.guild.id, self.message.channel.id, self.message.id, {
+            "type": self.ptype.key,
+            "title": self.ptype.title,
+            "voice_id": self.voice_channel.id,
+            "start": self.start,
+            "starts_at": self.starts_at.isoformat(),
+            "image_url": self.ptype.image_url,
+            "created_at": self.created_at.isoformat(),
+        })
+
+    def refresh(self):
+        """Schedule a coalesced re-render of the announcement (see RenderScheduler)."""
+        if self.message:
+            RENDER.request(self.message.id, self._render)
+
+    async def _render(self):
+        if self.message:
+            await self.message.edit(embed=self.build_embed(), view=self)
+
+    @discord.ui.button(label="Będę", style=discord.ButtonStyle.success)
+    async def bede(self, it: discord.Interaction, btn: discord.ui.Button):
+        if await THROTTLE.throttled(it, "ping", self.event_id or id(self)):
+            return
+        if self.message is None:
+            self.message = it.message
+        added = self.users.add(it.user.id)
+        if added:
+            self._unsnapped += 1
+            if PING_SNAPSHOT_EVERY and self._unsnapped >= PING_SNAPSHOT_EVERY:
+                self._unsnapped = 0
+                STORE.snapshot(self.event_id, "users", self.users.to_bytes())
+            else:
+                STORE.append(self.event_id, "add", "users", it.user.id)
+        await it.response.send_message("✅ Zapisano!", ephemeral=True)
+        if added:
+            self.refresh()
+
+    @discord.ui.button(label="ListaBędę", style=discord.ButtonStyle.secondary)
+    async def lista_bede(self, it: discord.Interaction, btn: discord.ui.Button):
+        if not self.users:
+            await it.response.send_message("📭 Nikt się jeszcze nie zapisał.", ephemeral=True)
+            return
+        lines = [f"{i}. <@{uid}>" for i, uid in self.users.numbered()]
+        await ListPagerView(f"Lista zapisanych ({len(lines)})", lines).send(it)
+
+async def _send_ping(interaction: discord.Interaction, ptype: PingType, voice_channel: discord.VoiceChannel,
+                     start: str):
+    try:
+        starts_at = parse_event_time(start)
+    except ValueError:
+        return await interaction.response.send_message(f"Podaj godzinę {TIME_INPUT_HINT} (np. 19:00).", ephemeral=True)
+    view = PingView(ptype, voice_channel, start, starts_at, event_id=interaction.id)
+    embed = view.build_embed()
     try:
         await interaction.response.send_message("✅ Wysłano ping.", ephemeral=True)
     except Exception:
         pass
-    await interaction.channel.send(content="@everyone", embed=embed, view=view)
+    view.message = await interaction.channel.send(content="@everyone", embed=embed, view=view)
+    view.persist()
 
-def _check_env():
-    if not TOKEN:
-        raise RuntimeError("Brak DISCORD_TOKEN w .env")
 
+def _register_ping_command(ptype: PingType):
+    @bot.tree.command(name=f"ping-{ptype.key}", description=ptype.description)
+    @app_commands.describe(voice_channel="Kanał głosowy", start="Godzina startu HH:MM")
+    async def ping_command(interaction: discord.Interaction, voice_channel: discord.VoiceChannel, start: str):
+        await _send_ping(interaction, ptype, voice_channel, start)
+    return ping_command
 
+for _ptype in PING_TYPES.values():
+    _register_ping_command(_ptype)
 
-# ===== Render/UptimeRobot web server =====
-def _create_web_app():
-    app = web.Application()
-    async def root(_):
-        return web.Response(text="OK", content_type="text/plain")
-    async def health(_):
-        return web.Response(text="HEALTHY", content_type="text/plain")
-    app.router.add_get("/", root)
-    app.router.add_get("/health", health)
-    return app
+def _check_env():
+    if not TOKEN:
+        raise RuntimeError("Brak DISCORD_TOKEN w .env")
 
 
 
@@ -2658,13 +4497,9 @@ if __name__ == "__main__":
 
     async def _main():
         token = _check_env()
-        # Start web server for Render/UptimeRobot
-        app = _create_web_app()
-        runner = web.AppRunner(app)
-        await runner.setup()
-        port = int(os.getenv("PORT", "8080"))
-        site = web.TCPSite(runner, "0.0.0.0", port)
-        await site.start()
+        # Start web server for Render/UptimeRobot (once, before login)
+        await HEALTH.start()
+        SCHEDULER.start()
 
         # Start discord bot
         # Use start() instead of run() to keep control in this coroutine
@@ -2680,7 +4515,8 @@ if __name__ == "__main__":
 
         await stop.wait()
         await bot.close()
-        await runner.cleanup()
+        await STORE.aclose()
+        await HEALTH.aclose()
 
     asyncio.run(_main())
 
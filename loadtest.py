@@ -0,0 +1,436 @@
+# --== loadtest.py — offline load test for the event views ==--
+"""Drives simulated users through the CAPT / AirDrop / MCL / ping views without Discord.
+
+    python loadtest.py --users 2000 --events 3
+    python loadtest.py --kinds capt mcl --users 500 --render-window 0.2
+
+Fake Guild/Channel/Message/Interaction objects stand in for discord.py and record every
+send/edit instead of calling the API. Every click goes through the real dispatch path
+(View._scheduled_task -> item callback), so RenderScheduler coalescing, the EventStore
+journal and the metrics hooks are all exercised. Reports p50/p99 callback latency per
+action, messages sent/edited and retained memory per event.
+"""
+import os
+import sys
+import argparse
+import asyncio
+import itertools
+import random
+import tempfile
+import time
+import tracemalloc
+import gc
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+# The bot reads its config at import time: keep the journal out of the working tree.
+_TMP = tempfile.mkdtemp(prefix="loadtest-")
+os.environ.setdefault("EVENT_DB_PATH", os.path.join(_TMP, "events.sqlite3"))
+os.environ.setdefault("SLOW_CALLBACK_SECONDS", "0")
+
+import logging
+import discord
+import bot
+
+_ids = itertools.count(1_300_000_000_000_000_000)
+
+
+# ===== Fake Discord layer =====
+class Recorder:
+    """Counts what would have been sent to Discord."""
+
+    def __init__(self):
+        self.calls = Counter()  # "message.edit", "channel.send", "response.send_message", ...
+        self.edits_per_message = Counter()
+
+    def hit(self, what: str, message_id: int | None = None):
+        self.calls[what] += 1
+        if message_id is not None and what == "message.edit":
+            self.edits_per_message[message_id] += 1
+
+REC = Recorder()
+
+
+class FakeMember:
+    def __init__(self, uid: int, guild: "FakeGuild", admin: bool = False):
+        self.id = uid
+        self.name = f"user{uid % 100000}"
+        self.display_name = f"Gracz {uid % 100000}"
+        self.mention = f"<@{uid}>"
+        self.bot = False
+        self.guild = guild
+        self.roles = []
+        self.guild_permissions = discord.Permissions.all() if admin else discord.Permissions.none()
+        self.avatar = None
+        self.display_avatar = None
+
+
+class FakeMessage:
+    def __init__(self, channel: "FakeChannel", content=None, embed=None, view=None):
+        self.id = next(_ids)
+        self.channel = channel
+        self.guild = channel.guild
+        self.content = content
+        self.embeds = [embed] if embed else []
+        self.view = view
+
+    async def edit(self, **kwargs):
+        REC.hit("message.edit", self.id)
+        if "embed" in kwargs:
+            self.embeds = [kwargs["embed"]] if kwargs["embed"] else []
+        if "content" in kwargs:
+            self.content = kwargs["content"]
+        return self
+
+    async def delete(self, **_):
+        REC.hit("message.delete")
+
+
+class FakeChannel:
+    def __init__(self, guild: "FakeGuild", name: str = "eventy"):
+        self.id = next(_ids)
+        self.guild = guild
+        self.name = name
+        self.mention = f"<#{self.id}>"
+
+    async def send(self, content=None, **kwargs):
+        REC.hit("channel.send")
+        return FakeMessage(self, content, kwargs.get("embed"), kwargs.get("view"))
+
+    def get_partial_message(self, message_id: int):
+        msg = FakeMessage(self)
+        msg.id = message_id
+        return msg
+
+
+GUILDS: dict[int, "FakeGuild"] = {}
+# Event views keep only ids and resolve the guild through the client, like after a restart.
+bot.bot.get_guild = GUILDS.get
+
+
+class FakeGuild:
+    def __init__(self, n_members: int):
+        self.id = next(_ids)
+        self.name = "Load test"
+        self.icon = None
+        self.chunked = True
+        self.members: dict[int, FakeMember] = {}
+        self.owner = FakeMember(next(_ids), self, admin=True)
+        self.owner_id = self.owner.id
+        self.members[self.owner.id] = self.owner
+        for _ in range(n_members):
+            m = FakeMember(next(_ids), self)
+            self.members[m.id] = m
+        self.channel = FakeChannel(self)
+        self.voice = FakeChannel(self, "voice")
+        GUILDS[self.id] = self
+
+    @property
+    def me(self):
+        return self.owner
+
+    def get_member(self, uid: int):
+        return self.members.get(uid)
+
+    def get_channel(self, cid: int):
+        return {self.channel.id: self.channel, self.voice.id: self.voice}.get(cid)
+
+    get_channel_or_thread = get_channel
+
+    async def fetch_member(self, uid: int):
+        m = self.members.get(uid)
+        if m is None:
+            raise discord.NotFound(_FakeHTTPResponse(404), "Unknown Member")
+        return m
+
+    async def query_members(self, user_ids=(), limit=100, cache=True):
+        return [self.members[u] for u in user_ids if u in self.members]
+
+
+class _FakeHTTPResponse:
+    def __init__(self, status: int):
+        self.status = status
+        self.reason = "fake"
+
+
+class FakeResponse:
+    def __init__(self, inter: "FakeInteraction"):
+        self._inter = inter
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    def _ack(self, what: str):
+        if self._done:
+            raise discord.InteractionResponded(self._inter)
+        self._done = True
+        REC.hit(what)
+
+    async def send_message(self, content=None, **kwargs):
+        self._ack("response.send_message")
+        self._inter.sent_view = kwargs.get("view")
+        self._inter.sent_content = content
+
+    async def edit_message(self, **kwargs):
+        self._ack("response.edit_message")
+        if "view" in kwargs:
+            self._inter.sent_view = kwargs["view"]
+
+    async def defer(self, **_):
+        self._ack("response.defer")
+
+    async def send_modal(self, modal):
+        self._ack("response.send_modal")
+        self._inter.sent_modal = modal
+
+
+class FakeFollowup:
+    def __init__(self, inter: "FakeInteraction"):
+        self._inter = inter
+
+    async def send(self, content=None, **kwargs):
+        REC.hit("followup.send")
+        if kwargs.get("view") is not None:
+            self._inter.sent_view = kwargs["view"]
+        return FakeMessage(self._inter.channel, content, kwargs.get("embed"), kwargs.get("view"))
+
+
+class FakeInteraction:
+    def __init__(self, user: FakeMember, message: FakeMessage | None = None, data: dict | None = None):
+        self.id = next(_ids)
+        self.user = user
+        self.guild = user.guild
+        self.channel = user.guild.channel
+        self.message = message
+        self.data = data or {}
+        self.extras = {}
+        self.command = None
+        self.created_at = datetime.now(tz=bot.WARSAW)
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        self.sent_view = None
+        self.sent_modal = None
+        self.sent_content = None
+
+    async def edit_original_response(self, **_):
+        REC.hit("response.edit_original")
+
+
+# ===== Driver =====
+class Stats:
+    def __init__(self):
+        self.latency: dict[str, list[float]] = defaultdict(list)
+        self.errors = Counter()
+
+STATS = Stats()
+
+
+def _count_errors(view):
+    async def on_error(interaction, error, item=None):
+        STATS.errors[f"{type(view).__name__}: {type(error).__name__}: {error}"] += 1
+    view.on_error = on_error
+
+
+async def click(action: str, view, item, user: FakeMember, values=None) -> FakeInteraction:
+    """Dispatches one component interaction exactly like discord.py's ViewStore would."""
+    inter = FakeInteraction(user, getattr(view, "message", None),
+                            {"values": [str(v) for v in values]} if values is not None else {})
+    _count_errors(view)
+    t0 = time.perf_counter()
+    await view._scheduled_task(item, inter)
+    STATS.latency[action].append(time.perf_counter() - t0)
+    return inter
+
+
+async def submit(action: str, modal, user: FakeMember) -> FakeInteraction:
+    inter = FakeInteraction(user)
+    t0 = time.perf_counter()
+    await modal._scheduled_task(inter, [])
+    STATS.latency[action].append(time.perf_counter() - t0)
+    return inter
+
+
+def _select(view) -> discord.ui.Select:
+    return next(c for c in view.children if isinstance(c, discord.ui.Select))
+
+
+async def _drain():
+    """Waits until every coalesced render and journal write has gone out."""
+    while bot.RENDER._pending or bot.RENDER._tasks:
+        await asyncio.sleep(0.05)
+
+
+async def _pick_flow(prefix: str, view, open_item, author: FakeMember, max_pages: int):
+    inter = await click(f"{prefix}.pick_open", view, open_item, author)
+    picker = inter.sent_view
+    if picker is None:
+        return
+    for _ in range(max_pages):
+        sel = _select(picker)
+        values = [o.value for o in sel.options][:max(0, sel.max_values)]
+        await click(f"{prefix}.pick_select", picker, sel, author, values)
+        await click(f"{prefix}.pick_next", picker, picker.next_page, author)
+    await click(f"{prefix}.pick_publish", picker, picker.publish, author)
+
+
+async def _users_flow(prefix: str, view, join, leave, users: list[FakeMember], concurrency: int, leave_ratio: float):
+    sem = asyncio.Semaphore(concurrency)
+    rnd = random.Random(len(users))
+
+    async def one(u: FakeMember):
+        async with sem:
+            await join(u)
+            if leave is not None and rnd.random() < leave_ratio:
+                await click(f"{prefix}.leave", view, leave, u)
+                if rnd.random() < 0.5:
+                    await join(u)
+
+    await asyncio.gather(*(one(u) for u in users))
+
+
+async def run_capt(guild: FakeGuild, users: list[FakeMember], args):
+    starts = datetime.now(tz=bot.WARSAW) + timedelta(hours=1)
+    view = bot.CaptView(starts, guild, guild.owner, bot.LOGO_URL, event_id=next(_ids))
+    view.message = await guild.channel.send(embed=view.build_embed(), view=view)
+
+    async def join(u):
+        await click("capt.join", view, view.join, u)
+
+    await _users_flow("capt", view, join, view.leave, users, args.concurrency, args.leave_ratio)
+    await _pick_flow("capt", view, view.pick, guild.owner, args.pick_pages)
+    return view
+
+
+async def run_airdrop(guild: FakeGuild, users: list[FakeMember], args):
+    starts = datetime.now(tz=bot.WARSAW) + timedelta(hours=1)
+    view = bot.AirdropView(starts, guild, guild.owner, "Load test", guild.voice, event_id=next(_ids))
+    view.message = await guild.channel.send(embed=view.build_embed(), view=view)
+
+    async def join(u):
+        await click("airdrop.join", view, view.join, u)
+
+    await _users_flow("airdrop", view, join, view.leave, users, args.concurrency, args.leave_ratio)
+    await _pick_flow("airdrop", view, view.pick_from_signups, guild.owner, args.pick_pages)
+    return view
+
+
+async def run_mcl(guild: FakeGuild, users: list[FakeMember], args):
+    now = datetime.now(tz=bot.WARSAW)
+    view = bot.MclView("MCL", guild.voice, now + timedelta(hours=1), now + timedelta(hours=2),
+                       guild, guild.owner, event_id=next(_ids))
+    view.message = await guild.channel.send(embed=discord.Embed(title="MCL"), view=view)
+
+    async def join(u):
+        inter = await click("mcl.join_btn", view, view.join_btn, u)
+        modal = inter.sent_modal
+        modal.name_uid._value = f"Gracz {u.id % 100000} | {u.id % 99991}"
+        await submit("mcl.signup_submit", modal, u)
+
+    await _users_flow("mcl", view, join, view.leave_btn, users, args.concurrency, args.leave_ratio)
+    await _pick_flow("mcl", view, view.admin_pick_btn, guild.owner, args.pick_pages)
+    return view
+
+
+async def run_ping(guild: FakeGuild, users: list[FakeMember], args):
+    view = bot.PingView(bot.PING_TYPES["cayo"], guild.voice, "19:00", bot.parse_event_time("19:00"),
+                        event_id=next(_ids))
+    view.message = await guild.channel.send(content="@everyone", embed=view.build_embed(), view=view)
+
+    async def join(u):
+        await click("ping.bede", view, view.bede, u)
+
+    await _users_flow("ping", view, join, None, users, args.concurrency, 0.0)
+    await click("ping.lista_bede", view, view.lista_bede, guild.owner)
+    return view
+
+
+FLOWS = {"capt": run_capt, "airdrop": run_airdrop, "mcl": run_mcl, "ping": run_ping}
+
+
+async def measure_memory(kind: str, n_users: int, args) -> tuple[int, int]:
+    """Retained bytes for one event with ``n_users`` signups (tracemalloc, after gc)."""
+    guild = FakeGuild(n_users)
+    users = [m for m in guild.members.values() if m is not guild.owner]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    view = await FLOWS[kind](guild, users, args)
+    await _drain()
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained = sum(s.size_diff for s in after.compare_to(before, "filename"))
+    del view
+    return retained, n_users
+
+
+def _pct(values: list[float], q: float) -> float:
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def main(args):
+    logging.getLogger().setLevel(logging.WARNING)
+    bot.RENDER.window = args.render_window
+    random.seed(args.seed)
+
+    t0 = time.perf_counter()
+    for kind in args.kinds:
+        guilds = [FakeGuild(args.users) for _ in range(args.events)]
+        await asyncio.gather(*(
+            FLOWS[kind](g, [m for m in g.members.values() if m is not g.owner], args) for g in guilds
+        ))
+    await _drain()
+    wall = time.perf_counter() - t0
+
+    print(f"\n== {args.events} event(s) x {args.users} users, concurrency {args.concurrency}, "
+          f"render window {args.render_window}s, {wall:.2f}s wall ==")
+    print(f"{'action':<24}{'n':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for action in sorted(STATS.latency):
+        lat = STATS.latency[action]
+        print(f"{action:<24}{len(lat):>8}{_pct(lat, 0.5) * 1000:>10.2f}{_pct(lat, 0.99) * 1000:>10.2f}"
+              f"{max(lat) * 1000:>10.2f}")
+    print("\n-- issued (would-be API calls) --")
+    for what, n in sorted(REC.calls.items()):
+        print(f"{what:<24}{n:>8}")
+    hottest = REC.edits_per_message.most_common(1)
+    if hottest:
+        print(f"{'max edits/message':<24}{hottest[0][1]:>8}")
+    print("\n-- RenderScheduler --")
+    for k, v in bot.RENDER.stats().items():
+        print(f"{k:<24}{v:>8}")
+    if args.memory:
+        # Separate pass: tracemalloc slows everything down, so it must not skew the latencies above.
+        print("\n-- retained memory per event --")
+        for kind in args.kinds:
+            size, n = await measure_memory(kind, args.users, args)
+            await _drain()
+            print(f"{kind:<24}{size / 1024:>8.1f} KiB  ({size / max(1, n):.0f} B/user)")
+    await bot.STORE.aclose()
+    errors = STATS.errors
+    if errors:
+        print("\n-- callback errors --")
+        for err, n in errors.most_common(10):
+            print(f"{n:>6}  {err}")
+    return 1 if errors else 0
+
+
+def _args(argv=None):
+    p = argparse.ArgumentParser(description="Offline load test for the event views.")
+    p.add_argument("--kinds", nargs="+", choices=sorted(FLOWS), default=sorted(FLOWS))
+    p.add_argument("--users", type=int, default=1000, help="symulowani użytkownicy na event")
+    p.add_argument("--events", type=int, default=2, help="równoległe eventy na rodzaj")
+    p.add_argument("--concurrency", type=int, default=200, help="równoczesne kliknięcia na event")
+    p.add_argument("--leave-ratio", type=float, default=0.2)
+    p.add_argument("--pick-pages", type=int, default=2, help="strony wybierane w PICK")
+    p.add_argument("--render-window", type=float, default=bot.RENDER_COALESCE_SECONDS)
+    p.add_argument("--no-memory", dest="memory", action="store_false")
+    p.add_argument("--seed", type=int, default=317)
+    return p.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(_args())))
@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# bot.py reads its config at import time: keep the journal out of the working tree.
+os.environ.setdefault("EVENT_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="tests-"), "events.sqlite3"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,66 @@
+"""MclChangeTimesModal: both inputs are validated before the event changes."""
+import asyncio
+import types
+from datetime import datetime, timedelta
+
+import bot
+from loadtest import FakeGuild, FakeInteraction
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _mcl(guild: FakeGuild) -> "bot.MclView":
+    now = datetime.now(tz=bot.WARSAW)
+    view = bot.MclView("MCL", guild.voice, now + timedelta(hours=1), now + timedelta(hours=2),
+                       guild, guild.owner, event_id=guild.id)
+    view.message = await guild.channel.send(embed=bot.discord.Embed(title="MCL"), view=view)
+    view.persist()
+    view.schedule_start()
+    return view
+
+
+async def _submit(view: "bot.MclView", start: str = "", tp: str = "") -> FakeInteraction:
+    modal = bot.MclChangeTimesModal(types.SimpleNamespace(parent=view, guild=view.guild))
+    modal.start_input._value = start
+    modal.tp_input._value = tp
+    inter = FakeInteraction(view.guild.owner)
+    await modal.on_submit(inter)
+    return inter
+
+
+def test_bad_teleport_leaves_start_untouched():
+    async def scenario():
+        guild = FakeGuild(1)
+        view = await _mcl(guild)
+        start, tp = view.start_at, view.tp_at
+        start_deadline = bot.SCHEDULER.deadline(bot.SCHEDULER.key("start", view))
+        await _submit(view, start="+30m", tp="nie godzina")
+        assert (view.start_at, view.tp_at) == (start, tp)
+        assert bot.SCHEDULER.deadline(bot.SCHEDULER.key("start", view)) == start_deadline
+
+    run(scenario())
+
+
+def test_start_and_teleport_change_together():
+    async def scenario():
+        guild = FakeGuild(1)
+        view = await _mcl(guild)
+        await _submit(view, start="+3h", tp="+4h")
+        assert view.tp_at - view.start_at == timedelta(hours=1)
+        assert bot.SCHEDULER.deadline(bot.SCHEDULER.key("start", view)) == view.start_at.timestamp()
+
+    run(scenario())
+
+
+def test_teleport_only_change_rearms_registry_expiry():
+    async def scenario():
+        guild = FakeGuild(1)
+        view = await _mcl(guild)
+        await _submit(view, tp="+10h")
+        expected = view.tp_at + timedelta(hours=bot.EVENT_GRACE_HOURS)
+        assert bot.SCHEDULER.deadline(bot.SCHEDULER.key("expire", view)) == expected.timestamp()
+        assert bot.ACTIVE_MCLS.get(view.message.id) is view
+
+    run(scenario())
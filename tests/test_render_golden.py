@@ -0,0 +1,142 @@
+"""Golden test: the incremental embed builders must match the legacy make_* functions.
+
+Random add/remove/relabel sequences are replayed on CAPT, AirDrop and MCL views, and after
+every step ``Embed.to_dict()`` of the cached builder is compared with the reference one.
+"""
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+import bot
+from loadtest import FakeGuild
+
+STEPS = 300
+
+
+class FrozenDatetime(datetime):
+    """Footers carry the current minute; pin it so both builders see the same one."""
+
+    @classmethod
+    def now(cls, tz=None):
+        return datetime(2026, 5, 1, 20, 15, tzinfo=tz)
+
+
+@pytest.fixture(autouse=True)
+def frozen_clock(monkeypatch):
+    monkeypatch.setattr(bot, "datetime", FrozenDatetime)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_capt_embed_matches_make_main_embed(seed):
+    async def scenario():
+        rnd = random.Random(seed)
+        guild = FakeGuild(60)
+        members = list(guild.members.values())
+        starts = datetime.now(tz=bot.WARSAW) + timedelta(hours=1)
+        view = bot.CaptView(starts, guild, guild.owner, bot.LOGO_URL, event_id=rnd.getrandbits(60))
+        for _ in range(STEPS):
+            roll = rnd.random()
+            uid = rnd.choice(members).id
+            if roll < 0.55:
+                view.users.add(uid)
+            elif roll < 0.9:
+                view.users.discard(uid)
+            elif roll < 0.95:
+                view.state.starts_at = view.starts_at + timedelta(minutes=rnd.randint(1, 30))
+            else:
+                view.started = not view.started
+            expected = bot.make_main_embed(view.starts_at, view.users, guild, guild.owner, view.image_url)
+            if view.started:
+                expected.description += "\n**CAPT rozpoczął się.**"
+            assert view.build_embed().to_dict() == expected.to_dict()
+
+    run(scenario())
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_airdrop_embed_matches_make_airdrop_embed(seed):
+    async def scenario():
+        rnd = random.Random(seed)
+        guild = FakeGuild(60)
+        members = list(guild.members.values())
+        starts = datetime.now(tz=bot.WARSAW) + timedelta(hours=1)
+        view = bot.AirdropView(starts, guild, guild.owner, "Golden", guild.voice, event_id=rnd.getrandbits(60))
+        for _ in range(STEPS):
+            roll = rnd.random()
+            uid = rnd.choice(members).id
+            if roll < 0.55:
+                view.users.add(uid)
+            elif roll < 0.9:
+                view.users.discard(uid)
+            elif roll < 0.95:
+                view.state.info_text = f"Opis {rnd.randint(0, 9)}"
+            else:
+                view.started = not view.started
+            expected = bot.make_airdrop_embed(view.starts_at, view.users, guild, guild.owner, view.info_text,
+                                              view.voice, view.max_slots, len(view.queue))
+            if view.started:
+                expected.description += "\n**AirDrop rozpoczął się.**"
+            assert view.build_embed().to_dict() == expected.to_dict()
+
+    run(scenario())
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_mcl_selected_embed_matches_mcl_make_selected_embed(seed):
+    async def scenario():
+        rnd = random.Random(seed)
+        guild = FakeGuild(60)
+        members = list(guild.members.values())
+        now = datetime.now(tz=bot.WARSAW)
+        view = bot.MclView("MCL", guild.voice, now + timedelta(hours=1), now + timedelta(hours=2),
+                           guild, guild.owner, event_id=rnd.getrandbits(60))
+        for _ in range(STEPS):
+            roll = rnd.random()
+            member = rnd.choice(members)
+            uid = member.id
+            if roll < 0.35:
+                await view.add_or_update_signup(member, f"Gracz {rnd.randint(0, 999)} | {rnd.randint(0, 99999)}")
+            elif roll < 0.55:
+                await view.move([uid], view.SIGNUPS, view.PICKED)
+            elif roll < 0.7:
+                await view.remove_signup(member)
+            elif roll < 0.85:
+                await view.move([uid], view.PICKED, view.SIGNUPS)
+            else:  # MclAssignLabelModal.on_submit
+                if rnd.random() < 0.7:
+                    view.extra_labels[uid] = rnd.choice(["caller", "support", "lider"])
+                else:
+                    view.extra_labels.pop(uid, None)
+                view.selected_lines.invalidate(uid)
+            expected = bot.mcl_make_selected_embed(guild.owner, guild, view.selected_ids, view.input_map,
+                                                   view.extra_labels, view.event_name)
+            assert view.build_selected_embed(guild.owner).to_dict() == expected.to_dict()
+
+    run(scenario())
+
+
+def test_mcl_selected_embed_stays_within_discord_limits():
+    """Past 4096 chars the legacy embed would be rejected; the incremental one spills into
+    fields and ends with '(+N)' instead."""
+    async def scenario():
+        guild = FakeGuild(400)
+        now = datetime.now(tz=bot.WARSAW)
+        view = bot.MclView("MCL", guild.voice, now + timedelta(hours=1), now + timedelta(hours=2),
+                           guild, guild.owner, event_id=1)
+        members = list(guild.members.values())[1:]
+        for m in members:
+            await view.add_or_update_signup(m, f"Imię Nazwisko {m.id % 1000} | {m.id % 99991}")
+        await view.move([m.id for m in members], view.SIGNUPS, view.PICKED)
+        emb = view.build_selected_embed(guild.owner)
+        assert len(emb.description) <= bot.EMBED_DESC_LIMIT
+        assert all(len(f.value) <= bot.EMBED_FIELD_LIMIT for f in emb.fields)
+        assert len(emb) <= bot.EMBED_TOTAL_LIMIT
+        assert emb.fields[-1].value.startswith("(+")
+
+    run(scenario())
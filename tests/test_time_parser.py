@@ -0,0 +1,41 @@
+"""parse_event_time: every HH:MM form the pre-refactor parser accepted still parses the same."""
+from datetime import timedelta
+
+import pytest
+
+import bot
+from timebench import legacy  # the old re.findall parser, kept as the baseline
+
+LEGACY_FORMS = ["19:00", "19.00", "19 00", "1900", "930", "19:5", "19h00", "19-00", "19:00:00", " 7:05 "]
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    bot._time_cache.clear()
+
+
+@pytest.mark.parametrize("raw", LEGACY_FORMS)
+def test_matches_legacy_parser(raw):
+    assert bot.parse_event_time(raw) == legacy(raw)
+
+
+@pytest.mark.parametrize("raw, hh, mm", [("19:5", 19, 5), ("19h00", 19, 0), ("19-00", 19, 0), ("19:00:00", 19, 0)])
+def test_separators_and_seconds(raw, hh, mm):
+    t = bot.parse_event_time(raw)
+    assert (t.hour, t.minute) == (hh, mm)
+
+
+def test_explicit_date_with_short_minute():
+    t = bot.parse_event_time("24.12.2099 19:5")
+    assert (t.year, t.month, t.day, t.hour, t.minute) == (2099, 12, 24, 19, 5)
+
+
+def test_relative_offset():
+    now = bot._now_minute()
+    assert bot.parse_event_time("+1h30m") == now + timedelta(hours=1, minutes=30)
+
+
+@pytest.mark.parametrize("raw", ["", "19", "abc", "25:00", "19:60", "+", "01.01.2000 19:00"])
+def test_rejected(raw):
+    with pytest.raises(ValueError):
+        bot.parse_event_time(raw)
@@ -0,0 +1,71 @@
+# --== timebench.py — micro-benchmark for bot.parse_event_time ==--
+"""Compares the shared time parser with the per-command copy it replaced.
+
+    python timebench.py
+    python timebench.py --number 200000
+
+"legacy" is the old re.findall + datetime.now() code (kept here only as a baseline),
+"cold" runs parse_event_time with its memo cleared before every call, "cached" is the
+repeated-input case (same input within one minute).
+"""
+import os
+import sys
+import argparse
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+import re
+
+_TMP = tempfile.mkdtemp(prefix="timebench-")
+os.environ.setdefault("EVENT_DB_PATH", os.path.join(_TMP, "events.sqlite3"))
+os.environ.setdefault("SLOW_CALLBACK_SECONDS", "0")
+
+import bot
+
+INPUTS = ["19:00", "19.00", "1900", "+15m", "24.12 19:00"]
+LEGACY_INPUTS = {"19:00", "19.00", "1900"}  # the old parser had no offsets or dates
+
+
+def legacy(raw_time: str):
+    raw = str(raw_time or "").strip()
+    parts = re.findall(r"\d+", raw)
+    if len(parts) >= 2:
+        hh, mm = int(parts[0]), int(parts[1])
+    elif len(parts) == 1 and len(parts[0]) in (3, 4):
+        hh = int(parts[0][:-2])
+        mm = int(parts[0][-2:])
+    else:
+        raise ValueError("bad time format")
+    if not (0 <= hh <= 23 and 0 <= mm <= 59):
+        raise ValueError("time out of range")
+    now_pl = datetime.now(tz=bot.WARSAW)
+    t = datetime(now_pl.year, now_pl.month, now_pl.day, hh, mm, tzinfo=bot.WARSAW)
+    return t if t > now_pl else t + timedelta(days=1)
+
+
+def cold(raw: str):
+    bot._time_cache.clear()
+    return bot.parse_event_time(raw)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Micro-benchmark for bot.parse_event_time.")
+    p.add_argument("--number", type=int, default=100_000, help="calls per measurement")
+    p.add_argument("--repeat", type=int, default=5, help="measurements (best one is reported)")
+    args = p.parse_args(argv)
+
+    print(f"{'input':<14}{'legacy':>12}{'cold':>12}{'cached':>12}   (ns/call)")
+    for raw in INPUTS:
+        row = []
+        for fn in (legacy, cold, bot.parse_event_time):
+            if fn is legacy and raw not in LEGACY_INPUTS:
+                row.append("-")
+                continue
+            fn(raw)
+            best = min(timeit.repeat(lambda: fn(raw), number=args.number, repeat=args.repeat))
+            row.append(f"{best / args.number * 1e9:.0f}")
+        print(f"{raw:<14}" + "".join(f"{c:>12}" for c in row))
+
+
+if __name__ == "__main__":
+    sys.exit(main())